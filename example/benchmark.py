@@ -0,0 +1,64 @@
+#Micro-benchmarks for hot paths in experiment drivers
+
+import copy
+import timeit
+
+from schedcat.model.resources import initialize_resource_model
+from schedcat.model.tasks import SporadicTask, TaskSystem
+from schedcat.generator.tasks import TaskGenerator
+from schedcat.generator.tasksets import NAMED_PERIODS, NAMED_UTILIZATIONS
+from schedcat.util.time import ms2us
+
+def make_task_system(n=50, resources=4):
+    ts = TaskSystem([SporadicTask(10 * (i + 1), 1000 * (i + 1))
+                     for i in xrange(n)])
+    initialize_resource_model(ts)
+    for i, t in enumerate(ts):
+        t.response_time = t.deadline
+        t.prio_pt = t.deadline
+        for res_id in xrange(resources):
+            t.resmodel[res_id].add_request(i + res_id)
+    return ts
+
+def deepcopy_ts(ts):
+    #The copy path used before TaskSystem.copy() copied tasks structurally
+    return TaskSystem((copy.deepcopy(t) for t in ts))
+
+def bench_copy(n=50, repeat=3, number=100):
+    ts = make_task_system(n)
+    results = []
+    for (name, fun, arg) in [('deepcopy', deepcopy_ts, ts),
+                             ('TaskSystem.copy', TaskSystem.copy, ts),
+                             ('compact copy', TaskSystem.copy, ts.compact()),
+                            ]:
+        best = min(timeit.repeat(lambda: fun(arg), repeat=repeat,
+                                 number=number))
+        results.append((name, best / number))
+    return results
+
+def bench_generation(count=100, max_util=8, repeat=3):
+    g = TaskGenerator(NAMED_PERIODS['log-uni-moderate'],
+                      NAMED_UTILIZATIONS['exp-light'])
+    kargs = dict(max_util=max_util, time_conversion=ms2us)
+    cases = [
+        ('make_task_set',
+         lambda: [g.make_task_set(**kargs) for _ in xrange(count)]),
+        ('make_task_sets', lambda: g.make_task_sets(count, **kargs)),
+        ('columnar',
+         lambda: g.make_task_sets(count, as_columnar=True, **kargs)),
+    ]
+    results = []
+    for (name, fun) in cases:
+        best = min(timeit.repeat(fun, repeat=repeat, number=1))
+        results.append((name, best / count))
+    return results
+
+if __name__ == '__main__':
+    #Copying is on the critical path of fixpoint iterations (see locking.py)
+    for n in [10, 100, 1000]:
+        print "Copying a task system with %d tasks:" % n
+        for (name, secs) in bench_copy(n, number=max(1, 10000 // n)):
+            print "    %-16s %10.1f us" % (name, secs * 1e6)
+    print "Generating task sets with exp-light utilizations (per set):"
+    for (name, secs) in bench_generation():
+        print "    %-16s %10.1f us" % (name, secs * 1e6)
@@ -9,16 +9,18 @@ import schedcat.model.resources as resources
 import os
 import random
 
-CSLENGTH = { 'short'  : lambda: random.randint(1,   15),
-             'medium' : lambda: random.randint(1,  100),
-             'long'   : lambda: random.randint(5, 1280), }
+CSLENGTH = { 'short'  : lambda rng=random: rng.randint(1,   15),
+             'medium' : lambda rng=random: rng.randint(1,  100),
+             'long'   : lambda rng=random: rng.randint(5, 1280), }
 
-def generate_taskset_files(util_name, period_name, cap, number):
+#Pass a random.Random instance as rng (e.g., from
+#schedcat.generator.streams.py_stream) to make the generated sets reproducible
+def generate_taskset_files(util_name, period_name, cap, number, rng=None):
     generator = mkgen(NAMED_UTILIZATIONS[util_name],
                       NAMED_PERIODS[period_name])
     generated_sets = []
     for i in range(number):
-        taskset = generator(max_util=cap, time_conversion=ms2us)
+        taskset = generator(max_util=cap, time_conversion=ms2us, rng=rng)
         filename = "{0}_{1}_{2}_{3}".format(util_name,
                                             period_name, cap, i)
         write(taskset, filename)
@@ -26,20 +28,21 @@ def generate_taskset_files(util_name, period_name, cap, number):
     return generated_sets
 
 def generate_lock_taskset_files(util_name, period_name, cap,
-                                cslength, nres, pacc, number):
+                                cslength, nres, pacc, number, rng=None):
     generator = mkgen(NAMED_UTILIZATIONS[util_name],
                       NAMED_PERIODS[period_name])
+    r = random if rng is None else rng
     generated_sets = []
     for i in range(number):
-        taskset = generator(max_util=cap, time_conversion=ms2us)
+        taskset = generator(max_util=cap, time_conversion=ms2us, rng=rng)
         resources.initialize_resource_model(taskset)
         for task in taskset:
             for res_id in range(nres):
-                if random.random() < pacc:
-                    nreqs = random.randint(1, 5)
+                if r.random() < pacc:
+                    nreqs = r.randint(1, 5)
                     length = CSLENGTH[cslength]
                     for j in range(nreqs):
-                       task.resmodel[res_id].add_request(length())
+                       task.resmodel[res_id].add_request(length(r))
         filename = "{0}_{1}_{2}_{3}_{4}_{5}_{6}".format(
                 util_name, period_name, cap, cslength, nres, pacc,
                 i)
@@ -16,10 +16,9 @@ def copy_lock_overheads(oh, lock_oh):
 
 def get_oh_object(basic_oh, lock_oh, cache_oh, cache_level):
     oh = Overheads.from_file(basic_oh)
-    oh.initial_cache_loss = \
-            CacheDelay.from_file(cache_oh).__dict__[cache_level]
-    oh.cache_affinity_loss = \
-            CacheDelay.from_file(cache_oh).__dict__[cache_level]
+    cpmd = CacheDelay.from_file(cache_oh).__dict__[cache_level]
+    oh.initial_cache_loss = cpmd
+    oh.cache_affinity_loss = cpmd
     if lock_oh is not None:
         lock_oh = Overheads.from_file(lock_oh)
         copy_lock_overheads(oh, lock_oh)
@@ -0,0 +1,32 @@
+#ifndef BATCH_H
+#define BATCH_H
+
+#ifndef SWIG
+#include <vector>
+#endif
+
+/* Batched schedulability analysis: many task sets are passed in one call as
+ * flat parameter arrays. Task set i consists of the tasks with indices
+ * offsets[i], ..., offsets[i + 1] - 1 in the wcet, period, and deadline
+ * arrays; there are thus offsets.size() - 1 task sets. A deadline of zero
+ * denotes an implicit deadline.
+ */
+
+typedef std::vector<unsigned long> ParameterArray;
+
+void get_batch_taskset(TaskSet &ts,
+                       unsigned int idx,
+                       const ParameterArray &offsets,
+                       const ParameterArray &wcet,
+                       const ParameterArray &period,
+                       const ParameterArray &deadline);
+
+/* Apply test to each task set in the batch; returns one result per set. */
+std::vector<bool> is_schedulable_batch(SchedulabilityTest &test,
+                                       const ParameterArray &offsets,
+                                       const ParameterArray &wcet,
+                                       const ParameterArray &period,
+                                       const ParameterArray &deadline,
+                                       bool check_preconditions = true);
+
+#endif
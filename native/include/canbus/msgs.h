@@ -95,6 +95,24 @@ class CANTaskSet
         tasks.push_back(CANTask(wcet, period, period, priority, taskid));
     }
 
+    /* Bulk version of add_canbus_task(); see TaskSet::add_tasks(). */
+    bool add_canbus_tasks(const unsigned long *wcet, unsigned long num_wcet,
+                          const unsigned long *period, unsigned long num_period,
+                          const unsigned long *priority, unsigned long num_priority,
+                          const unsigned long *taskid, unsigned long num_taskid)
+    {
+        unsigned long n = num_wcet;
+
+        if (num_period != n || num_priority != n || num_taskid != n)
+            return false;
+
+        tasks.reserve(tasks.size() + n);
+        for (unsigned long i = 0; i < n; i++)
+            tasks.push_back(CANTask(wcet[i], period[i], period[i],
+                                    priority[i], taskid[i]));
+        return true;
+    }
+
     void add_retransmission(unsigned long time)
     {
         retransmissions.push_back(time);
@@ -12,21 +12,30 @@ class GlobalEDF : public SchedulabilityTest
     bool want_baruah;
     bool want_rta;
     bool want_la;
+    bool parallel;
+
+    bool any_schedulable(std::vector<SchedulabilityTest*> &tests,
+                         const TaskSet &ts);
 
  public:
+ /* In parallel mode, the expensive tests run concurrently (one thread
+  * each); once one of them succeeds, the others are cancelled. The cheap
+  * tests still run first, in the calling thread. */
  GlobalEDF(unsigned int num_processors,
            unsigned long rta_min_step = 1,
            bool want_baruah = true,
            bool want_rta    = true,
            bool want_ffdbf  = false,
            bool want_load   = false,
-           bool want_la     = true)
+           bool want_la     = true,
+           bool parallel    = false)
      : m(num_processors), rta_step(rta_min_step),
        want_ffdbf(want_ffdbf),
        want_load(want_load),
        want_baruah(want_baruah),
        want_rta(want_rta),
-       want_la(want_la) {};
+       want_la(want_la),
+       parallel(parallel) {};
 
     bool is_schedulable(const TaskSet &ts, bool check_preconditions = true);
 };
@@ -1,12 +1,46 @@
 #ifndef SCHEDULABILITY_H
 #define SCHEDULABILITY_H
 
+/* A flag that tells running schedulability tests to give up early, e.g.,
+ * because another test of a portfolio already succeeded. It may be set
+ * from a different thread. */
+class Cancellation
+{
+  private:
+    int flag;
+
+  public:
+    Cancellation() : flag(0) {}
+
+    void cancel() { __atomic_store_n(&flag, 1, __ATOMIC_RELEASE); }
+
+    bool is_cancelled() const
+    {
+        return __atomic_load_n(&flag, __ATOMIC_ACQUIRE);
+    }
+};
+
 class SchedulabilityTest
 {
+  private:
+    const Cancellation *cancellation;
+
+  protected:
+    /* Long-running tests poll this and report "not schedulable"
+     * (i.e., inconclusive) once cancelled. */
+    bool cancelled() const
+    {
+        return cancellation && cancellation->is_cancelled();
+    }
+
   public:
+    SchedulabilityTest() : cancellation(0) {}
+
     virtual bool is_schedulable(const TaskSet &ts,
                                 bool check_preconditions = true) = 0;
 
+    void set_cancellation(const Cancellation *c) { cancellation = c; }
+
     virtual ~SchedulabilityTest() {};
 };
 
@@ -266,6 +266,90 @@ public:
 		tasks.push_back(TaskInfo(period, deadline, response, cluster, priority, id, cost));
 	}
 
+	/* Bulk version of add_task(). The period and response arrays are
+	 * required; the other arrays may be empty, in which case the
+	 * defaults of add_task() apply. Returns false (and adds no task) if
+	 * the array lengths do not match or if the tasks do not fit into the
+	 * capacity given at construction time.
+	 */
+	bool add_tasks(const unsigned long *period, unsigned long num_period,
+		       const unsigned long *response, unsigned long num_response,
+		       const unsigned long *cluster, unsigned long num_cluster,
+		       const unsigned long *priority, unsigned long num_priority,
+		       const unsigned long *cost, unsigned long num_cost,
+		       const unsigned long *deadline, unsigned long num_deadline)
+	{
+		unsigned long n = num_period;
+
+		if (num_response != n
+		    || (num_cluster && num_cluster != n)
+		    || (num_priority && num_priority != n)
+		    || (num_cost && num_cost != n)
+		    || (num_deadline && num_deadline != n)
+		    || tasks.size() + n > tasks.capacity())
+			return false;
+
+		for (unsigned long i = 0; i < n; i++)
+			add_task(period[i], response[i],
+				 num_cluster ? cluster[i] : 0,
+				 num_priority ? priority[i] : UINT_MAX,
+				 num_cost ? cost[i] : 0,
+				 num_deadline ? deadline[i] : 0);
+		return true;
+	}
+
+	/* Bulk version of add_request(): request i is issued by the task
+	 * with index task[i] (in the order in which tasks were added).
+	 * Returns false (and adds no request) if the array lengths do not
+	 * match or if a task index is out of range.
+	 */
+	bool add_requests(const unsigned long *task, unsigned long num_task,
+			  const unsigned long *resource_id, unsigned long num_resource_id,
+			  const unsigned long *max_num, unsigned long num_max_num,
+			  const unsigned long *max_length, unsigned long num_max_length)
+	{
+		unsigned long n = num_task;
+
+		if (num_resource_id != n || num_max_num != n || num_max_length != n)
+			return false;
+		for (unsigned long i = 0; i < n; i++)
+			if (task[i] >= tasks.size())
+				return false;
+
+		for (unsigned long i = 0; i < n; i++)
+			tasks[task[i]].add_request(resource_id[i], max_num[i],
+						   max_length[i]);
+		return true;
+	}
+
+	/* Bulk version of add_request_rw(); see add_requests(). */
+	bool add_requests_rw(const unsigned long *task, unsigned long num_task,
+			     const unsigned long *resource_id, unsigned long num_resource_id,
+			     const unsigned long *max_num, unsigned long num_max_num,
+			     const unsigned long *max_length, unsigned long num_max_length,
+			     const unsigned long *type, unsigned long num_type,
+			     const unsigned long *locking_priority, unsigned long num_locking_priority)
+	{
+		unsigned long n = num_task;
+
+		if (num_resource_id != n || num_max_num != n
+		    || num_max_length != n || num_type != n
+		    || (num_locking_priority && num_locking_priority != n))
+			return false;
+		for (unsigned long i = 0; i < n; i++)
+			if (task[i] >= tasks.size()
+			    || (type[i] != WRITE && type[i] != READ))
+				return false;
+
+		for (unsigned long i = 0; i < n; i++)
+			tasks[task[i]].add_request(resource_id[i], max_num[i],
+						   max_length[i],
+						   (request_type_t) type[i],
+						   num_locking_priority ?
+						   locking_priority[i] : 0);
+		return true;
+	}
+
 	void add_request(unsigned int resource_id,
 			 unsigned int max_num,
 			 unsigned int max_length,
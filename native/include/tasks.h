@@ -203,6 +203,17 @@ class TaskSet
             prio_pt, suspension, tardiness_threshold));
     }
 
+    /* Append the tasks described by the given parameter arrays (e.g.,
+     * columns of a Python task set). The deadline, prio_pt, and suspension
+     * arrays may be empty, in which case the defaults of add_task() apply.
+     * Returns false (and adds no task) if the array lengths do not match.
+     */
+    bool add_tasks(const unsigned long *wcet, unsigned long num_wcet,
+                   const unsigned long *period, unsigned long num_period,
+                   const unsigned long *deadline, unsigned long num_deadline,
+                   const unsigned long *prio_pt, unsigned long num_prio_pt,
+                   const unsigned long *suspension, unsigned long num_suspension);
+
     unsigned int get_task_count() const { return tasks.size(); }
 
     Task& operator[](int idx) { return tasks[idx]; }
@@ -0,0 +1,121 @@
+/* Typemaps for passing parameter arrays to the native code in bulk.
+ *
+ * A (const unsigned long *BUFFER, unsigned long LENGTH) argument pair
+ * accepts any Python object that exposes its contents as a contiguous
+ * array of C (unsigned) longs, e.g., a NumPy array of dtype uint or int64,
+ * or (Python 2 only) an array.array('L'). The native code reads the
+ * elements in place; nothing is converted element by element.
+ */
+
+%{
+#include <string.h>
+
+/* Holds a buffer view for the duration of a wrapper call. */
+struct ULongBuffer
+{
+    Py_buffer view;
+    bool held;
+
+    ULongBuffer() : held(false) {}
+
+    ~ULongBuffer()
+    {
+        if (held)
+            PyBuffer_Release(&view);
+    }
+};
+
+static bool is_ulong_format(const Py_buffer &view)
+{
+    const char *fmt = view.format ? view.format : "B";
+    if (*fmt == '@')
+        fmt++;
+    return view.itemsize == sizeof(unsigned long)
+        && strlen(fmt) == 1 && strchr("lLqQ", *fmt);
+}
+
+static int has_buffer(PyObject *obj)
+{
+#if PY_MAJOR_VERSION < 3
+    if (PyObject_CheckReadBuffer(obj))
+        return 1;
+#endif
+    return PyObject_CheckBuffer(obj);
+}
+
+static int get_ulong_buffer(PyObject *obj, ULongBuffer &buf,
+                            const unsigned long **data,
+                            unsigned long *length)
+{
+    if (PyObject_CheckBuffer(obj))
+    {
+        if (PyObject_GetBuffer(obj, &buf.view,
+                               PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0)
+            return -1;
+        buf.held = true;
+        if (!is_ulong_format(buf.view))
+        {
+            PyErr_SetString(PyExc_TypeError,
+                            "expected a contiguous array of unsigned longs");
+            return -1;
+        }
+        *data = (const unsigned long *) buf.view.buf;
+        *length = buf.view.len / sizeof(unsigned long);
+        return 0;
+    }
+#if PY_MAJOR_VERSION < 3
+    /* old-style buffers (e.g., array.array) do not describe their items */
+    const void *raw;
+    Py_ssize_t size;
+    if (PyObject_AsReadBuffer(obj, &raw, &size) == 0)
+    {
+        if (size % sizeof(unsigned long))
+        {
+            PyErr_SetString(PyExc_TypeError,
+                            "expected an array of unsigned longs");
+            return -1;
+        }
+        *data = (const unsigned long *) raw;
+        *length = size / sizeof(unsigned long);
+        return 0;
+    }
+#endif
+    PyErr_SetString(PyExc_TypeError,
+                    "expected an object that supports the buffer protocol");
+    return -1;
+}
+%}
+
+%typemap(in) (const unsigned long *BUFFER, unsigned long LENGTH)
+             (ULongBuffer buf)
+{
+    if (get_ulong_buffer($input, buf, (const unsigned long **) &$1, &$2) < 0)
+        SWIG_fail;
+}
+
+%typemap(typecheck, precedence=SWIG_TYPECHECK_POINTER)
+    (const unsigned long *BUFFER, unsigned long LENGTH)
+{
+    $1 = has_buffer($input);
+}
+
+/* The bulk methods of the native task and resource models take their
+ * arrays as (const unsigned long *name, unsigned long num_name) pairs. */
+%apply (const unsigned long *BUFFER, unsigned long LENGTH) {
+    (const unsigned long *wcet, unsigned long num_wcet),
+    (const unsigned long *period, unsigned long num_period),
+    (const unsigned long *deadline, unsigned long num_deadline),
+    (const unsigned long *prio_pt, unsigned long num_prio_pt),
+    (const unsigned long *suspension, unsigned long num_suspension),
+    (const unsigned long *priority, unsigned long num_priority),
+    (const unsigned long *taskid, unsigned long num_taskid),
+    (const unsigned long *response, unsigned long num_response),
+    (const unsigned long *cluster, unsigned long num_cluster),
+    (const unsigned long *cost, unsigned long num_cost),
+    (const unsigned long *task, unsigned long num_task),
+    (const unsigned long *resource_id, unsigned long num_resource_id),
+    (const unsigned long *max_num, unsigned long num_max_num),
+    (const unsigned long *max_length, unsigned long num_max_length),
+    (const unsigned long *type, unsigned long num_type),
+    (const unsigned long *locking_priority, unsigned long num_locking_priority)
+};
@@ -1,4 +1,4 @@
-%module cansim
+%module(threads="1") cansim
 %{
 #define SWIG_FILE_WITH_INIT
 #include "tasks.h"
@@ -6,6 +6,13 @@
 #include "canbus/can_sim_ifs.h"
 %}
 
+/* Release the GIL while simulations run. */
+%nothread;
+%thread simulate_for_tardiness_stats;
+%thread get_job_completion_time;
+
+%include "buffers.i"
+
 %ignore Task::get_utilization(fractional_t &util) const;
 %ignore Task::get_density(fractional_t &density) const;
 %ignore Task::bound_demand(const integral_t &time, integral_t &demand) const;
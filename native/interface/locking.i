@@ -1,9 +1,28 @@
-%module locking
+%module(threads="1") locking
 %{
 #define SWIG_FILE_WITH_INIT
 #include "sharedres.h"
 %}
 
+/* Release the GIL while blocking bounds are computed. */
+%nothread;
+%thread task_fair_mutex_bounds;
+%thread task_fair_rw_bounds;
+%thread phase_fair_rw_bounds;
+%thread msrp_bounds_holistic;
+%thread global_omlp_bounds;
+%thread global_fmlp_bounds;
+%thread clustered_omlp_bounds;
+%thread clustered_rw_omlp_bounds;
+%thread clustered_kx_omlp_bounds;
+%thread part_omlp_bounds;
+%thread part_fmlp_bounds;
+%thread mpcp_bounds;
+%thread dpcp_bounds;
+%thread msrp_bounds;
+%thread global_pip_bounds;
+%thread ppcp_bounds;
+
 %newobject task_fair_mutex_bounds;
 %newobject task_fair_rw_bounds;
 %newobject phase_fair_rw_bounds;
@@ -1,9 +1,32 @@
-%module lp_analysis
+%module(threads="1") lp_analysis
 %{
 #define SWIG_FILE_WITH_INIT
 #include "lp_analysis.h"
 %}
 
+/* Release the GIL while blocking bounds are computed. */
+%nothread;
+%thread lp_dpcp_bounds;
+%thread lp_dflp_bounds;
+%thread lp_mpcp_bounds;
+%thread lp_part_fmlp_bounds;
+%thread lp_omip_bounds;
+%thread lp_gfmlp_bounds;
+%thread dummy_bounds;
+%thread lp_pfp_msrp_bounds;
+%thread lp_pfp_preemptive_fifo_spinlock_bounds;
+%thread lp_pfp_unordered_spinlock_bounds;
+%thread lp_pfp_baseline_spinlock_bounds;
+%thread lp_pfp_prio_spinlock_bounds;
+%thread lp_pfp_prio_fifo_spinlock_bounds;
+%thread lp_global_pip_bounds;
+%thread lp_ppcp_bounds;
+%thread lp_sa_gfmlp_bounds;
+%thread lp_global_fmlpp_bounds;
+%thread lp_prsb_bounds;
+%thread lp_no_progress_fifo_bounds;
+%thread lp_no_progress_priority_bounds;
+
 %newobject lp_dpcp_bounds;
 %newobject lp_dflp_bounds;
 
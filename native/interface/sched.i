@@ -1,4 +1,4 @@
-%module sched
+%module(threads="1") sched
 %{
 #define SWIG_FILE_WITH_INIT
 #include "tasks.h"
@@ -15,8 +15,22 @@
 #include "edf/gel_pl.h"
 #include "edf/qpa.h"
 #include "edf/la.h"
+#include "batch.h"
 %}
 
+/* Release the GIL while schedulability tests run (so that they can be
+ * executed in parallel from several Python threads), but not in cheap
+ * accessors. */
+%nothread;
+%thread is_schedulable;
+%thread is_schedulable_batch;
+%thread GELPl::GELPl;
+
+%include "buffers.i"
+%include "std_vector.i"
+%template(ParameterArray) std::vector<unsigned long>;
+%template(ResultArray) std::vector<bool>;
+
 %ignore Task::get_utilization(fractional_t &util) const;
 %ignore Task::get_density(fractional_t &density) const;
 %ignore Task::bound_demand(const integral_t &time, integral_t &demand) const;
@@ -31,6 +45,9 @@
 %ignore TaskSet::get_max_density const;
 %ignore TaskSet::approx_load const;
 
+%ignore Cancellation;
+%ignore SchedulabilityTest::set_cancellation;
+
 #include "tasks.h"
 #include "schedulability.h"
 #include "edf/baker.h"
@@ -45,3 +62,4 @@
 #include "edf/gel_pl.h"
 #include "edf/qpa.h"
 #include "edf/la.h"
+#include "batch.h"
@@ -1,3 +1,5 @@
+%include "buffers.i"
+
 %ignore Interference;
 %ignore RequestBound;
 %ignore TaskInfo;
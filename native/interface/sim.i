@@ -1,10 +1,18 @@
-%module sim
+%module(threads="1") sim
 %{
 #define SWIG_FILE_WITH_INIT
 #include "tasks.h"
 #include "edf/sim.h"
 %}
 
+/* Release the GIL while simulations run. */
+%nothread;
+%thread edf_misses_deadline;
+%thread edf_first_violation;
+%thread edf_observe_tardiness;
+
+%include "buffers.i"
+
 %ignore Task::get_utilization(fractional_t &util) const;
 %ignore Task::get_density(fractional_t &density) const;
 %ignore Task::bound_demand(const integral_t &time, integral_t &demand) const;
@@ -0,0 +1,44 @@
+#include <vector>
+
+#include <assert.h>
+
+#include "tasks.h"
+#include "schedulability.h"
+#include "batch.h"
+
+void get_batch_taskset(TaskSet &ts,
+                       unsigned int idx,
+                       const ParameterArray &offsets,
+                       const ParameterArray &wcet,
+                       const ParameterArray &period,
+                       const ParameterArray &deadline)
+{
+    assert(idx + 1 < offsets.size());
+    assert(offsets[idx] <= offsets[idx + 1]);
+    assert(offsets[idx + 1] <= wcet.size());
+    assert(wcet.size() == period.size());
+    assert(deadline.empty() || deadline.size() == wcet.size());
+
+    for (unsigned long i = offsets[idx]; i < offsets[idx + 1]; i++)
+        ts.add_task(wcet[i], period[i], deadline.empty() ? 0 : deadline[i]);
+}
+
+std::vector<bool> is_schedulable_batch(SchedulabilityTest &test,
+                                       const ParameterArray &offsets,
+                                       const ParameterArray &wcet,
+                                       const ParameterArray &period,
+                                       const ParameterArray &deadline,
+                                       bool check_preconditions)
+{
+    unsigned int count = offsets.empty() ? 0 : offsets.size() - 1;
+    std::vector<bool> results(count);
+
+    for (unsigned int i = 0; i < count; i++)
+    {
+        TaskSet ts;
+        get_batch_taskset(ts, i, offsets, wcet, period, deadline);
+        results[i] = test.is_schedulable(ts, check_preconditions);
+    }
+
+    return results;
+}
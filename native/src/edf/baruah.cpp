@@ -297,6 +297,11 @@ bool BaruahGedf::is_schedulable(const TaskSet &ts,
     while (point_in_range && schedulable)
     {
         point_in_range = false;
+        if (cancelled())
+        {
+            schedulable = false;
+            break;
+        }
         // check for excessive run time every 10 iterations
         if (++iter_count % 10 == 0 && get_cpu_usage() > start_time + MAX_RUNTIME)
         {
@@ -265,10 +265,16 @@ bool FFDBFGedf::is_schedulable(const TaskSet &ts,
 
     while (!schedulable &&
            sigma_cur <= sigma_bound &&
-           t_cur <= time_bound)
+           t_cur <= time_bound &&
+           !cancelled())
     {
         testing_set.init(sigma_cur, t_cur);
         do {
+            if (cancelled())
+            {
+                schedulable = false;
+                break;
+            }
             testing_set.get_next(t_cur);
             if (t_cur <= time_bound)
             {
@@ -1,3 +1,5 @@
+#include <pthread.h>
+
 #include "tasks.h"
 #include "schedulability.h"
 
@@ -12,6 +14,65 @@
 #include "edf/la.h"
 #include "edf/gedf.h"
 
+namespace {
+
+struct PortfolioJob
+{
+    SchedulabilityTest *test;
+    const TaskSet *ts;
+    Cancellation *done;
+    bool result;
+};
+
+void *run_portfolio_job(void *arg)
+{
+    PortfolioJob *job = static_cast<PortfolioJob*>(arg);
+    job->result = job->test->is_schedulable(*job->ts, false);
+    if (job->result)
+        // one success suffices, stop the other tests
+        job->done->cancel();
+    return NULL;
+}
+
+}
+
+bool GlobalEDF::any_schedulable(std::vector<SchedulabilityTest*> &tests,
+                                const TaskSet &ts)
+{
+    Cancellation done;
+    unsigned int n = tests.size();
+    std::vector<PortfolioJob> jobs(n);
+    std::vector<pthread_t> threads(n);
+    std::vector<bool> spawned(n, false);
+
+    for (unsigned int i = 0; i < n; i++)
+    {
+        tests[i]->set_cancellation(&done);
+        jobs[i].test   = tests[i];
+        jobs[i].ts     = &ts;
+        jobs[i].done   = &done;
+        jobs[i].result = false;
+    }
+
+    // The last test runs in the calling thread, as does any test for
+    // which no thread could be created.
+    for (unsigned int i = 0; i + 1 < n; i++)
+        spawned[i] = pthread_create(&threads[i], NULL,
+                                    run_portfolio_job, &jobs[i]) == 0;
+    for (unsigned int i = 0; i < n; i++)
+        if (!spawned[i])
+            run_portfolio_job(&jobs[i]);
+
+    bool schedulable = false;
+    for (unsigned int i = 0; i < n; i++)
+    {
+        if (spawned[i])
+            pthread_join(threads[i], NULL);
+        schedulable = schedulable || jobs[i].result;
+    }
+    return schedulable;
+}
+
 bool GlobalEDF::is_schedulable(const TaskSet &ts,
                                bool check)
 {
@@ -41,6 +102,32 @@ bool GlobalEDF::is_schedulable(const TaskSet &ts,
     if (BakerGedf(m).is_schedulable(ts, false))
         return true;
 
+    if (parallel)
+    {
+        std::vector<SchedulabilityTest*> tests;
+        bool constrained = ts.has_only_constrained_deadlines();
+
+        // GFB is cheap, too.
+        if (constrained && GFBGedf(m).is_schedulable(ts, false))
+            return true;
+
+        if (constrained && want_rta)
+            tests.push_back(new RTAGedf(m, rta_step));
+        if (constrained && want_baruah)
+            tests.push_back(new BaruahGedf(m));
+        if (constrained && want_ffdbf)
+            tests.push_back(new FFDBFGedf(m));
+        if (want_la)
+            tests.push_back(new LAGedf(m));
+        if (want_load)
+            tests.push_back(new LoadGedf(m));
+
+        bool schedulable = any_schedulable(tests, ts);
+        for (unsigned int i = 0; i < tests.size(); i++)
+            delete tests[i];
+        return schedulable;
+    }
+
     // Baruah's test and the BCL and GFB tests assume constrained deadlines.
     if (ts.has_only_constrained_deadlines())
 	    if (GFBGedf(m).is_schedulable(ts, false)
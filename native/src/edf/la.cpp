@@ -298,8 +298,10 @@ bool LAGedf::is_task_schedulable_for_suspension_length(
 
     for (integral_t ilen = 0; schedulable && all_pts.get_next(ilen); )
     {
+        if (cancelled())
+            schedulable = false;
         // check for excessive run time every 10 iterations
-        if (++iter_count % 10 == 0 && get_cpu_usage() > start_time + MAX_RUNTIME)
+        else if (++iter_count % 10 == 0 && get_cpu_usage() > start_time + MAX_RUNTIME)
              // This is taking too long. Give up.
             schedulable = false;
         else
@@ -137,6 +137,12 @@ bool RTAGedf::is_schedulable(const TaskSet &ts, bool check_preconditions)
         for (unsigned int k = 0; k < ts.get_task_count(); k++)
         {
             unsigned long response, new_slack;
+            if (cancelled())
+            {
+                schedulable = false;
+                updated     = false;
+                break;
+            }
             if (rta_fixpoint(k, ts, slack, response))
             {
                 new_slack = ts[k].get_deadline() - response;
@@ -65,6 +65,41 @@ TaskSet::~TaskSet()
 {
 }
 
+static bool optional_length_ok(unsigned long len, unsigned long n)
+{
+    return len == 0 || len == n;
+}
+
+static unsigned long optional_value(const unsigned long *values,
+                                    unsigned long len, unsigned long idx)
+{
+    return len ? values[idx] : 0;
+}
+
+bool TaskSet::add_tasks(
+    const unsigned long *wcet, unsigned long num_wcet,
+    const unsigned long *period, unsigned long num_period,
+    const unsigned long *deadline, unsigned long num_deadline,
+    const unsigned long *prio_pt, unsigned long num_prio_pt,
+    const unsigned long *suspension, unsigned long num_suspension)
+{
+    unsigned long n = num_wcet;
+
+    if (num_period != n
+        || !optional_length_ok(num_deadline, n)
+        || !optional_length_ok(num_prio_pt, n)
+        || !optional_length_ok(num_suspension, n))
+        return false;
+
+    tasks.reserve(tasks.size() + n);
+    for (unsigned long i = 0; i < n; i++)
+        tasks.push_back(Task(wcet[i], period[i],
+                             optional_value(deadline, num_deadline, i),
+                             optional_value(prio_pt, num_prio_pt, i),
+                             optional_value(suspension, num_suspension, i)));
+    return true;
+}
+
 #define FORALL(i, pred)                             \
     for (unsigned int i = 0; i < tasks.size(); i++) \
     {                                               \
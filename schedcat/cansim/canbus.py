@@ -1,13 +1,18 @@
 import schedcat.cansim as sim
 import schedcat.cansim.native as cpp
 from schedcat.cansim.native import CANTaskSet
+from schedcat.util.buffers import ulong_array
 
 def get_native_canbus_msgset(msgs):
-    ts = CANTaskSet()
     for msg in msgs:
         assert msg.implicit_deadline()
-        ts.add_canbus_task(msg.max_framesize, msg.period * msgs.busrate, \
-                           msg.id, msg.tid)
+    ts = CANTaskSet()
+    ok = ts.add_canbus_tasks(
+        ulong_array([msg.max_framesize for msg in msgs]),
+        ulong_array([msg.period * msgs.busrate for msg in msgs]),
+        ulong_array([msg.id for msg in msgs]),
+        ulong_array([msg.tid for msg in msgs]))
+    assert ok
     ts.set_busrate(msgs.busrate)
     ts.add_fault_params(msgs.po, msgs.mfr)
     ts.mark_critical_tasks(msgs[0].tid) # assume ts[0] is replicated
@@ -47,6 +47,7 @@ import textwrap
 from schedcat.model.tasks import TaskSystem
 import schedcat.model.tasks as tasks
 from schedcat.model.tasks import SporadicTask
+from schedcat.model.columnar import ColumnarTaskSystem
 from schedcat.util.time import ms2us
 from schedcat.overheads.jlfp import quantize_params
 
@@ -64,11 +65,18 @@ NAMED_PERIOD_DISTRIBUTIONS = [
 
 
 
-def StaffordRandFixedSum(n, u, nsets):
+# Transition tables of randfixedsum, keyed by (n, u). They only depend on the
+# number of tasks and the target utilization, but take O(n^2) time to build.
+TABLE_CACHE_SIZE = 128
+_transition_tables = {}
 
-    #deal with n=1 case
-    if n == 1:
-        return numpy.tile(numpy.array([u]),[nsets,1])
+def transition_table(n, u):
+    """Return the transition table t of randfixedsum for n values summing
+    up to u. Tables are cached (see TABLE_CACHE_SIZE) and must not be
+    modified."""
+    key = (n, u)
+    if key in _transition_tables:
+        return _transition_tables[key]
 
     k = numpy.floor(u)
     s = u
@@ -92,11 +100,29 @@ def StaffordRandFixedSum(n, u, nsets):
         tmp4 = numpy.array( (s2[numpy.arange((n-i),n)] > s1[numpy.arange(0,i)]) )
         t[i-2, numpy.arange(0,i)] = (tmp2 / tmp3) * tmp4 + (1 - tmp1/tmp3) * (numpy.logical_not(tmp4))
 
+    if len(_transition_tables) >= TABLE_CACHE_SIZE:
+        _transition_tables.clear()
+    _transition_tables[key] = t
+    return t
+
+def StaffordRandFixedSum(n, u, nsets, rng=numpy.random):
+    """Return an (nsets x n) array; each row holds n values in [0, 1] that
+    sum up to u, drawn uniformly at random. Generating many sets in one call
+    is much faster than generating them one at a time. rng is an optional
+    numpy.random.RandomState (see schedcat.generator.streams)."""
+
+    #deal with n=1 case
+    if n == 1:
+        return numpy.tile(numpy.array([u]),[nsets,1])
+
+    k = numpy.floor(u)
+    t = transition_table(n, u)
+
     m = nsets
     x = numpy.zeros((n,m))
-    rt = numpy.random.uniform(size=(n-1,m)) #rand simplex type
-    rs = numpy.random.uniform(size=(n-1,m)) #rand position in simplex
-    s = numpy.repeat(s, m);
+    rt = rng.uniform(size=(n-1,m)) #rand simplex type
+    rs = rng.uniform(size=(n-1,m)) #rand position in simplex
+    s = numpy.repeat(u, m);
     j = numpy.repeat(int(k+1), m);
     sm = numpy.repeat(0, m);
     pr = numpy.repeat(1, m);
@@ -113,42 +139,47 @@ def StaffordRandFixedSum(n, u, nsets):
     x[n-1,...] = sm + pr * s
 
     #iterated in fixed dimension order but needs to be randomised
-    #permute x row order within each column
-    for i in xrange(0,m):
-        x[...,i] = x[numpy.random.permutation(n),i]
+    #permute x row order within each column (all columns at once)
+    order = numpy.argsort(rng.uniform(size=(n,m)), axis=0)
+    x = x[order, numpy.arange(m)]
 
     return numpy.transpose(x);
 
-def gen_periods(n, nsets, min, max, gran, dist):
+def gen_periods(n, nsets, min, max, gran, dist, rng=numpy.random):
 
     if dist == "logunif":
-        periods = numpy.exp(numpy.random.uniform(low=numpy.log(min), high=numpy.log(max+gran), size=(nsets,n)))
+        periods = numpy.exp(rng.uniform(low=numpy.log(min), high=numpy.log(max+gran), size=(nsets,n)))
     elif dist == "unif":
-        periods = numpy.random.uniform(low=min, high=(max+gran), size=(nsets,n))
+        periods = rng.uniform(low=min, high=(max+gran), size=(nsets,n))
     else:
         return None
     periods = numpy.floor(periods / gran) * gran
 
     return periods
 
+def period_range(periods):
+    if periods in NAMED_PERIODS:
+        # Look up by name.
+        return NAMED_PERIODS[periods]
+    else:
+        # If unknown, then assume caller specified range manually.
+        return periods
+
 # wrapper for generating task sets for use within the schedcat library
 # parameters:
 #   periods:                one from NAMED_PERIODS (period definitions similar to those used in tasksets.py
 #   period_distribution:    'unif' or 'logunif' for uniform or log-based distribution
 #   tasks_n:                number of tasks to be generated
 #   utilization:            target utilization of the task set to be generated
+#   rng:                    numpy.random.RandomState to draw from (optional)
 def gen_taskset(periods, period_distribution, tasks_n, utilization,
-                period_granularity=None, scale=ms2us, want_integral=True):
-    if periods in NAMED_PERIODS:
-        # Look up by name.
-        (period_min, period_max) = NAMED_PERIODS[periods]
-    else:
-        # If unknown, then assume caller specified range manually.
-        (period_min, period_max) = periods
-    x = StaffordRandFixedSum(tasks_n, utilization, 1)
+                period_granularity=None, scale=ms2us, want_integral=True,
+                rng=numpy.random):
+    (period_min, period_max) = period_range(periods)
+    x = StaffordRandFixedSum(tasks_n, utilization, 1, rng)
     if period_granularity is None:
         period_granularity = period_min
-    periods = gen_periods(tasks_n, 1, period_min, period_max, period_granularity, period_distribution)
+    periods = gen_periods(tasks_n, 1, period_min, period_max, period_granularity, period_distribution, rng)
     ts = TaskSystem()
 
     periods = numpy.maximum(periods[0], max(period_min, period_granularity))
@@ -163,6 +194,33 @@ def gen_taskset(periods, period_distribution, tasks_n, utilization,
         quantize_params(ts)
     return ts
 
+# batched version of gen_taskset(): generates nsets task sets at once, using
+# one call to StaffordRandFixedSum and gen_periods for all of them.
+# Returns a list of TaskSystems, or of ColumnarTaskSystems if as_columnar.
+def gen_tasksets_batch(nsets, periods, period_distribution, tasks_n,
+                       utilization, period_granularity=None, scale=ms2us,
+                       want_integral=True, as_columnar=False,
+                       rng=numpy.random):
+    (period_min, period_max) = period_range(periods)
+    x = StaffordRandFixedSum(tasks_n, utilization, nsets, rng)
+    if period_granularity is None:
+        period_granularity = period_min
+    periods = gen_periods(tasks_n, nsets, period_min, period_max, period_granularity, period_distribution, rng)
+    periods = numpy.maximum(periods, max(period_min, period_granularity))
+
+    C = scale(x * periods)
+    T = scale(periods)
+    if want_integral:
+        # same as quantize_params()
+        C = numpy.ceil(C).astype(numpy.int64)
+        T = numpy.floor(T).astype(numpy.int64)
+
+    if as_columnar:
+        return [ColumnarTaskSystem(C[i], T[i]) for i in xrange(nsets)]
+    else:
+        return [TaskSystem([SporadicTask(c, p) for (c, p) in zip(C[i].tolist(), T[i].tolist())])
+                for i in xrange(nsets)]
+
 def gen_tasksets(options):
     x = StaffordRandFixedSum(options.n, options.util, 1)
     periods = gen_periods(options.n, 1, options.permin, options.permax, options.pergran, options.perdist)
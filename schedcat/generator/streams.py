@@ -0,0 +1,48 @@
+"""
+Independent, reproducible random number streams for task set generation.
+
+All generators in schedcat.generator accept an optional rng argument. By
+default they draw from the global random (or numpy.random) state, which
+cannot be reproduced once task set generation is split across processes.
+Instead, derive one stream per worker from a single experiment seed:
+
+    rng = py_stream(seed, worker)          # for TaskGenerator.tasks() etc.
+    nrng = numpy_stream(seed, worker)      # for the batched/NumPy generators
+
+Streams depend only on (seed, worker) and not on the order in which workers
+are started, so a sweep reproduces bit-for-bit for any number of processes.
+"""
+
+import random
+import hashlib
+
+try:
+    import numpy
+    numpy_available = True
+except ImportError:
+    numpy_available = False
+
+def stream_key(seed, *path):
+    """Derive a 256-bit key for the stream identified by seed and path
+    (e.g., a worker index, or a worker index and a task set number)."""
+    name = ':'.join([str(x) for x in (seed,) + path])
+    return hashlib.sha256(name).hexdigest()
+
+def py_stream(seed, *path):
+    "Return a random.Random instance for the stream (seed, *path)."
+    return random.Random(long(stream_key(seed, *path), 16))
+
+def numpy_stream(seed, *path):
+    "Return a numpy.random.RandomState for the stream (seed, *path)."
+    assert numpy_available, "NumPy is required for NumPy streams"
+    key = stream_key(seed, *path)
+    words = [int(key[i:i + 8], 16) for i in xrange(0, len(key), 8)]
+    return numpy.random.RandomState(numpy.array(words, dtype=numpy.uint32))
+
+def py_streams(seed, count):
+    "Return count independent random.Random streams, one per worker."
+    return [py_stream(seed, i) for i in xrange(count)]
+
+def numpy_streams(seed, count):
+    "Return count independent numpy.random.RandomState streams."
+    return [numpy_stream(seed, i) for i in xrange(count)]
@@ -6,39 +6,75 @@ import random
 
 import schedcat.model.tasks as ts
 
+try:
+    import numpy
+    import schedcat.model.columnar as columnar
+    numpy_available = True
+except ImportError:
+    numpy_available = False
+
+# Distributions created by the functions below can be called without
+# arguments, in which case they draw from the global random module, or with
+# an explicit random.Random instance rng (see schedcat.generator.streams).
+#
+# They also carry a batch(n, rng) attribute that draws n values at once as a
+# NumPy array, using rng (a numpy.random.RandomState, or the numpy.random
+# module itself). It is used by TaskGenerator.make_task_sets() and requires
+# NumPy.
+
+def draw_batch(dist, n, rng=None):
+    """Draw n values from dist as a NumPy array. Falls back to calling dist
+    n times if it does not support batched drawing."""
+    if rng is None:
+        rng = numpy.random
+    if hasattr(dist, 'batch'):
+        return dist.batch(n, rng)
+    else:
+        return numpy.array([dist() for _ in xrange(n)])
+
 def uniform_int(minval, maxval):
     "Create a function that draws ints uniformly from {minval, ..., maxval}"
-    def _draw():
-        return random.randint(minval, maxval)
+    def _draw(rng=random):
+        return rng.randint(minval, maxval)
+    _draw.batch = lambda n, rng: rng.randint(minval, maxval + 1, size=n)
     return _draw
 
 def uniform(minval, maxval):
     "Create a function that draws floats uniformly from [minval, maxval]"
-    def _draw():
-        return random.uniform(minval, maxval)
+    def _draw(rng=random):
+        return rng.uniform(minval, maxval)
+    _draw.batch = lambda n, rng: rng.uniform(minval, maxval, size=n)
     return _draw
 
 def log_uniform(minval, maxval):
     "Create a function that draws floats log-uniformly from [minval, maxval]"
-    def _draw():
-        return exp(random.uniform(log(minval), log(maxval))) 
+    def _draw(rng=random):
+        return exp(rng.uniform(log(minval), log(maxval)))
+    _draw.batch = lambda n, rng: \
+        numpy.exp(rng.uniform(log(minval), log(maxval), size=n))
     return _draw
 
 def log_uniform_int(minval, maxval):
     "Create a function that draws ints log-uniformly from {minval, ..., maxval}"
     draw_float = log_uniform(minval, maxval + 1)
-    def _draw():
-        val = int(draw_float())
+    def _draw(rng=random):
+        val = int(draw_float(rng))
         val = max(minval, val)
         val = min(maxval, val)
         return val
+    _draw.batch = lambda n, rng: \
+        numpy.clip(draw_float.batch(n, rng).astype(int), minval, maxval)
     return _draw
 
 def uniform_choice(choices):
     "Create a function that draws uniformly elements from choices"
     selector = uniform_int(0, len(choices) - 1)
-    def _draw():
-        return choices[selector()]
+    def _draw(rng=random):
+        return choices[selector(rng)]
+    def _batch(n, rng):
+        idx = selector.batch(n, rng)
+        return numpy.array([choices[i] for i in idx.tolist()])
+    _draw.batch = _batch
     return _draw
 
 def truncate(minval, maxval):
@@ -46,6 +82,9 @@ def truncate(minval, maxval):
         def _f(*args, **kargs):
             val = fun(*args, **kargs)
             return min(maxval, max(minval, val))
+        if hasattr(fun, 'batch'):
+            _f.batch = lambda n, rng: \
+                numpy.clip(fun.batch(n, rng), minval, maxval)
         return _f
     return _limit
 
@@ -57,6 +96,15 @@ def redraw(minval, maxval):
                 val = dist(*args, **kargs)
                 in_range = minval <= val <= maxval
             return val
+        def _batch(n, rng):
+            vals = dist.batch(n, rng)
+            redo = (vals < minval) | (vals > maxval)
+            while redo.any():
+                vals[redo] = dist.batch(int(redo.sum()), rng)
+                redo = (vals < minval) | (vals > maxval)
+            return vals
+        if hasattr(dist, 'batch'):
+            _f.batch = _batch
         return _f
     return _redraw
 
@@ -66,8 +114,9 @@ def exponential(minval, maxval, mean, limiter=redraw):
     than minval or greater than maxval, then either another value is
     drawn (if limiter=redraw) or the drawn value is set to minval or
     maxval (if limiter=truncate)."""
-    def _draw():
-        return random.expovariate(1.0 / mean)
+    def _draw(rng=random):
+        return rng.expovariate(1.0 / mean)
+    _draw.batch = lambda n, rng: rng.exponential(mean, size=n)
     return limiter(minval, maxval)(_draw)
 
 def multimodal(weighted_distributions):
@@ -76,22 +125,37 @@ def multimodal(weighted_distributions):
     (distribution, weight) pairs."""
     total_weight = sum([w for (d, w) in weighted_distributions])
     selector = uniform(0, total_weight)
-    def _draw():
-        x = selector()
+    def _draw(rng=random):
+        x = selector(rng)
         wsum = 0
         for (d, w) in weighted_distributions:
             wsum += w
             if wsum >= x:
-                return d()
+                return d(rng)
         assert False # should never drop off
+    def _batch(n, rng):
+        x = selector.batch(n, rng)
+        cumulative = numpy.cumsum([w for (d, w) in weighted_distributions])
+        which = numpy.searchsorted(cumulative, x)
+        vals = numpy.empty(n)
+        for i, (d, w) in enumerate(weighted_distributions):
+            mask = which == i
+            vals[mask] = d.batch(int(mask.sum()), rng)
+        return vals
+    if all([hasattr(d, 'batch') for (d, w) in weighted_distributions]):
+        _draw.batch = _batch
     return _draw
 
+def implicit_deadline(cost, period, rng=None):
+    return period
+implicit_deadline.batch = lambda cost, period, rng: period
+
 
 
 class TaskGenerator(object):
     """Sporadic task generator"""
 
-    def __init__(self, period, util, deadline=lambda x, y: y):
+    def __init__(self, period, util, deadline=implicit_deadline):
         """Creates TaskGenerator based on a given a period and
         utilization distributions."""
         self.period    = period
@@ -99,22 +163,25 @@ class TaskGenerator(object):
         self.deadline  = deadline
 
     def tasks(self, max_tasks=None, max_util=None, squeeze=False,
-              time_conversion=trunc):
+              time_conversion=trunc, rng=None):
         """Generate a sequence of tasks until either max_tasks is reached
         or max_util is reached. If max_util would be exceeded and squeeze is
         true, then the last-generated task's utilization is scaled to exactly
         match max_util. Otherwise, the last-generated task is discarded.
         time_conversion is used to convert the generated (non-integral) values
-        into integral task parameters.
+        into integral task parameters. If rng (a random.Random instance) is
+        given, it is passed on to the period, utilization, and deadline
+        distributions, which then must accept it as an extra argument.
         """
+        rng_arg = () if rng is None else (rng,)
         count = 0
         usum  = 0
         while ((max_tasks is None or count < max_tasks) and
                (max_util is None  or usum  < max_util)):
-            period   = self.period()
-            util     = self.util()
+            period   = self.period(*rng_arg)
+            util     = self.util(*rng_arg)
             cost     = period * util
-            deadline = self.deadline(cost, period)
+            deadline = self.deadline(cost, period, *rng_arg)
             # scale as required
             period   = max(1,    int(time_conversion(period)))
             cost     = max(1,    int(time_conversion(cost)))
@@ -133,3 +200,86 @@ class TaskGenerator(object):
 
     def make_task_set(self, *extra, **kextra):
         return ts.TaskSystem(self.tasks(*extra, **kextra))
+
+    def _draw_block(self, count, width, time_conversion, rng):
+        # Draw a (count x width) block of task parameters, converted to
+        # integral values exactly like tasks() does.
+        n = count * width
+        period = draw_batch(self.period, n, rng)
+        util   = draw_batch(self.util, n, rng)
+        cost   = period * util
+        if hasattr(self.deadline, 'batch'):
+            deadline = self.deadline.batch(cost, period, rng)
+        else:
+            deadline = numpy.array([self.deadline(c, p) for (c, p) in
+                                    zip(cost.tolist(), period.tolist())])
+        if time_conversion is trunc:
+            convert = numpy.trunc
+        else:
+            convert = numpy.vectorize(time_conversion, otypes=[float])
+        params = [numpy.maximum(1, convert(x).astype(numpy.int64))
+                  for x in (period, cost, deadline)]
+        return [x.reshape((count, width)) for x in params]
+
+    def make_task_sets(self, count, max_tasks=None, max_util=None,
+                       squeeze=False, time_conversion=trunc,
+                       as_columnar=False, rng=None):
+        """Generate count task sets at once. The task parameters are drawn
+        in large blocks with NumPy, which is much faster than calling
+        make_task_set() count times. The arguments have the same meaning as
+        for tasks(). Returns a list of TaskSystems, or of ColumnarTaskSystems
+        if as_columnar is true. rng is an optional numpy.random.RandomState.
+        Distributions without a batch() method are sampled one value at a
+        time (and do not use rng).
+        """
+        assert numpy_available, "NumPy is required for batch generation"
+        assert max_tasks is not None or max_util is not None
+        if rng is None:
+            rng = numpy.random
+        width = max_tasks if max_util is None else \
+            min(max_tasks if max_tasks is not None else 16, 16)
+        period, cost, deadline = self._draw_block(count, width,
+                                                  time_conversion, rng)
+        util = cost / period
+        if max_util is not None and width > 0:
+            # draw more tasks until each set has reached max_util
+            while ((max_tasks is None or width < max_tasks) and
+                   (util.sum(axis=1) < max_util).any()):
+                more = width if max_tasks is None \
+                             else min(width, max_tasks - width)
+                block = self._draw_block(count, more, time_conversion, rng)
+                period, cost, deadline = \
+                    [numpy.hstack(x) for x in zip((period, cost, deadline),
+                                                  block)]
+                util = cost / period
+                width += more
+            usum = numpy.cumsum(util, axis=1)
+            # tasks() keeps drawing while usum < max_util
+            reached = usum >= max_util
+            n_tasks = numpy.where(reached.any(axis=1),
+                                  reached.argmax(axis=1) + 1, width)
+            rows = numpy.arange(count)
+            last = n_tasks - 1
+            excess = usum[rows, last] - max_util
+            over = excess > 0
+            if squeeze:
+                # make last task fit exactly
+                fitted = numpy.trunc(period[rows, last] *
+                                     (util[rows, last] - excess))
+                cost[rows[over], last[over]] = fitted[over]
+            else:
+                n_tasks[over] -= 1
+        else:
+            n_tasks = numpy.repeat(width, count)
+
+        task_sets = []
+        for i, n in enumerate(n_tasks.tolist()):
+            if as_columnar:
+                task_sets.append(columnar.ColumnarTaskSystem(
+                    cost[i, :n], period[i, :n], deadline[i, :n]))
+            else:
+                task_sets.append(ts.TaskSystem(
+                    [ts.SporadicTask(c, p, d) for (c, p, d) in
+                     zip(cost[i, :n].tolist(), period[i, :n].tolist(),
+                         deadline[i, :n].tolist())]))
+        return task_sets
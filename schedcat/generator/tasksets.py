@@ -6,15 +6,46 @@ Generate random task sets for schedulability experiments.
 import re
 import random
 from functools import partial
+from collections import MutableMapping
 
 import schedcat.generator.tasks as gen
 
+SPEC_PATTERN = re.compile(r'^(uni|exp|bimo)((-[0-9.]+)+)$')
+
 def decode_params(name):
-    # uni-UMIN-UMAX-PMIN-PMAX    
-    # bimo-
-    # exp-UMIN-UMAX-MEAN-PMIN-PMAX
-    
-    pass
+    """Decode a parametric distribution spec into a (utilizations, periods)
+    pair of distributions. Periods are drawn uniformly from the given range of
+    integers (in milliseconds). The supported formats are:
+
+        uni-UMIN-UMAX-PMIN-PMAX        uniform utilizations
+        exp-UMIN-UMAX-MEAN-PMIN-PMAX   exponential utilizations
+        bimo-WLIGHT-WHEAVY-PMIN-PMAX   bimodal utilizations, with weights for
+                                       [0.001, 0.5] (light) and [0.5, 0.9]
+
+    For example, 'uni-0.1-0.4-10-100' is equivalent to 'uni-medium' with
+    'uni-moderate' periods. Returns None if name is not a valid spec.
+    """
+    match = SPEC_PATTERN.match(name)
+    if not match:
+        return None
+    kind = match.group(1)
+    params = match.group(2)[1:].split('-')
+    try:
+        params = [float(x) for x in params]
+    except ValueError:
+        return None
+    nargs = {'uni' : 4, 'exp' : 5, 'bimo' : 4}[kind]
+    if len(params) != nargs:
+        return None
+    periods = gen.uniform_int(int(params[-2]), int(params[-1]))
+    if kind == 'uni':
+        utils = gen.uniform(params[0], params[1])
+    elif kind == 'exp':
+        utils = gen.exponential(params[0], params[1], params[2])
+    else:
+        utils = gen.multimodal([(gen.uniform(0.001, 0.5), params[0]),
+                                (gen.uniform(0.5  , 0.9), params[1])])
+    return (utils, periods)
 
 NAMED_PERIODS = {
 # Named period distributions used in several UNC papers, in milliseconds.
@@ -52,11 +83,16 @@ def uniform_slack(min_slack_ratio, max_slack_ratio):
                   
         Setting max_slack_ratio = 1 implies constrained deadlines.
     """
-    def choose_deadline(cost, period):
+    def choose_deadline(cost, period, rng=random):
         slack = period - cost
         earliest = slack * min_slack_ratio
         latest   = slack * max_slack_ratio
-        return cost + random.uniform(earliest, latest)
+        return cost + rng.uniform(earliest, latest)
+    def choose_deadlines(cost, period, rng):
+        slack = period - cost
+        return cost + rng.uniform(slack * min_slack_ratio,
+                                  slack * max_slack_ratio)
+    choose_deadline.batch = choose_deadlines
     return choose_deadline
 
 NAMED_DEADLINES = {
@@ -72,24 +108,105 @@ def mkgen(utils, periods, deadlines=None):
         g = gen.TaskGenerator(periods, utils, deadlines)
     return partial(g.make_task_set)
 
+class LazyMapping(MutableMapping):
+    """A mapping whose values are created on first lookup (by calling
+    make(key)) and cached. keys is a function that returns the current set
+    of keys; it is called once, and again only after the mapping has been
+    updated or invalidate() has been called. Like a dict, the mapping can
+    be updated: assigned values take precedence over created ones, and
+    deleted keys stay deleted until they are assigned again."""
+    def __init__(self, keys, make):
+        self._keys    = keys
+        self._make    = make
+        self._cache   = {}
+        self._deleted = set()
+        self._names   = None
+
+    def _key_set(self):
+        if self._names is None:
+            names = set(self._keys()) - self._deleted
+            names.update(self._cache)
+            self._names = names
+        return self._names
+
+    def __getitem__(self, key):
+        if not key in self._cache:
+            if not key in self._key_set():
+                raise KeyError(key)
+            self._cache[key] = self._make(key)
+        return self._cache[key]
+
+    def __setitem__(self, key, value):
+        self._cache[key] = value
+        self._deleted.discard(key)
+        self.invalidate()
+
+    def __delitem__(self, key):
+        if not key in self:
+            raise KeyError(key)
+        self._cache.pop(key, None)
+        self._deleted.add(key)
+        self.invalidate()
+
+    def __contains__(self, key):
+        return key in self._key_set()
+
+    def __iter__(self):
+        return iter(list(self._key_set()))
+
+    def __len__(self):
+        return len(self._key_set())
+
+    def invalidate(self):
+        "Call keys() again on the next lookup."
+        self._names = None
+
+    def forget(self, key):
+        """Drop the cached or assigned value for key, if any, and undo its
+        deletion: the value is created again on the next lookup."""
+        self._cache.pop(key, None)
+        self._deleted.discard(key)
+        self.invalidate()
+
 def make_standard_dists(dl='implicit'):
-    by_period = {}
-    for p in NAMED_PERIODS:
-        by_util = {}
-        by_period[p] = by_util
-        for u in NAMED_UTILIZATIONS:
-                by_util[u] = mkgen(NAMED_UTILIZATIONS[u],
-                                   NAMED_PERIODS[p],
-                                   NAMED_DEADLINES[dl])
-    return by_period
+    def by_util(p):
+        return LazyMapping(NAMED_UTILIZATIONS.keys,
+                           lambda u: mkgen(NAMED_UTILIZATIONS[u],
+                                           NAMED_PERIODS[p],
+                                           NAMED_DEADLINES[dl]))
+    return LazyMapping(NAMED_PERIODS.keys, by_util)
 
 # keyed by deadline type, then by period, then by utilization
-DIST_BY_KEY = {}
-for dl in NAMED_DEADLINES:
-    DIST_BY_KEY[dl] = make_standard_dists(dl)
-
-ALL_DISTS = {}
-for dl in NAMED_DEADLINES:
-    for p in NAMED_PERIODS:
-        for u in NAMED_UTILIZATIONS:
-            ALL_DISTS[':'.join([u, p, dl])] = DIST_BY_KEY[dl][p][u]
+DIST_BY_KEY = LazyMapping(NAMED_DEADLINES.keys, make_standard_dists)
+
+# user-registered distributions, name -> (spec, deadline type)
+REGISTERED_DISTS = {}
+
+def all_dist_names():
+    names = [':'.join([u, p, dl]) for dl in NAMED_DEADLINES
+                                  for p in NAMED_PERIODS
+                                  for u in NAMED_UTILIZATIONS]
+    return set(names) | set(REGISTERED_DISTS.keys())
+
+def make_named_dist(name):
+    if name in REGISTERED_DISTS:
+        (spec, dl) = REGISTERED_DISTS[name]
+        (utils, periods) = decode_params(spec)
+        return mkgen(utils, periods, NAMED_DEADLINES[dl])
+    else:
+        (u, p, dl) = name.split(':')
+        return DIST_BY_KEY[dl][p][u]
+
+# keyed by 'utilization:period:deadline type' (or registered name)
+ALL_DISTS = LazyMapping(all_dist_names, make_named_dist)
+
+def register_distribution(name, spec, dl='implicit'):
+    """Make the distribution described by spec (see decode_params()) and
+    deadline type dl available as ALL_DISTS[name]."""
+    if decode_params(spec) is None:
+        raise ValueError("invalid distribution spec: %s" % spec)
+    if not dl in NAMED_DEADLINES:
+        raise ValueError("unknown deadline type: %s" % dl)
+    REGISTERED_DISTS[name] = (spec, dl)
+    # also invalidates the set of names
+    ALL_DISTS.forget(name)
@@ -1,6 +1,8 @@
 from itertools import izip
 
 import schedcat.locking.native as cpp
+from schedcat.util.buffers import ulong_array
+from schedcat.model.tasks import get_parameter
 
 # The blocking analysis needs to know which task can be preempted by which
 # other task. This of course differs under EDF and FP scheduling. To simplify
@@ -49,36 +51,57 @@ def is_reasonable_priority_assignment(num_cpus, taskset):
     return True
 
 # assumes mutex constraints
+def _add_cpp_tasks(rsi, all_tasks, use_task_period):
+    ok = rsi.add_tasks(
+        ulong_array([t.period for t in all_tasks]),
+        ulong_array([t.period if use_task_period else t.response_time
+                     for t in all_tasks]),
+        ulong_array([t.partition for t in all_tasks]),
+        # mapped to fixed priorities in the C++ code
+        ulong_array([t.preemption_level for t in all_tasks]),
+        ulong_array([t.cost for t in all_tasks]),
+        ulong_array([t.deadline for t in all_tasks]))
+    assert ok
+
 def get_cpp_model(all_tasks, use_task_period=False):
     rsi = cpp.ResourceSharingInfo(len(all_tasks))
-    for t in all_tasks:
-        rsi.add_task(t.period,
-                     t.period if use_task_period else t.response_time,
-                     t.partition,
-                     t.preemption_level, # mapped to fixed priorities in the C++ code
-                     t.cost,
-                     t.deadline)
+    _add_cpp_tasks(rsi, all_tasks, use_task_period)
+    task, res_id, num, length = [], [], [], []
+    for (i, t) in enumerate(all_tasks):
         for req in t.resmodel:
             req = t.resmodel[req]
             if req.max_requests > 0:
-                rsi.add_request(req.res_id, req.max_requests, req.max_length, req.priority)
+                task.append(i)
+                res_id.append(req.res_id)
+                num.append(req.max_requests)
+                length.append(req.max_length)
+    ok = rsi.add_requests(ulong_array(task), ulong_array(res_id),
+                          ulong_array(num), ulong_array(length))
+    assert ok
     return rsi
 
 def get_cpp_model_rw(all_tasks, use_task_period=False):
     rsi = cpp.ResourceSharingInfo(len(all_tasks))
-    for t in all_tasks:
-        rsi.add_task(t.period,
-                     t.period if use_task_period else t.response_time,
-                     t.partition,
-                     t.preemption_level, # mapped to fixed priorities in the C++ code
-                     t.cost,
-                     t.deadline)
+    _add_cpp_tasks(rsi, all_tasks, use_task_period)
+    task, res_id, num, length, kind, prio = [], [], [], [], [], []
+    def add(i, req, n, l, k):
+        task.append(i)
+        res_id.append(req.res_id)
+        num.append(n)
+        length.append(l)
+        kind.append(k)
+        prio.append(req.priority)
+    for (i, t) in enumerate(all_tasks):
         for req in t.resmodel:
             req = t.resmodel[req]
             if req.max_writes > 0:
-                rsi.add_request_rw(req.res_id, req.max_writes, req.max_write_length, cpp.WRITE, req.priority)
+                add(i, req, req.max_writes, req.max_write_length, cpp.WRITE)
             if req.max_reads > 0:
-                rsi.add_request_rw(req.res_id, req.max_reads, req.max_read_length, cpp.READ, req.priority)
+                add(i, req, req.max_reads, req.max_read_length, cpp.READ)
+    ok = rsi.add_requests_rw(ulong_array(task), ulong_array(res_id),
+                             ulong_array(num), ulong_array(length),
+                             ulong_array(kind), ulong_array(prio))
+    assert ok
     return rsi
 
 # S-aware bounds
@@ -397,7 +420,7 @@ def apply_dummy_bounds(all_tasks):
 
 def apply_msrp_bounds(all_tasks, num_cpus):
     for t in all_tasks:
-        if t.partition == None:
+        if get_parameter(t, 'partition') is None:
             t.partition= num_cpus + 1
     model = get_cpp_model(all_tasks, True)
     res = cpp.msrp_bounds(model, num_cpus)
@@ -0,0 +1,193 @@
+"""
+Fixpoint iteration for coupled blocking / overhead / response-time analysis.
+
+Blocking bounds depend on response times (e.g., to bound the number of
+conflicting requests), while response times depend on the blocking terms
+(and on the overheads that are charged for them). The usual way to break
+this cycle is to assume response-time bounds, compute blocking and
+response times based on these assumptions, and stop once no computed
+response time exceeds its assumed value.
+
+ResponseTimeFixpoint implements this iteration. The base parameters of the
+tasks (as given) are kept separate from the derived parameters, which are
+recomputed in each round from a structural copy of the base clusters.
+Clusters whose derived inputs did not change since the previous round are
+not recomputed. Each round is timed; see ResponseTimeFixpoint.rounds.
+"""
+
+from numbers import Number
+from time import time
+
+from schedcat.util.storage import storage
+from schedcat.model.tasks import has_parameter, get_parameter
+from schedcat.model.resources import ResourceRequirement
+
+CONVERGED  = 'converged'
+DIVERGED   = 'diverged'
+INFEASIBLE = 'infeasible'
+EXHAUSTED  = 'exhausted'
+
+def _assigned_parameters(t):
+    if hasattr(t, '__dict__'):
+        return t.__dict__.items()
+    else:
+        # compact task
+        return [(k, getattr(t, k)) for k in t.__slots__ if has_parameter(t, k)]
+
+def _resmodel_signature(resmodel):
+    if not isinstance(resmodel, dict):
+        return None
+    sig = []
+    for req in resmodel.itervalues():
+        if not isinstance(req, ResourceRequirement):
+            return None
+        sig.append((req.res_id, req.max_reads, req.max_writes,
+                    req.max_read_length, req.max_write_length, req.priority))
+    sig.sort()
+    return tuple(sig)
+
+def _task_signature(t):
+    sig = []
+    for (k, v) in _assigned_parameters(t):
+        if k == 'response_time':
+            # an output, not an input
+            continue
+        elif v is None or isinstance(v, Number):
+            sig.append((k, v))
+        elif k == 'resmodel' and _resmodel_signature(v) is not None:
+            sig.append((k, _resmodel_signature(v)))
+        else:
+            # cannot tell whether it changed
+            return None
+    sig.sort()
+    return tuple(sig)
+
+def derived_inputs(cluster, inputs=None):
+    """Signature of a cluster's task parameters. Clusters with the same
+    signature yield the same response-time bounds.
+
+    inputs selects the parameters that the analysis depends on, either as a
+    list of parameter names or as a function that maps a task to a hashable
+    signature. By default, all assigned parameters except response times
+    (which are outputs) are considered. Resource models are compared by
+    their requirements. In this case, the signature is None (i.e., the
+    cluster must be recomputed) if any other parameter is not a number.
+    """
+    if inputs is None:
+        sigs = [_task_signature(t) for t in cluster]
+        return None if None in sigs else tuple(sigs)
+    elif callable(inputs):
+        return tuple([inputs(t) for t in cluster])
+    else:
+        return tuple([tuple([get_parameter(t, name) for name in inputs])
+                      for t in cluster])
+
+class ResponseTimeFixpoint(object):
+    def __init__(self, clusters, apply_blocking, charge_overheads,
+                 bound_response_times, max_rounds=100, feedback=True,
+                 inputs=None):
+        """Set up a fixpoint iteration over clusters (TaskSystems with a
+        .cpus attribute). The response_time parameter of each task is the
+        initial response-time assumption.
+
+        apply_blocking(all_tasks) applies blocking terms to all tasks (in
+        cluster order, in place). charge_overheads(cluster) and
+        bound_response_times(cluster) are called for each cluster whose
+        inputs changed; they return a false value if the cluster is not
+        feasible or not schedulable.
+
+        If feedback is true, the computed response times become the
+        assumptions of the next round (assumptions never decrease).
+        Otherwise, the initial assumptions must hold as given, and the
+        iteration ends as soon as it is clear that they do not.
+
+        inputs determines which task parameters decide whether a cluster
+        must be recomputed (see derived_inputs()).
+        """
+        self.base = clusters
+        self.apply_blocking = apply_blocking
+        self.charge_overheads = charge_overheads
+        self.bound_response_times = bound_response_times
+        self.max_rounds = max_rounds
+        self.feedback = feedback
+        self.inputs = inputs
+        self.assumed = [[t.response_time for t in c] for c in clusters]
+        self.rounds = []
+        self.status = None
+        self.result = None
+        # per cluster: (derived inputs, analyzed cluster) of the last round
+        self._last = [None] * len(clusters)
+
+    def _derive(self):
+        clusters = []
+        for (c, assumed) in zip(self.base, self.assumed):
+            derived = c.copy()
+            derived.cpus = c.cpus
+            for (t, r) in zip(derived, assumed):
+                t.response_time = r
+            clusters.append(derived)
+        return clusters
+
+    def _analyze(self, idx, cluster):
+        "Returns the analyzed cluster, or None if it is not schedulable."
+        key = derived_inputs(cluster, self.inputs)
+        if key is not None and self._last[idx] and self._last[idx][0] == key:
+            return self._last[idx][1]
+        if not self.charge_overheads(cluster) or \
+           not self.bound_response_times(cluster):
+            return None
+        self._last[idx] = (key, cluster)
+        return cluster
+
+    def step(self):
+        """Run one round. Returns the status if the iteration has ended,
+        and None otherwise."""
+        start = time()
+        clusters = self._derive()
+        self.apply_blocking([t for c in clusters for t in c])
+        blocking_done = time()
+
+        reused = 0
+        results = []
+        for (i, c) in enumerate(clusters):
+            analyzed = self._analyze(i, c)
+            if analyzed is None:
+                self.status = INFEASIBLE
+                break
+            reused += analyzed is not c
+            results.append(analyzed)
+
+        changed = 0
+        if self.status is None:
+            for (c, assumed) in zip(results, self.assumed):
+                for (j, t) in enumerate(c):
+                    if t.response_time > assumed[j]:
+                        changed += 1
+                        if self.feedback:
+                            assumed[j] = t.response_time
+            if not changed:
+                self.status = CONVERGED
+                self.result = results
+            elif not self.feedback:
+                # the next round would compute the same bounds
+                self.status = DIVERGED
+            elif len(self.rounds) + 1 >= self.max_rounds:
+                self.status = EXHAUSTED
+
+        end = time()
+        self.rounds.append(storage(blocking_time=blocking_done - start,
+                                   time=end - start,
+                                   recomputed=len(clusters) - reused,
+                                   changed=changed))
+        return self.status
+
+    def run(self):
+        """Iterate until the response-time assumptions hold (returns the
+        analyzed clusters) or until the iteration fails (returns False; see
+        status for the reason)."""
+        while self.status is None:
+            self.step()
+        return self.result if self.status == CONVERGED else False
+
+    def total_time(self):
+        return sum([r.time for r in self.rounds])
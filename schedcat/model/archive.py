@@ -0,0 +1,312 @@
+"""
+Binary archives of many task systems.
+
+An archive stores a sequence of task systems in a single file. Each task
+system is stored as a block of fixed-width (64-bit) columns: one table with
+one row per task (cost, period, deadline, id, and any numeric optional
+parameters such as response_time or partition), and one table with one row
+per resource requirement. An index of block offsets at the end of the file
+allows random access by task set number without reading any other block.
+
+Archives are append-only: ArchiveWriter(fname, append=True) adds task sets
+to an existing archive. Archive(fname) memory-maps the file, so workers can
+read their share of a large archive cheaply:
+
+    with Archive('sets.bin') as archive:
+        for i in xrange(worker, len(archive), workers):
+            ts = archive[i]
+
+Limitations: parameters must be integers or floats (bools are stored as
+ints, and, as with XML, floats with integral values are loaded as ints),
+integers must fit into 64 bits, and resource IDs must be integers. Task sets
+that violate these limitations are rejected with an ArchiveError.
+"""
+
+import mmap
+import struct
+
+from .tasks import TaskSystem, SporadicTask, OPTIONAL_PARAMETERS, \
+                   has_parameter
+from .resources import ResourceRequirement, ResourceRequirements
+
+FILE_MAGIC  = 'SCARCH01'
+INDEX_MAGIC = 'SCINDEX1'
+BLOCK_MAGIC = 'TSET'
+
+# magic, payload length
+BLOCK_HEADER = struct.Struct('<4sQ')
+# number of rows and number of columns of a table
+TABLE_HEADER = struct.Struct('<QH')
+# column name length, type code
+COLUMN_HEADER = struct.Struct('<Bc')
+# index offset, number of task sets, magic
+FOOTER = struct.Struct('<QQ8s')
+
+# Missing values are stored as NaN in float columns and as MISSING in
+# integer columns.
+MISSING = -2**63
+
+TASK_COLUMNS = ['cost', 'period', 'deadline', 'id'] + \
+               [p for p in OPTIONAL_PARAMETERS if p != 'resmodel']
+
+RESOURCE_COLUMNS = ['task', 'res_id', 'max_writes', 'max_reads',
+                    'max_write_length', 'max_read_length', 'priority']
+
+# Present (1) in the task table if a task has a resource model.
+HAS_RESMODEL = '_resmodel'
+
+class ArchiveError(Exception):
+    pass
+
+def _is_int(x):
+    return type(x) in (int, long, bool)
+
+def _column(name, values):
+    """Encode a list of values (None for missing) as a (type code, values)
+    pair, or return None if all values are missing. Raises an ArchiveError
+    if a value cannot be stored in a fixed-width column."""
+    present = [x for x in values if x is not None]
+    if not present:
+        return None
+    for x in present:
+        if _is_int(x):
+            if not MISSING < x < 2**63:
+                raise ArchiveError("parameter %s out of range (got %d)"
+                                   % (name, x))
+        elif type(x) != float:
+            raise ArchiveError("cannot store parameter %s (got %r)"
+                               % (name, x))
+    if all([_is_int(x) for x in present]):
+        return ('q', [MISSING if x is None else int(x) for x in values])
+    for x in present:
+        if _is_int(x) and float(x) != x:
+            raise ArchiveError("parameter %s cannot be stored exactly "
+                               "along with floats (got %d)" % (name, x))
+    return ('d', [float('nan') if x is None else float(x) for x in values])
+
+def _pack(code, values):
+    return struct.pack('<%d%s' % (len(values), code), *values)
+
+def _unpack(code, count, buf, offset):
+    return struct.unpack_from('<%d%s' % (count, code), buf, offset)
+
+def _decode(code, values):
+    if code == 'q':
+        return [None if x == MISSING else x for x in values]
+    else:
+        # like serialize.maybe_int(), restore integral values as ints
+        return [None if x != x else int(x) if x.is_integer() else x
+                for x in values]
+
+def _encode_table(columns):
+    "columns: list of (name, type code, values) triples, all of equal length"
+    nrows = len(columns[0][2]) if columns else 0
+    parts = [TABLE_HEADER.pack(nrows, len(columns))]
+    for (name, code, _) in columns:
+        parts.append(COLUMN_HEADER.pack(len(name), code))
+        parts.append(name)
+    for (_, code, values) in columns:
+        parts.append(_pack(code, values))
+    return ''.join(parts)
+
+def _decode_table(buf, offset):
+    "Returns (dict of name -> (type code, values), offset past the table)."
+    nrows, ncols = TABLE_HEADER.unpack_from(buf, offset)
+    offset += TABLE_HEADER.size
+    names = []
+    for _ in xrange(ncols):
+        nlen, code = COLUMN_HEADER.unpack_from(buf, offset)
+        offset += COLUMN_HEADER.size
+        names.append((buf[offset:offset + nlen], code))
+        offset += nlen
+    columns = {}
+    for (name, code) in names:
+        columns[name] = (code, _unpack(code, nrows, buf, offset))
+        offset += 8 * nrows
+    return (columns, offset)
+
+def encode_taskset(ts):
+    "Encode a task system as an archive block (a string)."
+    tasks = []
+    for name in TASK_COLUMNS:
+        col = _column(name, [getattr(t, name) if has_parameter(t, name)
+                             else None for t in ts])
+        if col:
+            tasks.append((name, col[0], col[1]))
+
+    rows = []
+    with_resmodel = [has_parameter(t, 'resmodel') for t in ts]
+    for (i, t) in enumerate(ts):
+        if with_resmodel[i]:
+            for res_id in t.resmodel:
+                req = t.resmodel[res_id]
+                if not _is_int(res_id):
+                    raise ArchiveError("resource IDs must be integers "
+                                       "(got %r)" % (res_id,))
+                rows.append([i, res_id] +
+                            [getattr(req, f) for f in RESOURCE_COLUMNS[2:]])
+    resources = []
+    if any(with_resmodel):
+        tasks.append((HAS_RESMODEL, 'q', [int(x) for x in with_resmodel]))
+        for (j, name) in enumerate(RESOURCE_COLUMNS):
+            col = _column(name, [r[j] for r in rows])
+            if col:
+                resources.append((name, col[0], col[1]))
+            elif rows:
+                raise ArchiveError("cannot store resource parameter %s" % name)
+
+    payload = _encode_table(tasks) + _encode_table(resources)
+    return BLOCK_HEADER.pack(BLOCK_MAGIC, len(payload)) + payload
+
+def decode_columns(buf, offset=0):
+    """Decode the block at offset in buf into two dicts (tasks, resources)
+    that map column names to lists of values (None where missing)."""
+    magic, length = BLOCK_HEADER.unpack_from(buf, offset)
+    if magic != BLOCK_MAGIC:
+        raise ArchiveError("no task set at offset %d" % offset)
+    offset += BLOCK_HEADER.size
+    tasks, offset = _decode_table(buf, offset)
+    resources, offset = _decode_table(buf, offset)
+    return (dict([(n, _decode(c, d)) for (n, (c, d)) in tasks.items()]),
+            dict([(n, _decode(c, d)) for (n, (c, d)) in resources.items()]))
+
+def decode_taskset(buf, offset=0):
+    "Decode the block at offset in buf into a TaskSystem."
+    tcols, rcols = decode_columns(buf, offset)
+    n = len(tcols['cost']) if 'cost' in tcols else 0
+    ts = TaskSystem()
+    for i in xrange(n):
+        t = SporadicTask(tcols['cost'][i], tcols['period'][i],
+                         tcols['deadline'][i], tcols['id'][i]
+                         if 'id' in tcols else None)
+        for name in TASK_COLUMNS[4:]:
+            if name in tcols and not tcols[name][i] is None:
+                setattr(t, name, tcols[name][i])
+        if tcols.get(HAS_RESMODEL, [0] * n)[i]:
+            t.resmodel = ResourceRequirements()
+        ts.append(t)
+    for row in zip(*[rcols[f] for f in RESOURCE_COLUMNS if f in rcols]):
+        req = dict(zip([f for f in RESOURCE_COLUMNS if f in rcols], row))
+        res_id = req['res_id']
+        ts[req['task']].resmodel[res_id] = \
+            ResourceRequirement(res_id, req['max_writes'],
+                                req['max_write_length'], req['max_reads'],
+                                req['max_read_length'], req['priority'])
+    return ts
+
+def _scan_blocks(buf, offset):
+    "Recover the offsets of all blocks (e.g., if the index was not written)."
+    offsets = []
+    while offset + BLOCK_HEADER.size <= len(buf):
+        magic, length = BLOCK_HEADER.unpack_from(buf, offset)
+        if magic != BLOCK_MAGIC or \
+           offset + BLOCK_HEADER.size + length > len(buf):
+            break
+        offsets.append(offset)
+        offset += BLOCK_HEADER.size + length
+    return (offsets, offset)
+
+def _read_index(buf):
+    "Returns (offsets, end of the last block)."
+    if len(buf) < len(FILE_MAGIC) or buf[:len(FILE_MAGIC)] != FILE_MAGIC:
+        raise ArchiveError("not a task set archive")
+    if len(buf) >= len(FILE_MAGIC) + FOOTER.size:
+        index_offset, count, magic = \
+            FOOTER.unpack_from(buf, len(buf) - FOOTER.size)
+        if magic == INDEX_MAGIC and \
+           index_offset + count * 8 + FOOTER.size == len(buf):
+            return (list(_unpack('Q', count, buf, index_offset)),
+                    index_offset)
+    # incomplete archive (writer did not close it): rebuild index
+    return _scan_blocks(buf, len(FILE_MAGIC))
+
+class ArchiveWriter(object):
+    def __init__(self, fname, append=False):
+        """Create a new archive (or add to an existing one, if append is
+        true). The index is written when the writer is closed."""
+        self.offsets = []
+        if append:
+            self.file = open(fname, 'r+b')
+            buf = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.offsets, end = _read_index(buf)
+            buf.close()
+            # the index is rewritten on close
+            self.file.seek(end)
+            self.file.truncate()
+        else:
+            self.file = open(fname, 'wb')
+            self.file.write(FILE_MAGIC)
+
+    def write(self, ts):
+        "Append a task system; returns its index in the archive."
+        self.offsets.append(self.file.tell())
+        self.file.write(encode_taskset(ts))
+        return len(self.offsets) - 1
+
+    def write_all(self, tasksets):
+        for ts in tasksets:
+            self.write(ts)
+
+    def close(self):
+        if self.file is None:
+            return
+        index_offset = self.file.tell()
+        self.file.write(_pack('Q', self.offsets))
+        self.file.write(FOOTER.pack(index_offset, len(self.offsets),
+                                    INDEX_MAGIC))
+        self.file.close()
+        self.file = None
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class Archive(object):
+    def __init__(self, fname):
+        "Open an archive for reading (memory-mapped)."
+        self.file = open(fname, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.offsets, _ = _read_index(self.map)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, idx):
+        return decode_taskset(self.map, self.offsets[idx])
+
+    def __iter__(self):
+        for offset in self.offsets:
+            yield decode_taskset(self.map, offset)
+
+    def columns(self, idx):
+        """Return the task and resource tables of task set idx as two dicts
+        of name -> list of values, without creating any task objects."""
+        return decode_columns(self.map, self.offsets[idx])
+
+    def shard(self, worker, workers):
+        "Iterate over every workers-th task set, starting with set worker."
+        for idx in xrange(worker, len(self), workers):
+            yield self[idx]
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write(tasksets, fname):
+    with ArchiveWriter(fname) as out:
+        out.write_all(tasksets)
+
+def load(fname):
+    with Archive(fname) as archive:
+        return list(archive)
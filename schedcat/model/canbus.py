@@ -1,5 +1,4 @@
 import math
-import copy
 
 from schedcat.model.tasks import SporadicTask
 from schedcat.model.tasks import TaskSystem
@@ -168,7 +167,7 @@ class CANMessageSet(TaskSystem):
         assert mi.tid != None
         mi.critical = True
         for i in range(0, r):
-            mk = copy.deepcopy(mi)
+            mk = mi.copy()
             mk.id = None
             self.append(mk)
         self.reset() # since message set is changed
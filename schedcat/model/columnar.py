@@ -0,0 +1,277 @@
+"""Columnar (struct-of-arrays) task systems.
+
+A ColumnarTaskSystem stores the parameters of a sporadic task system as typed
+NumPy arrays (one array per parameter) instead of as a list of SporadicTask
+objects. It offers the same query API as TaskSystem, but computes aggregates
+such as utilization() or hyperperiod() with vectorized operations, which makes
+it well suited for large experiment sweeps.
+
+Use ColumnarTaskSystem.from_tasks() and to_task_system() to convert between
+the two representations.
+
+Unlike TaskSystem, which yields task objects, queries that select tasks
+(without(), with_higher_priority_than(), ...) return a ColumnarTaskSystem,
+and tasks are identified by their index, not by object identity.
+
+This module requires NumPy; importing it raises an ImportError otherwise
+(see schedcat.util.math.numpy_available).
+"""
+
+from __future__ import division
+
+from math import sqrt
+
+import numpy
+
+from .tasks import SporadicTask, TaskSystem, has_parameter
+from schedcat.util.math import bounded_lcm, exact_sum, exact_largest, \
+                               exact_max
+
+# Parameters that are stored in optional columns, if present in all tasks.
+OPTIONAL_COLUMNS = ['jitter', 'suspended', 'wss', 'partition']
+
+def _as_column(values):
+    col = numpy.asarray(values)
+    if col.dtype.kind == 'b':
+        col = col.astype(numpy.int64)
+    return col
+
+class ColumnarTaskSystem(object):
+    def __init__(self, cost, period, deadline=None, id=None, **optional):
+        """Create a task system from sequences of task parameters. If no
+        deadlines are given, implicit deadlines are assumed. Optional columns
+        (see OPTIONAL_COLUMNS) can be passed as keyword arguments.
+        """
+        self.cost   = _as_column(cost)
+        self.period = _as_column(period)
+        if deadline is None:
+            # implicit deadline by default
+            self.deadline = self.period.copy()
+        else:
+            self.deadline = _as_column(deadline)
+        self.id = None if id is None else _as_column(id)
+        for col in OPTIONAL_COLUMNS:
+            vals = optional.pop(col, None)
+            setattr(self, col, None if vals is None else _as_column(vals))
+        if optional:
+            raise TypeError("unknown task parameter(s): %s"
+                            % ", ".join(sorted(optional.keys())))
+        assert len(self.cost) == len(self.period) == len(self.deadline)
+
+    @staticmethod
+    def from_tasks(tasks):
+        """Convert an object-based task system (or any sequence of
+        SporadicTask objects) to columnar form. Optional parameters are only
+        included if every task defines them."""
+        tasks = list(tasks)
+        cols = {}
+        for col in OPTIONAL_COLUMNS:
+            if tasks and all([has_parameter(t, col) for t in tasks]):
+                cols[col] = [getattr(t, col) for t in tasks]
+        ids = [t.id for t in tasks]
+        if not tasks or None in ids:
+            ids = None
+        return ColumnarTaskSystem([t.cost for t in tasks],
+                                  [t.period for t in tasks],
+                                  [t.deadline for t in tasks],
+                                  ids, **cols)
+
+    def columns(self):
+        "Names of the columns that are present, in canonical order."
+        names = ['cost', 'period', 'deadline']
+        if self.id is not None:
+            names.append('id')
+        return names + [c for c in OPTIONAL_COLUMNS
+                        if getattr(self, c) is not None]
+
+    def task(self, idx):
+        "Return the idx-th task as a (detached) SporadicTask object."
+        t = SporadicTask(self.cost[idx].item(),
+                         self.period[idx].item(),
+                         self.deadline[idx].item(),
+                         None if self.id is None else self.id[idx].item())
+        for col in OPTIONAL_COLUMNS:
+            vals = getattr(self, col)
+            if vals is not None:
+                setattr(t, col, vals[idx].item())
+        return t
+
+    def to_task_system(self):
+        "Convert to an object-based TaskSystem."
+        cols = [(c, getattr(self, c).tolist()) for c in OPTIONAL_COLUMNS
+                if getattr(self, c) is not None]
+        ids = [None] * len(self) if self.id is None else self.id.tolist()
+        ts = TaskSystem()
+        for i, (c, p, d) in enumerate(zip(self.cost.tolist(),
+                                          self.period.tolist(),
+                                          self.deadline.tolist())):
+            t = SporadicTask(c, p, d, ids[i])
+            for (name, vals) in cols:
+                setattr(t, name, vals[i])
+            ts.append(t)
+        return ts
+
+    def select(self, idx):
+        """Return a new ColumnarTaskSystem containing only the tasks selected
+        by idx (an index array, a boolean mask, or a slice)."""
+        sub = ColumnarTaskSystem.__new__(ColumnarTaskSystem)
+        for col in ['cost', 'period', 'deadline', 'id'] + OPTIONAL_COLUMNS:
+            vals = getattr(self, col)
+            setattr(sub, col, None if vals is None else vals[idx].copy())
+        return sub
+
+    def copy(self):
+        return self.select(slice(None))
+
+    def __len__(self):
+        return len(self.cost)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (int, long, numpy.integer)):
+            return self.task(idx)
+        else:
+            return self.select(idx)
+
+    def __iter__(self):
+        for i in xrange(len(self)):
+            yield self.task(i)
+
+    def __str__(self):
+        return str(self.to_task_system())
+
+    def __repr__(self):
+        return "ColumnarTaskSystem(%r, %r, %r)" % \
+            (self.cost.tolist(), self.period.tolist(), self.deadline.tolist())
+
+    def only_implicit_deadlines(self):
+        return bool(numpy.all(self.deadline == self.period))
+
+    def only_constrained_deadlines(self):
+        return bool(numpy.all(self.deadline <= self.period))
+
+    def _reorder(self, order):
+        for col in ['cost', 'period', 'deadline', 'id'] + OPTIONAL_COLUMNS:
+            vals = getattr(self, col)
+            if vals is not None:
+                setattr(self, col, vals[order])
+
+    def _sort(self, key):
+        # mergesort is stable, just like list.sort()
+        self._reorder(numpy.argsort(key, kind='mergesort'))
+
+    def assign_ids(self):
+        self.id = numpy.arange(1, len(self) + 1)
+
+    def assign_ids_by_period(self):
+        self.id = numpy.empty(len(self), dtype=numpy.int64)
+        self.id[numpy.argsort(self.period, kind='mergesort')] = \
+            numpy.arange(1, len(self) + 1)
+
+    def assign_ids_by_deadline(self):
+        self.id = numpy.empty(len(self), dtype=numpy.int64)
+        self.id[numpy.argsort(self.deadline, kind='mergesort')] = \
+            numpy.arange(1, len(self) + 1)
+
+    def sort_by_period(self):
+        self._sort(self.period)
+
+    def sort_by_deadline(self):
+        self._sort(self.deadline)
+
+    def sort_by_tkc(self, m):
+        "See TaskSystem.sort_by_tkc()."
+        k = (m - 1 + sqrt(5 * m**2 - 6 * m + 1)) / (2 * m)
+        self._sort(self.period - k * self.cost)
+
+    def sort_by_dkc(self, m):
+        "See TaskSystem.sort_by_dkc()."
+        k = (m - 1 + sqrt(5 * m**2 - 6 * m + 1)) / (2 * m)
+        self._sort(self.deadline - k * self.cost)
+
+    def sort_by_RM_US(self, m):
+        "See TaskSystem.sort_by_RM_US()."
+        threshold = m / (3 * m - 2)
+        self._sort(numpy.where(self.utilizations() > threshold,
+                               0, self.period))
+
+    def sort_by_DM_US(self, m):
+        "See TaskSystem.sort_by_DM_US()."
+        threshold = (m * (3 * m - 2 - sqrt(7 * m**2 - 8 * m + 2))
+                     / (m - 1)**2)
+        self._sort(numpy.where(self.utilizations() > threshold,
+                               0, self.period))
+
+    def utilizations(self):
+        "Per-task utilizations as a float array."
+        return self.cost / self.period
+
+    def densities(self):
+        "Per-task densities as a float array."
+        return self.cost / numpy.minimum(self.period, self.deadline)
+
+    def utilization(self, heaviest=None):
+        u = self.utilizations()
+        if heaviest is None:
+            return float(u.sum())
+        else:
+            u = numpy.sort(u)[::-1]
+            return float(u[:heaviest].sum())
+
+    def utilization_q(self, heaviest=None):
+        u = zip(self.cost.tolist(), self.period.tolist())
+        if heaviest is not None:
+            u = exact_largest(u, heaviest)
+        return exact_sum(u)
+
+    def density(self):
+        return float(self.densities().sum())
+
+    def density_q(self):
+        dens = numpy.minimum(self.period, self.deadline)
+        return exact_sum(zip(self.cost.tolist(), dens.tolist()))
+
+    def hyperperiod(self, limit=None):
+        "See TaskSystem.hyperperiod()."
+        return bounded_lcm(self.period.tolist(), limit)
+
+    def max_utilization(self):
+        return self.utilizations().max().item()
+
+    def max_density(self):
+        return self.densities().max().item()
+
+    def max_density_q(self):
+        dens = numpy.minimum(self.period, self.deadline)
+        return exact_max(zip(self.cost.tolist(), dens.tolist()))
+
+    def max_cost(self):
+        return self.cost.max().item()
+
+    def max_period(self):
+        return self.period.max().item()
+
+    def min_deadline(self):
+        return self.deadline.min().item()
+
+    def max_wss(self):
+        "Assumes the wss column has been initialized."
+        return self.wss.max().item()
+
+    def without(self, excluded):
+        """Return the subset of tasks that are not excluded. excluded can
+        be an index, a sequence of indices, or a boolean mask."""
+        keep = numpy.ones(len(self), dtype=bool)
+        keep[excluded] = False
+        return self.select(keep)
+
+    def with_higher_priority_than(self, lower):
+        """Return the subset of tasks with priority higher than that of
+        lower (i.e., with smaller ids). lower can be a task or an id."""
+        ident = getattr(lower, 'id', lower)
+        return self.select(self.id < ident)
+
+    def with_lower_priority_than(self, upper):
+        """Return the subset of tasks with priority lower than that of
+        upper (i.e., with larger ids). upper can be a task or an id."""
+        ident = getattr(upper, 'id', upper)
+        return self.select(self.id > ident)
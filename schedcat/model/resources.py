@@ -43,12 +43,24 @@ class ResourceRequirement(object):
         self.max_reads = 0
         self.max_read_length = 0
 
+    def copy(self):
+        req = ResourceRequirement.__new__(ResourceRequirement)
+        req.__dict__.update(self.__dict__)
+        return req
+
 
 class ResourceRequirements(dict):
     def __missing__(self, key):
         self[key] = ResourceRequirement(key, 0, 0, 0, 0)
         return self[key]
 
+    def copy(self):
+        "Copy the requirements; unlike dict.copy(), this is not shallow."
+        reqs = ResourceRequirements()
+        for (res_id, req) in self.iteritems():
+            dict.__setitem__(reqs, res_id, req.copy())
+        return reqs
+
 
 def initialize_resource_model(taskset):
     for t in taskset:
@@ -1,8 +1,13 @@
 #!/usr/bin/env python
 
 import xml.etree.ElementTree as ET
+try:
+    # faster, but does not allow back-references on elements
+    import xml.etree.cElementTree as cET
+except ImportError:
+    cET = ET
 
-from .tasks import TaskSystem, SporadicTask
+from .tasks import TaskSystem, SporadicTask, has_parameter
 from .resources import ResourceRequirement, ResourceRequirements
 from schedcat.util.storage import storage
 
@@ -24,13 +29,13 @@ def set_attribute(tag, attr_name, obj, field_name=None):
     "Set XML attributes based on obj attributes that might not exist."
     if field_name is None:
         field_name = attr_name
-    if field_name in obj.__dict__:
-        tag.set(attr_name, str(obj.__dict__[field_name]))
+    if has_parameter(obj, field_name):
+        tag.set(attr_name, str(getattr(obj, field_name)))
 
 def subtag_for_attribute(tag, obj, field_name, tag_name=None):
     if tag_name is None:
         tag_name = field_name
-    if field_name in obj.__dict__:
+    if has_parameter(obj, field_name):
         return ET.SubElement(tag, tag_name)
     else:
         return None
@@ -97,12 +102,12 @@ def get_attribute(node, attr_name, obj, field_name=None, convert=lambda _: _):
         field_name = attr_name
     x = node.get(attr_name, None)
     if not x is None:
-        obj.__dict__[field_name] = convert(x)
+        setattr(obj, field_name, convert(x))
         return True
     else:
         return False
 
-def parse_task(node):
+def parse_task(node, lean=False):
     cost      = maybe_int(node.get('wcet'))
     period    = maybe_int(node.get('period'))
 
@@ -117,47 +122,69 @@ def parse_task(node):
     if not resmodel is None:
         t.resmodel = resmodel
 
-    t.xml = node
-    node.task = t
+    if not lean:
+        t.xml = node
+        node.task = t
     return t
 
-def taskset(ts):
+# Hyperperiods that do not fit into a signed 64-bit integer are of no use to
+# anyone (and expensive to compute), so by default they are not recorded.
+HYPERPERIOD_LIMIT = 2**63 - 1
+
+def taskset(ts, hyperperiod_limit=HYPERPERIOD_LIMIT, properties=True):
+    """Convert a task system to XML. The hyperperiod is recorded only if it
+    does not exceed hyperperiod_limit (None: no limit; 0: never). If
+    properties is false, the <properties> aggregates are omitted."""
     tag = ET.Element('taskset')
 
-    prop = ET.SubElement(tag, 'properties')
-    prop.set('utilization', str(ts.utilization()))
-    prop.set('utilization_q', str(ts.utilization_q()))    
-    prop.set('density_q', str(ts.density_q()))
-    prop.set('density', str(ts.density()))
-    prop.set('count', str(len(ts)))
-    hp = ts.hyperperiod()
-    if hp:
-        prop.set('hyperperiod', str(hp))
+    if properties:
+        prop = ET.SubElement(tag, 'properties')
+        prop.set('utilization', str(ts.utilization()))
+        prop.set('utilization_q', str(ts.utilization_q()))
+        prop.set('density_q', str(ts.density_q()))
+        prop.set('density', str(ts.density()))
+        prop.set('count', str(len(ts)))
+        hp = ts.hyperperiod(hyperperiod_limit)
+        if hp:
+            prop.set('hyperperiod', str(hp))
 
     for t in ts:
         tag.append(task(t))
     return tag
 
-def testpoint(tasksets, params):
+def config(params, testpoint=None):
+    if testpoint is None:
+        tag = ET.Element('config')
+    else:
+        tag = ET.SubElement(testpoint, 'config')
+    for k in params:
+        tag.set(k, str(params[k]))
+    return tag
+
+def testpoint(tasksets, params, hyperperiod_limit=HYPERPERIOD_LIMIT,
+              properties=True):
     tag = ET.Element('testpoint')
 
-    config = ET.SubElement(tag, 'config')
-    for k in params:
-        config.set(k, str(params[k]))
+    config(params, tag)
     for ts in tasksets:
-        tag.append(taskset(ts))
+        tag.append(taskset(ts, hyperperiod_limit, properties))
     return tag
 
-def parse_taskset(node):
-    tasks = [parse_task(n) for n in node.findall('task')]
+def parse_taskset(node, lean=False):
+    tasks = [parse_task(n, lean) for n in node.findall('task')]
     return TaskSystem(tasks)
 
+def parse_config(node):
+    params = {}
+    for k in node.keys():
+        params[k] = maybe_int(node.get(k))
+    return params
+
 def parse_testpoint(node):
     params = {}
     config = node.find('config')
     if not config is None:
-        for k in config.keys():
-            params[k] = maybe_int(config.get(k))
+        params = parse_config(config)
     tss = [parse_taskset(n) for n in node.findall('taskset')]
     return (params, tss)
 
@@ -165,12 +192,61 @@ def write_xml(xml, fname):
     tree = ET.ElementTree(xml)
     tree.write(fname)
 
-def write_testpoint(tasksets, params, fname):
-    xml = testpoint(tasksets, params)
-    write_xml(xml, fname)
-
-def write(ts, fname):
-    xml = taskset(ts)
+class TestpointWriter(object):
+    """Incrementally write a testpoint file: each task set is written to disk
+    as soon as it is added, so the file never has to be held in memory. The
+    result can be read with load() or iter_tasksets().
+
+        with TestpointWriter('out.xml', params) as out:
+            for ts in tasksets:
+                out.add_taskset(ts)
+
+    fname can also be an open file object (which is not closed).
+    """
+    def __init__(self, fname, params, hyperperiod_limit=HYPERPERIOD_LIMIT,
+                 properties=True):
+        self.hyperperiod_limit = hyperperiod_limit
+        self.properties = properties
+        self.count = 0
+        if hasattr(fname, 'write'):
+            self.file = fname
+            self.owned = False
+        else:
+            self.file = open(fname, 'w')
+            self.owned = True
+        self.file.write('<testpoint>')
+        self.file.write(ET.tostring(config(params)))
+
+    def add_taskset(self, ts):
+        xml = taskset(ts, self.hyperperiod_limit, self.properties)
+        self.file.write(ET.tostring(xml))
+        self.file.flush()
+        self.count += 1
+
+    def close(self):
+        if self.file is None:
+            return
+        self.file.write('</testpoint>')
+        if self.owned:
+            self.file.close()
+        else:
+            self.file.flush()
+        self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_testpoint(tasksets, params, fname,
+                    hyperperiod_limit=HYPERPERIOD_LIMIT, properties=True):
+    with TestpointWriter(fname, params, hyperperiod_limit, properties) as out:
+        for ts in tasksets:
+            out.add_taskset(ts)
+
+def write(ts, fname, hyperperiod_limit=HYPERPERIOD_LIMIT, properties=True):
+    xml = taskset(ts, hyperperiod_limit, properties)
     write_xml(xml, fname)
 
 def load(file):
@@ -189,3 +265,34 @@ def load(file):
         return t
     else:
         return None
+
+def iter_tasksets(file, lean=True):
+    """Incrementally load the task sets in file (a testpoint or a single
+    task set) and yield them one at a time, in document order. In lean mode,
+    no XML back-references are attached to the tasks and each <taskset>
+    element is discarded once it has been parsed, so memory use does not
+    grow with the size of the file. Otherwise, tasks reference their XML
+    nodes (as with load()) and the tree is kept in memory.
+    """
+    etree = cET if lean else ET
+    root = None
+    for (event, elem) in etree.iterparse(file, events=('start', 'end')):
+        if root is None:
+            root = elem
+        elif event == 'end' and elem.tag == 'taskset':
+            ts = parse_taskset(elem, lean)
+            if lean:
+                root.clear()
+            else:
+                ts.xml = elem
+            yield ts
+
+def load_config(file):
+    """Return the <config> parameters of a testpoint file without parsing
+    any of its task sets."""
+    for (event, elem) in cET.iterparse(file, events=('end',)):
+        if elem.tag == 'config':
+            return parse_config(elem)
+        elif elem.tag == 'taskset':
+            break
+    return {}
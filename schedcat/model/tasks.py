@@ -1,26 +1,115 @@
 from __future__ import division # use sane division semantics
 
-import copy
-
 from math   import floor, ceil, sqrt
-from schedcat.util.math    import lcm
+from bisect import bisect_left, bisect_right
+from functools import wraps
+from itertools import chain, imap, izip
+from operator  import attrgetter, is_
+from schedcat.util.math    import bounded_lcm, exact_sum, exact_largest, \
+                                  exact_max
 from schedcat.util.quantor import forall
 
 from fractions import Fraction
 
-class SporadicTask(object):
-    def __init__(self, exec_cost, period, deadline=None, id=None):
-        """By default, the construct only creates the bare minimum
-        attributes. Other code (or subclasses) can add additional
-        attributes (such as response time bounds, resource usage, etc.)
-        """
-        if deadline is None:
-            # implicit deadline by default
-            deadline = period
-        self.period     = period
-        self.cost       = exec_cost
-        self.deadline   = deadline
-        self.id         = id
+class _Unset(object):
+    """Type of the UNSET sentinel, which marks optional task parameters
+    that have not been assigned yet."""
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'UNSET'
+
+    def __reduce__(self):
+        # pickle (and copy) by reference to preserve the singleton
+        return 'UNSET'
+
+UNSET = _Unset()
+
+# Optional per-task parameters that are assigned by the analyses in
+# schedcat.sched, schedcat.overheads, and schedcat.locking.
+OPTIONAL_PARAMETERS = (
+    'response_time',
+    'blocked',
+    'suspended',
+    'jitter',
+    'prio_pt',
+    'wss',
+    'partition',
+    'resmodel',
+    'preemption_level',
+    'arrival_blocked',
+    'locally_blocked',
+    'remote_blocking',
+    'hp_direct_blocked',
+    'local_blocking_count',
+    'early_releasing',
+    'rta_slack',
+    'bcl_slack',
+    'gfrl_pp',
+)
+
+# Task parameters that cached TaskSystem aggregates depend on.
+TRACKED_PARAMETERS = frozenset(['cost', 'period', 'deadline', 'id'])
+
+_tracked_values = attrgetter(*sorted(TRACKED_PARAMETERS))
+
+# Incremented whenever a tracked parameter of any task is assigned. Cached
+# aggregates that were computed under an older version are checked against
+# the current parameters of their tasks before they are reused.
+_parameter_version = 0
+
+def parameters_changed():
+    """Signal that tracked task parameters may have changed. This happens
+    automatically when they are assigned; call it explicitly only if task
+    parameters are changed behind the back of the task objects."""
+    global _parameter_version
+    _parameter_version += 1
+
+class _TrackedParameter(object):
+    """A task parameter that cached TaskSystem aggregates depend on. There
+    is no __get__(), so reads are served directly from the instance
+    __dict__ and cost nothing extra; only assignments are intercepted."""
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __set__(self, task, value):
+        task.__dict__[self.name] = value
+        parameters_changed()
+
+    def __delete__(self, task):
+        del task.__dict__[self.name]
+        parameters_changed()
+
+def _copy_parameter(name, value):
+    # Only the resource model and per-task vectors (e.g., of CAN messages)
+    # are mutated in place by the analyses; everything else is immutable.
+    if value is UNSET:
+        return value
+    elif name == 'resmodel':
+        return value.copy()
+    elif isinstance(value, list):
+        return list(value)
+    else:
+        return value
+
+def has_parameter(task, name):
+    """Check whether the (optional) parameter name has been assigned.
+    Works both for regular and for compact tasks."""
+    return getattr(task, name, UNSET) is not UNSET
+
+def get_parameter(task, name, default=None):
+    "Return the (optional) parameter name, or default if it is not assigned."
+    val = getattr(task, name, UNSET)
+    return default if val is UNSET else val
+
+class BaseSporadicTask(object):
+    """Functionality shared by SporadicTask and CompactSporadicTask.
+    Subclasses must provide cost, period, deadline, and id attributes and
+    call parameters_changed() when one of them is assigned.
+    """
+    __slots__ = ()
 
     def implicit_deadline(self):
         return self.deadline == self.period
@@ -58,22 +147,191 @@ class SporadicTask(object):
     def __repr__(self):
         idstr = ", id=%s" % self.id if self.id is not None else ""
         dstr  = ", deadline=%s" % self.deadline if self.deadline != self.period else ""
-        return "SporadicTask(%s, %s%s%s)" % (self.cost, self.period, dstr, idstr)
+        return "%s(%s, %s%s%s)" % (self.__class__.__name__,
+                                   self.cost, self.period, dstr, idstr)
+
+    def copy(self):
+        """Return a copy of this task that can be modified independently.
+        This is much cheaper than copy.deepcopy(): parameters are copied by
+        reference, except for the resource model and list-valued parameters,
+        which are cloned. The xml back-reference set by the serialization
+        code is not carried over."""
+        t = self.__class__.__new__(self.__class__)
+        for (name, value) in self.__dict__.iteritems():
+            if name != 'xml':
+                t.__dict__[name] = _copy_parameter(name, value)
+        return t
+
+
+class SporadicTask(BaseSporadicTask):
+    cost     = _TrackedParameter('cost')
+    period   = _TrackedParameter('period')
+    deadline = _TrackedParameter('deadline')
+    id       = _TrackedParameter('id')
+
+    def __init__(self, exec_cost, period, deadline=None, id=None):
+        """By default, the construct only creates the bare minimum
+        attributes. Other code (or subclasses) can add additional
+        attributes (such as response time bounds, resource usage, etc.)
+        """
+        if deadline is None:
+            # implicit deadline by default
+            deadline = period
+        # a new task is not part of any cached aggregate yet
+        params = self.__dict__
+        params['period']   = period
+        params['cost']     = exec_cost
+        params['deadline'] = deadline
+        params['id']       = id
+
+
+class CompactSporadicTask(BaseSporadicTask):
+    """A memory-efficient sporadic task without a per-instance __dict__.
+
+    All optional parameters (see OPTIONAL_PARAMETERS) are declared up front
+    and default to UNSET. Use has_parameter() and get_parameter() to check
+    whether they have been assigned. Assigning any other attribute raises
+    an AttributeError.
+    """
+    __slots__ = ('cost', 'period', 'deadline', 'id') + OPTIONAL_PARAMETERS
+
+    def __init__(self, exec_cost, period, deadline=None, id=None):
+        if deadline is None:
+            # implicit deadline by default
+            deadline = period
+        # a new task is not part of any cached aggregate yet
+        init = object.__setattr__
+        init(self, 'period',   period)
+        init(self, 'cost',     exec_cost)
+        init(self, 'deadline', deadline)
+        init(self, 'id',       id)
+        for name in OPTIONAL_PARAMETERS:
+            init(self, name, UNSET)
+
+    def __setattr__(self, name, value):
+        # slots cannot be intercepted individually
+        object.__setattr__(self, name, value)
+        if name in TRACKED_PARAMETERS:
+            parameters_changed()
+
+    def __getstate__(self):
+        return tuple([getattr(self, name) for name in self.__slots__])
+
+    def __setstate__(self, state):
+        for (name, val) in zip(self.__slots__, state):
+            object.__setattr__(self, name, val)
 
+    def copy(self):
+        "See BaseSporadicTask.copy()."
+        t = CompactSporadicTask.__new__(CompactSporadicTask)
+        for name in self.__slots__:
+            object.__setattr__(t, name,
+                               _copy_parameter(name, getattr(self, name)))
+        return t
+
+    @staticmethod
+    def from_task(t):
+        "Create a compact copy of t, including all assigned optional parameters."
+        ct = CompactSporadicTask(t.cost, t.period, t.deadline, t.id)
+        for name in OPTIONAL_PARAMETERS:
+            val = getattr(t, name, UNSET)
+            if val is not UNSET:
+                setattr(ct, name, val)
+        return ct
+
+
+class _AggregateCache(object):
+    """The cached aggregates of a TaskSystem, together with the tracked
+    parameters of its tasks that they were computed from."""
+    __slots__ = ('version', 'params', 'values')
+
+    def __init__(self, tasks):
+        self.version = _parameter_version
+        self.params  = map(_tracked_values, tasks)
+        self.values  = {}
+
+    def validate(self, tasks):
+        """Drop the cached values if a tracked parameter of one of the
+        tasks was assigned since they were computed."""
+        # read the version first: a concurrent assignment must not be
+        # mistaken for a validated one
+        version = _parameter_version
+        if version == self.version:
+            return
+        # Some task was changed, but not necessarily one of ours. Parameters
+        # are compared by identity, which errs on the safe side for equal
+        # values and distinguishes, e.g., 10 from 10.0.
+        params = map(_tracked_values, tasks)
+        if len(params) != len(self.params) or \
+           not all(imap(is_, chain.from_iterable(params),
+                             chain.from_iterable(self.params))):
+            self.values = {}
+        self.version = version
+        self.params  = params
+
+def cached_aggregate(fun):
+    """Memoize a TaskSystem query. The result is reused until the task
+    system is modified or a tracked parameter of one of its tasks is
+    assigned."""
+    @wraps(fun)
+    def _cached(self, *args, **kargs):
+        cache = self.__dict__.get('_aggregates')
+        if cache is None:
+            cache = self._aggregates = _AggregateCache(self)
+        else:
+            cache.validate(self)
+        key = (fun.__name__, args, tuple(sorted(kargs.items())))
+        values = cache.values
+        if not key in values:
+            values[key] = fun(self, *args, **kargs)
+        return values[key]
+    return _cached
+
+def _modifies_membership(method):
+    def _modify(self, *args, **kargs):
+        result = method(self, *args, **kargs)
+        self.__dict__.pop('_aggregates', None)
+        return result
+    _modify.__name__ = method.__name__
+    _modify.__doc__  = method.__doc__
+    return _modify
 
 class TaskSystem(list):
     def __init__(self, tasks=[]):
         self.extend(tasks)
 
+    # Keep cached aggregates consistent with the contained tasks.
+    append       = _modifies_membership(list.append)
+    extend       = _modifies_membership(list.extend)
+    insert       = _modifies_membership(list.insert)
+    remove       = _modifies_membership(list.remove)
+    pop          = _modifies_membership(list.pop)
+    sort         = _modifies_membership(list.sort)
+    reverse      = _modifies_membership(list.reverse)
+    __setitem__  = _modifies_membership(list.__setitem__)
+    __delitem__  = _modifies_membership(list.__delitem__)
+    __setslice__ = _modifies_membership(list.__setslice__)
+    __delslice__ = _modifies_membership(list.__delslice__)
+    __iadd__     = _modifies_membership(list.__iadd__)
+    __imul__     = _modifies_membership(list.__imul__)
+
+    def __getstate__(self):
+        # cached aggregates are not worth pickling
+        state = self.__dict__.copy()
+        state.pop('_aggregates', None)
+        return state
+
     def __str__(self):
         return "\n".join([str(t) for t in self])
 
     def __repr__(self):
         return "TaskSystem([" + ", ".join([repr(t) for t in self]) + "])"
 
+    @cached_aggregate
     def only_implicit_deadlines(self):
         return forall(self)(lambda t: t.implicit_deadline())
 
+    @cached_aggregate
     def only_constrained_deadlines(self):
         return forall(self)(lambda t: t.constrained_deadline())
 
@@ -128,6 +386,7 @@ class TaskSystem(list):
                      / (m - 1)**2)
         self.sort(key= lambda t: 0 if t.utilization() > threshold else t.period)
 
+    @cached_aggregate
     def utilization(self, heaviest=None):
         u = [t.utilization() for t in self]
         if heaviest is None:
@@ -136,38 +395,49 @@ class TaskSystem(list):
             u.sort(reverse=True)
             return sum(u[:heaviest])
 
+    @cached_aggregate
     def utilization_q(self, heaviest=None):
-        u = [t.utilization_q() for t in self]
-        if heaviest is None:
-            return sum(u)
-        else:
-            u.sort(reverse=True)
-            return sum(u[:heaviest])
+        "Exact utilization as an ExactSum (a Fraction)."
+        u = [(t.cost, t.period) for t in self]
+        if heaviest is not None:
+            u = exact_largest(u, heaviest)
+        return exact_sum(u)
 
+    @cached_aggregate
     def density(self):
         return sum([t.density() for t in self])
 
+    @cached_aggregate
     def density_q(self):
-        return sum([t.density_q() for t in self])
+        return exact_sum([(t.cost, min(t.period, t.deadline)) for t in self])
 
-    def hyperperiod(self):
-        return lcm(*[t.period for t in self])
+    @cached_aggregate
+    def hyperperiod(self, limit=None):
+        """Return the LCM of all periods, or None if it exceeds limit. The
+        computation stops as soon as the limit is exceeded."""
+        return bounded_lcm((t.period for t in self), limit)
 
+    @cached_aggregate
     def max_utilization(self):
         return max([t.utilization() for t in self])
 
+    @cached_aggregate
     def max_density(self):
         return max([t.density() for t in self])
 
+    @cached_aggregate
     def max_density_q(self):
-        return max([t.density_q() for t in self])
+        return exact_max([(t.cost, min(t.period, t.deadline)) for t in self])
 
+    @cached_aggregate
     def max_cost(self):
         return max([t.cost for t in self])
 
+    @cached_aggregate
     def max_period(self):
         return max([t.period for t in self])
 
+    @cached_aggregate
     def min_deadline(self):
         return min([t.deadline for t in self])
 
@@ -176,28 +446,55 @@ class TaskSystem(list):
         return max([t.wss for t in self])
 
     def copy(self):
-        ts = TaskSystem((copy.deepcopy(t) for t in self))
+        "Copy the task system and all tasks (see BaseSporadicTask.copy())."
+        ts = TaskSystem([t.copy() for t in self])
         return ts
 
+    def compact(self):
+        """Return a TaskSystem of CompactSporadicTasks with the same
+        parameters. Note: resource models are shared, not copied."""
+        return TaskSystem((CompactSporadicTask.from_task(t) for t in self))
+
     def without(self, excluded_tasks):
         "Iterate over contained tasks, skipping over excluded"
-        if isinstance(excluded_tasks, SporadicTask):
+        if isinstance(excluded_tasks, BaseSporadicTask):
             # special case: single argument is a task => singleton set
             return (task for task in self if task != excluded_tasks)
         else:
             # general case: caller provided set of tasks to be excluded
             return (task for task in self if not task in excluded_tasks)
 
+    @cached_aggregate
+    def _priority_index(self):
+        # (sorted ids, rank of each task in order of increasing id,
+        #  memoized selections keyed by (number of ranks, higher?))
+        order = sorted(xrange(len(self)), key=lambda i: self[i].id)
+        rank = [0] * len(self)
+        for (r, i) in enumerate(order):
+            rank[i] = r
+        return ([self[i].id for i in order], rank, {})
+
+    def _tasks_by_rank(self, k, higher):
+        # the tasks with rank < k (if higher) or >= k, in task system order
+        ids, rank, selections = self._priority_index()
+        key = (k, higher)
+        if not key in selections:
+            selections[key] = tuple([t for (t, r) in izip(self, rank)
+                                     if (r < k) == higher])
+        return selections[key]
+
     def with_higher_priority_than(self, lower):
-        """Iterate over contained tasks, skipping over tasks with priority
-        lower than lower.id (i.e., over tasks with larger indices.).
+        """Iterate over contained tasks with priority higher than lower.id
+        (i.e., with smaller indices), in task system order.
         """
-         # assumption: lower id == higher priority
-        return (task for task in self if task.id < lower.id)
+        # assumption: lower id == higher priority
+        ids = self._priority_index()[0]
+        return iter(self._tasks_by_rank(bisect_left(ids, lower.id), True))
 
     def with_lower_priority_than(self, upper):
-        """Iterate over contained tasks, skipping over tasks with priority
-        higher than upper.id (i.e., over tasks with smaller indices.).
+        """Iterate over contained tasks with priority lower than upper.id
+        (i.e., with larger indices), in task system order.
         """
-         # assumption: lower id == higher priority
-        return (task for task in self if task.id > upper.id)
+        # assumption: lower id == higher priority
+        ids = self._priority_index()[0]
+        return iter(self._tasks_by_rank(bisect_right(ids, upper.id), False))
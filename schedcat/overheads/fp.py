@@ -2,16 +2,20 @@ from __future__ import division
 
 from math import ceil, floor
 
-from schedcat.model.tasks import SporadicTask, TaskSystem
+from schedcat.model.tasks import SporadicTask, TaskSystem, has_parameter
+from .model import snapshot
 
 def charge_scheduling_overheads(oheads, num_cpus, dedicated_irq, taskset):
     if not oheads or not taskset:
         return TaskSystem(taskset)
 
-    event_latency = oheads.release_latency(taskset)
+    n = len(taskset)
+    oheads = snapshot(oheads, n)
+
+    event_latency = oheads.release_latency(n)
 
     # pseudo-task representing the tick interrupt
-    tck = oheads.tick(taskset)
+    tck = oheads.tick(n)
     if tck > 0:
         tick_isr = SporadicTask(tck, oheads.quantum_length)
         tick_isr.jitter = event_latency
@@ -20,7 +24,7 @@ def charge_scheduling_overheads(oheads, num_cpus, dedicated_irq, taskset):
         tick_tasks = []
 
     # pseudo-tasks representing release interrupts
-    rel_cost   = oheads.release(taskset)
+    rel_cost   = oheads.release(n)
     if not dedicated_irq and rel_cost > 0:
         release_tasks = [SporadicTask(rel_cost, t.period) for t in taskset]
         for isr in release_tasks:
@@ -29,19 +33,20 @@ def charge_scheduling_overheads(oheads, num_cpus, dedicated_irq, taskset):
         release_tasks = [] # releases don't impact tasks directly
 
     # account for initial release delay as jitter
-    release_delay = event_latency + oheads.release(taskset)
+    release_delay = event_latency + oheads.release(n)
     if dedicated_irq:
-        release_delay += oheads.ipi_latency(taskset)
+        release_delay += oheads.ipi_latency(n)
 
     for t in taskset:
-        if not 'jitter' in t.__dict__:
+        if not has_parameter(t, 'jitter'):
             t.jitter = 0
         t.jitter += release_delay
 
-    # account for scheduling cost and CPMD
-    sched  = oheads.schedule(taskset)
-    cxs    = oheads.ctx_switch(taskset)
-    cpmd   = oheads.cache_affinity_loss(taskset)
+    # account for scheduling cost and CPMD; the CPMD cost depends on the
+    # working set size of the preempted job, so assume the largest one
+    sched  = oheads.schedule(n)
+    cxs    = oheads.ctx_switch(n)
+    cpmd   = oheads.cache_affinity_loss(max([t.wss for t in taskset]))
     preemption = 2 * (sched + cxs) + cpmd
     for t in taskset:
         t.cost += preemption
@@ -3,13 +3,17 @@ from __future__ import division
 from math import ceil, floor
 import heapq
 
+from schedcat.model.tasks import get_parameter
+from schedcat.util.math import evaluate
+from .model import snapshot
+
 def charge_initial_load(oheads, taskset):
     """Increase WCET to reflect the cost of establishing a warm cache.
     Note: assumes that .wss (working set size) has been populated in each task.
     """
     if oheads:
-        for ti in taskset:
-            load = oheads.initial_cache_load(ti.wss)
+        loads = evaluate(oheads.initial_cache_load, [ti.wss for ti in taskset])
+        for (ti, load) in zip(taskset, loads):
             assert load >= 0 # negative overheads make no sense
             ti.cost += load
             if ti.density() > 1:
@@ -19,6 +23,7 @@ def charge_initial_load(oheads, taskset):
 
 def preemption_centric_irq_costs(oheads, dedicated_irq, taskset):
     n      = len(taskset)
+    oheads = snapshot(oheads, n)
     n_rel_irq = 0
     qlen   = oheads.quantum_length
     tck    = oheads.tick(n)
@@ -31,7 +36,7 @@ def preemption_centric_irq_costs(oheads, dedicated_irq, taskset):
     if not dedicated_irq:
         rel   = oheads.release(n)
         for ti in taskset:
-            if not hasattr(ti, 'early_releasing') or ti.early_releasing == False:
+            if not get_parameter(ti, 'early_releasing', False):
                 urel += (rel / ti.period)
                 n_rel_irq += 1
 
@@ -48,6 +53,7 @@ def charge_scheduling_overheads(oheads, num_cpus, dedicated_irq, taskset):
     if not oheads:
         return taskset
 
+    oheads = snapshot(oheads, len(taskset))
     uscale, cpre = preemption_centric_irq_costs(oheads, dedicated_irq, taskset)
 
     if uscale <= 0:
@@ -0,0 +1,203 @@
+"""Vectorized JLFP overhead accounting for columnar task systems.
+
+The functions in this module mirror those in schedcat.overheads.jlfp, but
+operate on ColumnarTaskSystems (see schedcat.model.columnar), or on whole
+batches of them at once. A batch is charged in a few NumPy operations over
+the concatenated columns of all task sets; the *_batch() variants return a
+boolean array that indicates, for each task set, whether it is still
+feasible (i.e., whether the object-based version would not have returned
+False).
+
+Differences to schedcat.overheads.jlfp:
+  - all tasks of a set are charged, even if an earlier task already became
+    infeasible; the parameters of infeasible sets are not meaningful.
+  - the early_releasing task parameter is not supported (there is no
+    corresponding column).
+"""
+
+from __future__ import division
+
+import numpy
+
+from schedcat.util.math import evaluate
+
+class Batch(object):
+    "The concatenated columns of a batch of ColumnarTaskSystems."
+    def __init__(self, tasksets):
+        self.tasksets = tasksets
+        self.sizes    = numpy.array([len(ts) for ts in tasksets],
+                                    dtype=numpy.int64)
+        self.starts   = numpy.cumsum(self.sizes) - self.sizes
+        # owner[i]: index of the task set of the i-th task
+        self.owner    = numpy.repeat(numpy.arange(len(tasksets)), self.sizes)
+
+    def column(self, name):
+        cols = [getattr(ts, name) for ts in self.tasksets]
+        for (i, c) in enumerate(cols):
+            if c is None and self.sizes[i]:
+                raise ValueError("the %s column is required" % name)
+            elif c is None:
+                cols[i] = numpy.zeros(0)
+        if not cols:
+            return numpy.zeros(0)
+        return numpy.concatenate(cols)
+
+    def store(self, name, values):
+        "Split values back into the task sets' name columns."
+        for (ts, start, n) in zip(self.tasksets, self.starts, self.sizes):
+            setattr(ts, name, values[start:start + n])
+
+    def at_task_count(self, fun):
+        "Evaluate the overhead function fun at each task set's size."
+        return numpy.array(evaluate(fun, self.sizes.tolist()), dtype=float)
+
+    def feasible(self, cost, period, deadline):
+        "Per-set mask: do all tasks have a density of at most one?"
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            overloaded = cost / numpy.minimum(period, deadline) > 1
+        return numpy.bincount(self.owner, weights=overloaded,
+                              minlength=len(self.tasksets)) == 0
+
+    def largest_two(self, key):
+        """Find the task with the largest key in each set and the one with
+        the second-largest key (as heapq.nlargest(2, ...) would, ties are
+        broken in favor of earlier tasks). Returns index arrays (-1 where a
+        set has too few tasks)."""
+        none = numpy.repeat(-1, len(self.tasksets))
+        if not len(key):
+            return (none, none)
+        order = numpy.lexsort((-key, self.owner))
+        last  = len(order) - 1
+        first  = numpy.where(self.sizes > 0,
+                             order[numpy.minimum(self.starts, last)], none)
+        second = numpy.where(self.sizes > 1,
+                             order[numpy.minimum(self.starts + 1, last)], none)
+        return (first, second)
+
+def _as_batch(tasksets):
+    return tasksets if isinstance(tasksets, Batch) else Batch(list(tasksets))
+
+def charge_initial_load_batch(oheads, tasksets):
+    """Increase WCETs to reflect the cost of establishing a warm cache.
+    Assumes that the wss column is present. Returns the feasibility mask."""
+    batch = _as_batch(tasksets)
+    if not oheads:
+        return numpy.ones(len(batch.tasksets), dtype=bool)
+    wss  = batch.column('wss')
+    load = numpy.array(evaluate(oheads.initial_cache_load, wss.tolist()))
+    assert numpy.all(load >= 0) # negative overheads make no sense
+    cost = batch.column('cost') + load
+    batch.store('cost', cost)
+    return batch.feasible(cost, batch.column('period'),
+                          batch.column('deadline'))
+
+def preemption_centric_irq_costs_batch(oheads, dedicated_irq, tasksets):
+    "Returns per-set arrays (uscale, cpre)."
+    batch  = _as_batch(tasksets)
+    qlen   = oheads.quantum_length
+    tck    = batch.at_task_count(oheads.tick)
+    ev_lat = batch.at_task_count(oheads.release_latency)
+
+    # tick interrupt
+    utick = tck / qlen
+
+    urel = numpy.zeros(len(batch.tasksets))
+    if not dedicated_irq:
+        rel  = batch.at_task_count(oheads.release)
+        urel = numpy.bincount(batch.owner,
+                              weights=rel[batch.owner] / batch.column('period'),
+                              minlength=len(batch.tasksets))
+
+    # cost of preemption
+    cpre_numerator = tck + ev_lat * utick
+    if not dedicated_irq:
+        cpre_numerator += batch.sizes * rel + ev_lat * urel
+
+    uscale = 1.0 - utick - urel
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        return (uscale, cpre_numerator / uscale)
+
+def charge_scheduling_overheads_batch(oheads, num_cpus, dedicated_irq,
+                                      tasksets):
+    """Charge scheduling overheads to each task set in tasksets (see
+    jlfp.charge_scheduling_overheads()). num_cpus may be a scalar or give
+    the number of processors of each set. Assumes that the wss column is
+    present. Returns the feasibility mask."""
+    batch = _as_batch(tasksets)
+    if not oheads:
+        return numpy.ones(len(batch.tasksets), dtype=bool)
+
+    uscale, cpre = preemption_centric_irq_costs_batch(oheads, dedicated_irq,
+                                                      batch)
+    num_cpus = numpy.broadcast_to(num_cpus, uscale.shape)
+
+    # CPMD of the two tasks with the largest working sets: each task incurs
+    # the largest CPMD cost, except the task with the largest working set
+    wss = batch.column('wss')
+    first, second = batch.largest_two(wss)
+    cpmd = numpy.zeros(len(batch.tasksets))
+    cpmd2 = numpy.zeros(len(batch.tasksets))
+    has1, has2 = first >= 0, second >= 0
+    cpmd[has1] = evaluate(oheads.cache_affinity_loss, wss[first[has1]].tolist())
+    cpmd2[has2] = evaluate(oheads.cache_affinity_loss,
+                           wss[second[has2]].tolist())
+    task_cpmd = cpmd[batch.owner]
+    task_cpmd[first[has1]] = cpmd2[has1]
+
+    sched = 2 * (batch.at_task_count(oheads.schedule) +
+                 batch.at_task_count(oheads.ctx_switch))
+
+    irq_latency = batch.at_task_count(oheads.release_latency)
+
+    ipi = batch.at_task_count(oheads.ipi_latency)
+    if dedicated_irq:
+        unscaled = 2 * cpre + ipi + batch.at_task_count(oheads.release)
+    else:
+        unscaled = numpy.where(num_cpus > 1, 2 * cpre + ipi, 2 * cpre)
+
+    own = batch.owner
+    period   = batch.column('period') - irq_latency[own]
+    deadline = batch.column('deadline') - irq_latency[own]
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        cost = ((batch.column('cost') + (sched[own] + task_cpmd))
+                / uscale[own]) + unscaled[own]
+    batch.store('period', period)
+    batch.store('deadline', deadline)
+    batch.store('cost', cost)
+
+    return (uscale > 0) & batch.feasible(cost, period, deadline)
+
+def quantize_params_batch(tasksets):
+    """After applying overheads, use this function to make
+    task parameters integral again. Returns the feasibility mask."""
+    batch = _as_batch(tasksets)
+    cost     = numpy.ceil(batch.column('cost')).astype(numpy.int64)
+    period   = numpy.floor(batch.column('period')).astype(numpy.int64)
+    deadline = numpy.floor(batch.column('deadline')).astype(numpy.int64)
+    batch.store('cost', cost)
+    batch.store('period', period)
+    batch.store('deadline', deadline)
+    degenerate = numpy.bincount(batch.owner,
+                                weights=numpy.minimum(period, deadline) == 0,
+                                minlength=len(batch.tasksets)) > 0
+    return ~degenerate & batch.feasible(cost, period, deadline)
+
+def charge_initial_load(oheads, taskset):
+    if charge_initial_load_batch(oheads, [taskset])[0]:
+        return taskset
+    else:
+        return False
+
+def charge_scheduling_overheads(oheads, num_cpus, dedicated_irq, taskset):
+    if charge_scheduling_overheads_batch(oheads, num_cpus, dedicated_irq,
+                                         [taskset])[0]:
+        return taskset
+    else:
+        return False
+
+def quantize_params(taskset):
+    if quantize_params_batch([taskset])[0]:
+        return taskset
+    else:
+        return False
@@ -2,6 +2,8 @@ from __future__ import division
 
 from math import ceil
 
+from .model import snapshot
+
 # All overhead accounting in this file assumes absence of any interrupts.
 
 def charge_spinlock_overheads(oheads, tasks):
@@ -9,6 +11,7 @@ def charge_spinlock_overheads(oheads, tasks):
         return tasks
 
     ntasks = len(tasks)
+    oheads = snapshot(oheads, ntasks)
     # the individual charges
     rcost  = oheads.read_lock(ntasks) + oheads.read_unlock(ntasks)
     wcost  = oheads.lock(ntasks) + oheads.unlock(ntasks)
@@ -42,6 +45,7 @@ def charge_semaphore_overheads(oheads, preemptive, suspension_aware, tasks):
         return tasks
 
     ntasks = len(tasks)
+    oheads = snapshot(oheads, ntasks)
     lock   = oheads.lock(ntasks)
     unlock = oheads.unlock(ntasks)
     sysin  = oheads.syscall_in(ntasks)
@@ -109,6 +113,7 @@ def charge_dpcp_overheads(oheads, tasks):
         return tasks
 
     ntasks = len(tasks)
+    oheads = snapshot(oheads, ntasks)
     lock   = oheads.lock(ntasks)
     unlock = oheads.unlock(ntasks)
     sysin  = oheads.syscall_in(ntasks)
@@ -1,7 +1,95 @@
 from __future__ import division
 
-from schedcat.util.csv import load_columns as load_column_csv
-from schedcat.util.math import monotonic_pwlin, const
+import os
+import errno
+import hashlib
+import tempfile
+import cPickle as pickle
+
+from collections import OrderedDict
+
+from schedcat.util.csv import load_float_columns
+from schedcat.util.math import monotonic_pwlin, piece_wise_linear, const, \
+                               evaluate, numpy_available
+
+if numpy_available:
+    import numpy
+
+# Parsed overhead models are cached, keyed by file path, modification time,
+# size, and load options. If CACHE_DIR is set (e.g., to a directory shared
+# by a pool of worker processes), parsed models are also pickled there, so
+# that each CSV file is parsed only once.
+CACHE_DIR = None
+
+_model_cache = {}
+
+def _cache_key(kind, fname, options):
+    if not isinstance(fname, str):
+        # file objects cannot be cached
+        return None
+    try:
+        st = os.stat(fname)
+    except OSError:
+        return None
+    return repr((kind, os.path.abspath(fname), st.st_mtime, st.st_size,
+                 options))
+
+def _cache_file(cache_dir, key):
+    return os.path.join(cache_dir,
+                        'oh-%s.pickle' % hashlib.sha1(key).hexdigest())
+
+def _store_model(cache_dir, key, model):
+    try:
+        os.makedirs(cache_dir)
+    except OSError, e:
+        if e.errno != errno.EEXIST:
+            raise
+    # write atomically, other processes may be reading
+    fd, tmp = tempfile.mkstemp(dir=cache_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(model, f, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp, _cache_file(cache_dir, key))
+    except:
+        os.unlink(tmp)
+        raise
+
+def cached_model(kind, fname, options, load, cache_dir=None):
+    """Return load() (a freshly parsed model of fname), or a copy of a
+    previously parsed model with the same key, if one exists in memory or in
+    cache_dir (default: CACHE_DIR). cache_dir is created if necessary; if it
+    cannot be written, models are cached in memory only."""
+    if cache_dir is None:
+        cache_dir = CACHE_DIR
+    key = _cache_key(kind, fname, options)
+    if key is None:
+        return load()
+    if key in _model_cache:
+        return _model_cache[key].copy()
+
+    model = None
+    if cache_dir:
+        try:
+            with open(_cache_file(cache_dir, key), 'rb') as f:
+                model = pickle.load(f)
+        except (IOError, EOFError, pickle.UnpicklingError):
+            model = None
+    if model is None:
+        model = load()
+        if cache_dir:
+            try:
+                _store_model(cache_dir, key, model)
+            except (IOError, OSError):
+                pass
+    _model_cache[key] = model
+    return model.copy()
+
+# Maximum number of snapshots (task counts) remembered by Overheads.at().
+SNAPSHOT_CACHE_SIZE = 32
+
+def clear_model_cache():
+    "Forget all parsed models held in memory (CACHE_DIR is not touched)."
+    _model_cache.clear()
 
 class Overheads(object):
     """Legacy overhead objects"""
@@ -44,7 +132,7 @@ class Overheads(object):
         if custom_fields is None:
             custom_fields = []
 
-        data = load_column_csv(fname, convert=float)
+        data = load_float_columns(fname)
         if not 'TASK-COUNT' in data.by_name:
             raise IOError, "TASK-COUNT column is missing"
 
@@ -62,12 +150,116 @@ class Overheads(object):
                 else:
                     self.__dict__[field] = piece_wise_linear(points)
 
+    def copy(self):
+        "Copy the overhead object (the overhead functions are shared)."
+        o = self.__class__.__new__(self.__class__)
+        o.__dict__.update(self.__dict__)
+        o.__dict__.pop('_snapshots', None)
+        o.cache_affinity_loss = _copy_delay(self.cache_affinity_loss)
+        o.initial_cache_load = _copy_delay(self.initial_cache_load)
+        return o
+
+    def at(self, n):
+        """Return the overheads for a task count of n, as an OverheadSnapshot
+        in which each overhead in FIELD_MAPPING has been evaluated once. The
+        snapshot can be used wherever an Overheads object is accepted.
+        The last SNAPSHOT_CACHE_SIZE snapshots are cached by n until any
+        overhead or CPMD function is replaced."""
+        snapshots = self.__dict__.get('_snapshots')
+        if snapshots is None:
+            snapshots = self.__dict__['_snapshots'] = OrderedDict()
+        snap = snapshots.pop(n, None)
+        if snap is None or not snap.is_current():
+            snap = OverheadSnapshot(self, n)
+            while len(snapshots) >= SNAPSHOT_CACHE_SIZE:
+                # drop the least recently used snapshot
+                snapshots.popitem(last=False)
+        snapshots[n] = snap
+        return snap
+
     @staticmethod
     def from_file(fname, *args, **kargs):
-        o = Overheads()
-        o.source = fname
-        o.load_approximations(fname, *args, **kargs)
-        return o
+        """Load overheads from a CSV file. Parsed files are cached, see
+        cached_model()."""
+        def load():
+            o = Overheads()
+            o.source = fname
+            o.load_approximations(fname, *args, **kargs)
+            return o
+        options = (args, sorted(kargs.items()))
+        return cached_model('Overheads', fname, options, load)
+
+def _overheads_state(oheads):
+    # Everything a snapshot is derived from: the attributes of oheads
+    # (overhead functions, custom fields, quantum length) and the curves of
+    # its CPMD models, which set_cpmd_cost() replaces in place.
+    state = oheads.__dict__.items()
+    for field in ['cache_affinity_loss', 'initial_cache_load']:
+        delay = oheads.__dict__.get(field)
+        if isinstance(delay, CacheDelay):
+            state.extend(enumerate(delay.mem_hierarchy))
+    return [(k, v) for (k, v) in state if k != '_snapshots']
+
+class OverheadSnapshot(Overheads):
+    """Overheads evaluated at a fixed task count. Each overhead function is
+    replaced by a constant, so charging overheads repeatedly for the same
+    number of tasks does not re-evaluate any curves. CPMD curves, which
+    depend on the working set size, are memoized instead."""
+    def __init__(self, oheads, n):
+        self.__dict__.update(oheads.__dict__)
+        self.__dict__.pop('_snapshots', None)
+        self.task_count = n
+        self.base = oheads
+        self.state = _overheads_state(oheads)
+        for (_, field) in Overheads.FIELD_MAPPING:
+            self.__dict__[field] = const(getattr(oheads, field)(n))
+        self.cache_affinity_loss = MemoizedDelay(oheads.cache_affinity_loss)
+        self.initial_cache_load = MemoizedDelay(oheads.initial_cache_load)
+
+    def is_current(self):
+        """Is the snapshot still derived from the current overheads of the
+        base object? (Any attribute or CPMD curve that was replaced since
+        the snapshot was taken makes it stale.)"""
+        state = _overheads_state(self.base)
+        return len(state) == len(self.state) and \
+            all([k1 == k2 and v1 is v2 for ((k1, v1), (k2, v2))
+                 in zip(state, self.state)])
+
+    def at(self, n):
+        if n == self.task_count:
+            return self
+        else:
+            return self.base.at(n)
+
+class MemoizedDelay(object):
+    "Remembers the values of a CPMD curve (or any function of one argument)."
+    def __init__(self, fun):
+        self.fun = fun
+        self.values = {}
+
+    def __call__(self, x):
+        try:
+            return self.values[x]
+        except KeyError:
+            y = self.values[x] = self.fun(x)
+            return y
+        except TypeError:
+            # not hashable
+            return self.fun(x)
+
+    def evaluate(self, xs):
+        return evaluate(self.fun, xs)
+
+    def copy(self):
+        return MemoizedDelay(_copy_delay(self.fun))
+
+def snapshot(oheads, n):
+    """Return oheads.at(n) if oheads supports snapshots (see Overheads.at()),
+    and oheads itself otherwise."""
+    if hasattr(oheads, 'at'):
+        return oheads.at(n)
+    else:
+        return oheads
 
 class CacheDelay(object):
     """Cache-related Preemption and Migration Delay (CPMD)
@@ -96,6 +288,16 @@ class CacheDelay(object):
     def __call__(self, wss):
         return self.max_cost(wss)
 
+    def evaluate(self, wss):
+        """Vectorized max_cost(): the maximum cost for each working set size
+        in wss (a NumPy array if NumPy is available, a list otherwise)."""
+        costs = [evaluate(f, wss) for f in self.mem_hierarchy]
+        if numpy_available:
+            return numpy.array(costs).max(axis=0) if len(wss) else \
+                numpy.zeros(0)
+        else:
+            return [max(c) for c in zip(*costs)]
+
     @staticmethod
     def get_idx_for_name(key):
         for (i, name) in CacheDelay.MAPPING:
@@ -103,9 +305,22 @@ class CacheDelay(object):
                 return i
         assert False # bad key
 
+    def copy(self):
+        o = CacheDelay.__new__(CacheDelay)
+        o.__dict__.update(self.__dict__)
+        o.mem_hierarchy = list(self.mem_hierarchy)
+        return o
+
     @staticmethod
     def from_file(fname, non_decreasing=True):
-        data = load_column_csv(fname, convert=float)
+        """Load CPMD overheads from a CSV file. Parsed files are cached, see
+        cached_model()."""
+        return cached_model('CacheDelay', fname, non_decreasing,
+                            lambda: CacheDelay.load(fname, non_decreasing))
+
+    @staticmethod
+    def load(fname, non_decreasing=True):
+        data = load_float_columns(fname)
         if not 'WSS' in data.by_name:
             raise IOError, 'WSS column is missing'
 
@@ -120,3 +335,10 @@ class CacheDelay(object):
                     o.mem_hierarchy[idx] = piece_wise_linear(points)
                 o.__dict__[name] = o.mem_hierarchy[idx]
         return o
+
+def _copy_delay(delay):
+    # cache delays are sometimes replaced by plain functions
+    if isinstance(delay, (CacheDelay, MemoizedDelay)):
+        return delay.copy()
+    else:
+        return delay
@@ -1,5 +1,6 @@
 from __future__ import division
 
+from .model import snapshot
 from .quanta import quantize_wcet, quantize_period, account_for_delayed_release, stagger_latency
 
 def charge_scheduling_overheads(oheads, num_cpus, dedicated_irq, taskset,
@@ -8,21 +9,24 @@ def charge_scheduling_overheads(oheads, num_cpus, dedicated_irq, taskset,
     if not oheads or not taskset:
         return taskset
 
+    n      = len(taskset)
+    oheads = snapshot(oheads, n)
     qlen   = oheads.quantum_length
-    ev_lat = oheads.release_latency(taskset)
-    rel_oh = oheads.release(taskset)
+    ev_lat = oheads.release_latency(n)
+    rel_oh = oheads.release(n)
 
-    # account for reduced effective quantum length
+    # account for reduced effective quantum length; any task may be
+    # preempted at a quantum boundary, so assume the largest working set
     qeff = qlen \
         - ev_lat \
-        - oheads.tick(taskset) \
-        - oheads.schedule(taskset) \
-        - oheads.ctx_switch(taskset) \
-        - oheads.cache_affinity_loss(taskset)
+        - oheads.tick(n) \
+        - oheads.schedule(n) \
+        - oheads.ctx_switch(n) \
+        - oheads.cache_affinity_loss(max([t.wss for t in taskset]))
 
     if not dedicated_irq:
         # account for release interrupts
-        qeff -= (len(taskset) - 1) * rel_oh
+        qeff -= (n - 1) * rel_oh
 
     # Is any useful time left in the quantum? With short quanta and high
     # overheads, this may not be the case (in the analyzed worst case).
@@ -0,0 +1,107 @@
+"""Overhead-sensitivity analysis.
+
+How much larger could the (measured) overheads be before a task set
+becomes unschedulable? Instead of charging and testing every task set at
+every point of a grid of overhead scale factors, the functions in this
+module assume that schedulability is monotonic in the scale factor (if a
+task set is schedulable with overheads scaled by f, then it is also
+schedulable with any smaller factor), and binary-search the largest
+factor that passes for each task set.
+
+A schedulability test is a function test(taskset, oheads) that charges the
+overheads oheads to taskset (a fresh copy of the uncharged task set, which
+it may modify) and returns True if the result is schedulable. For example:
+
+    def test(ts, oheads):
+        return jlfp.charge_scheduling_overheads(oheads, 1, False, ts) and \\
+               jlfp.quantize_params(ts) and ts.utilization() <= 1
+
+    sensitivity_sweep(tasksets, oheads, test, [0.5, 1, 1.5, 2, 3, 4])
+"""
+
+from __future__ import division
+
+from schedcat.util.math import evaluate
+from .model import Overheads, OverheadSnapshot
+
+class ScaledFunction(object):
+    "The overhead function fun, scaled by a constant factor."
+    def __init__(self, factor, fun):
+        self.factor = factor
+        self.fun = fun
+
+    def __call__(self, x):
+        return self.factor * self.fun(x)
+
+    def evaluate(self, xs):
+        return [self.factor * y for y in evaluate(self.fun, xs)]
+
+def scale_overheads(oheads, factor):
+    """Return a copy of oheads in which every overhead (including CPMD) is
+    scaled by factor. The quantum length is not changed. If oheads is a
+    snapshot, the result is a snapshot of the scaled base overheads."""
+    if isinstance(oheads, OverheadSnapshot):
+        # scale the curves, not just the values at one task count
+        return scale_overheads(oheads.base, factor).at(oheads.task_count)
+    scaled = oheads.copy()
+    for (_, field) in Overheads.FIELD_MAPPING:
+        setattr(scaled, field, ScaledFunction(factor, getattr(oheads, field)))
+    scaled.cache_affinity_loss = \
+        ScaledFunction(factor, oheads.cache_affinity_loss)
+    scaled.initial_cache_load = \
+        ScaledFunction(factor, oheads.initial_cache_load)
+    return scaled
+
+def passes(taskset, oheads, test, factor):
+    "Is taskset schedulable under test with oheads scaled by factor?"
+    return bool(test(taskset.copy(), scale_overheads(oheads, factor)))
+
+def max_passing_index(taskset, oheads, test, factors):
+    """Return the index of the largest factor in factors (sorted in
+    increasing order) for which taskset passes test, or -1 if it passes for
+    none. Requires about log2(len(factors)) tests."""
+    lo, hi = 0, len(factors)
+    # invariant: passes at all indices < lo, fails at all indices >= hi
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if passes(taskset, oheads, test, factors[mid]):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo - 1
+
+def max_overhead_scale(taskset, oheads, test, lo=0.0, hi=4.0,
+                       precision=0.01):
+    """Binary-search the largest overhead scale factor in [lo, hi] for which
+    taskset passes test, up to precision. Returns None if the task set does
+    not pass even at lo, and hi if it passes at hi."""
+    if not passes(taskset, oheads, test, lo):
+        return None
+    if passes(taskset, oheads, test, hi):
+        return hi
+    while hi - lo > precision:
+        mid = (lo + hi) / 2
+        if passes(taskset, oheads, test, mid):
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+def sensitivity_sweep(tasksets, oheads, test, factors):
+    """Determine, for each overhead scale factor in factors, the fraction
+    of tasksets that pass test. Returns a list of (factor, ratio) pairs in
+    increasing order of factor.
+
+    Each task set is tested only O(log len(factors)) times: the largest
+    passing factor is found by binary search, and all smaller factors are
+    known to pass."""
+    factors = sorted(factors)
+    counts = [0] * len(factors)
+    total = 0
+    for ts in tasksets:
+        total += 1
+        for i in xrange(max_passing_index(ts, oheads, test, factors) + 1):
+            counts[i] += 1
+    if not total:
+        return [(f, 0.0) for f in factors]
+    return [(f, c / total) for (f, c) in zip(factors, counts)]
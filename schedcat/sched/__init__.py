@@ -2,27 +2,58 @@
 # Python model to C++ model conversion code.
 
 
+from schedcat.model.tasks import has_parameter
+from schedcat.util.buffers import ulong_array, empty_array
+
 try:
     from .native import TaskSet
 
     using_native = True
 
     def get_native_taskset(tasks, with_suspensions=False):
-        ts = TaskSet()
-        if with_suspensions:
-            for t in tasks:
-                if (hasattr(t, 'prio_pt')):
-                    ts.add_task(t.cost, t.period, t.deadline, t.prio_pt, t.suspended)
-                else:
-                    ts.add_task(t.cost, t.period, t.deadline, 0, t.suspended)
+        if hasattr(tasks, 'to_task_system'):
+            # columnar task system: pass the columns as they are
+            cost, period, deadline = tasks.cost, tasks.period, tasks.deadline
+            prio_pt = empty_array()
+            suspended = tasks.suspended if with_suspensions else None
+            if suspended is None:
+                suspended = empty_array()
         else:
-            for t in tasks:
-                if (hasattr(t, 'prio_pt')):
-                    ts.add_task(t.cost, t.period, t.deadline, t.prio_pt)
-                else:
-                    ts.add_task(t.cost, t.period, t.deadline)
+            cost     = [t.cost for t in tasks]
+            period   = [t.period for t in tasks]
+            deadline = [t.deadline for t in tasks]
+            prio_pt  = [t.prio_pt if has_parameter(t, 'prio_pt') else 0
+                        for t in tasks]
+            if with_suspensions:
+                suspended = [t.suspended for t in tasks]
+            else:
+                suspended = empty_array()
+        ts = TaskSet()
+        ok = ts.add_tasks(ulong_array(cost), ulong_array(period),
+                          ulong_array(deadline), ulong_array(prio_pt),
+                          ulong_array(suspended))
+        assert ok
         return ts
 
+    def get_native_batch(tasksets):
+        """Flatten tasksets into the (offsets, wcet, period, deadline)
+        arrays expected by the native batch tests."""
+        offsets = [0]
+        wcet, period, deadline = [], [], []
+        for ts in tasksets:
+            if hasattr(ts, 'to_task_system'):
+                # columnar task system
+                wcet     += ts.cost.tolist()
+                period   += ts.period.tolist()
+                deadline += ts.deadline.tolist()
+            else:
+                for t in ts:
+                    wcet.append(t.cost)
+                    period.append(t.period)
+                    deadline.append(t.deadline)
+            offsets.append(len(wcet))
+        return (offsets, wcet, period, deadline)
+
 except ImportError:
     # Nope, C++ impl. not available. Use Python implementation.
     using_native = False
@@ -50,7 +50,9 @@ def is_schedulable_py(no_cpus, tasks,
                       want_baruah=3000,
                       want_rta=True,
                       want_ffdbf=False,
-                      want_load=False):
+                      want_load=False,
+                      parallel=False):
+    # (parallel is only supported by the native implementation)
     if tasks.utilization() > no_cpus or \
         not forall(tasks)(lambda t: t.period >= t.cost):
         # trivially infeasible
@@ -88,28 +90,53 @@ import schedcat.sched
 if schedcat.sched.using_native:
     import schedcat.sched.native as native
 
-    def is_schedulable_cpp(no_cpus, tasks,
-                           rta_min_step=1,
-                           want_baruah=True,
-                           want_rta=True,
-                           want_ffdbf=False,
-                           want_load=False):
+    def get_native_test(no_cpus,
+                        rta_min_step=1,
+                        want_baruah=True,
+                        want_rta=True,
+                        want_ffdbf=False,
+                        want_load=False,
+                        parallel=False):
+        """If parallel is true, the expensive multiprocessor tests run
+        concurrently, each in its own thread."""
         if no_cpus == 1:
-            native_test = native.QPATest(no_cpus);
+            return native.QPATest(no_cpus);
         else:
-            native_test = native.GlobalEDF(no_cpus, rta_min_step,
-                                           want_baruah != False,
-                                           want_rta,
-                                           want_ffdbf,
-                                           want_load)
+            return native.GlobalEDF(no_cpus, rta_min_step,
+                                    want_baruah != False,
+                                    want_rta,
+                                    want_ffdbf,
+                                    want_load,
+                                    True, # want_la
+                                    parallel)
+
+    def is_schedulable_cpp(no_cpus, tasks, *args, **kargs):
+        native_test = get_native_test(no_cpus, *args, **kargs)
         ts = schedcat.sched.get_native_taskset(tasks)
         return native_test.is_schedulable(ts)
 
+    def is_schedulable_batch_cpp(no_cpus, tasksets, *args, **kargs):
+        """Test many task sets (TaskSystems or ColumnarTaskSystems) at once.
+        The task sets are passed to the native test in a single call.
+        Returns a list of results."""
+        native_test = get_native_test(no_cpus, *args, **kargs)
+        batch = schedcat.sched.get_native_batch(tasksets)
+        return list(native.is_schedulable_batch(native_test, *batch))
+
     is_schedulable = is_schedulable_cpp
+    is_schedulable_batch = is_schedulable_batch_cpp
 
 else:
     is_schedulable = is_schedulable_py
 
+    def is_schedulable_batch(no_cpus, tasksets, *args, **kargs):
+        "Test many task sets at once. Returns a list of results."
+        return [is_schedulable_py(no_cpus,
+                                  ts.to_task_system()
+                                  if hasattr(ts, 'to_task_system') else ts,
+                                  *args, **kargs)
+                for ts in tasksets]
+
 
 def bound_response_times(no_cpus, tasks, *args, **kargs):
     if is_schedulable(no_cpus, tasks, *args, **kargs):
@@ -77,7 +77,7 @@ def compute_response_bounds(no_cpus, tasks, rounds):
         return None
 
     # Compute utilization ceiling
-    util_ceil = int(ceil(tasks.utilization_q()))
+    util_ceil = tasks.utilization_q().ceil()
     # First uniformly reduce scheduler priority points to derive analysis
     # priority points.  Due to uniform reduction, does not change scheduling
     # decisions.  Shown in EA'12 to improve bounds.
@@ -0,0 +1,193 @@
+"""Adaptive ordering of the (pure Python) G-EDF schedulability tests.
+
+is_schedulable_py() tries the sufficient tests BAK, GFB, BAR, RTA, and
+FF-DBF in a fixed order until one of them succeeds. A Portfolio runs the
+same tests, but learns how often each test succeeds and how long it takes
+on the task sets at hand, and tries them in order of increasing expected
+cost per success (mean runtime / success rate), which minimizes the
+expected time to a positive verdict. The statistics are kept separately for
+each class of task sets, bucketed by the number of tasks n, the number of
+processors m, and the total utilization U.
+
+By default, every applicable test is tried, so a Portfolio reaches the same
+verdict as is_schedulable_py(). With skip_below=p, tests that succeeded in
+fewer than a fraction p of at least min_runs attempts in a bucket are
+skipped, which trades some accuracy (the tests are only sufficient) for
+speed.
+
+The statistics can be saved and loaded, so that later runs start warm:
+
+    p = Portfolio()
+    for ts in tasksets:
+        p.is_schedulable(m, ts)
+    p.save_stats('edf-stats.csv')
+    ...
+    p = Portfolio(skip_below=0.01)
+    p.load_stats('edf-stats.csv')
+"""
+
+from __future__ import division
+
+import csv
+
+from math import log
+from time import time
+
+from .gfb import is_schedulable as gfb_test
+from .bak import is_schedulable as bak_test
+from .bar import is_schedulable as bar_test
+from .rta import is_schedulable as rta_test
+from .ffdbf import is_schedulable as ffdbf_test
+
+from schedcat.sched.edf import should_use_baruah_test
+from schedcat.util.quantor import forall
+
+STATS_COLUMNS = ['n', 'm', 'u', 'test', 'runs', 'successes', 'time']
+
+def bucket(no_cpus, tasks):
+    """The default task set classes: (floor(log2(n)), m, normalized
+    utilization in steps of 0.1)."""
+    n = len(tasks)
+    return (int(log(n, 2)) if n else -1,
+            no_cpus,
+            int(tasks.utilization() / no_cpus * 10))
+
+class TestStats(object):
+    def __init__(self, runs=0, successes=0, time=0.0):
+        self.runs = runs
+        self.successes = successes
+        self.time = time
+
+    def record(self, success, elapsed):
+        self.runs += 1
+        self.successes += int(success)
+        self.time += elapsed
+
+    def merge(self, other):
+        self.runs += other.runs
+        self.successes += other.successes
+        self.time += other.time
+
+    def success_rate(self):
+        "Estimate (Laplace's rule of succession; 0.5 if never run)."
+        return (self.successes + 1) / (self.runs + 2)
+
+    def mean_time(self):
+        return self.time / self.runs if self.runs else 0.0
+
+    def expected_cost(self):
+        """Expected time spent per success. Tests that were never run
+        are tried first."""
+        return self.mean_time() / self.success_rate()
+
+class Portfolio(object):
+    def __init__(self,
+                 rta_min_step=1,
+                 want_baruah=3000,
+                 want_rta=True,
+                 want_ffdbf=False,
+                 skip_below=None,
+                 min_runs=20,
+                 bucket=bucket):
+        """The test parameters have the same meaning as in
+        is_schedulable_py(). A test is skipped in a bucket if it has been
+        run at least min_runs times there and succeeded in fewer than a
+        fraction skip_below of the runs (never, if skip_below is None).
+        bucket(no_cpus, tasks) maps a task set to its class (a tuple of
+        ints)."""
+        self.rta_min_step = rta_min_step
+        self.want_baruah = want_baruah
+        self.want_rta = want_rta
+        self.want_ffdbf = want_ffdbf
+        self.skip_below = skip_below
+        self.min_runs = min_runs
+        self.bucket = bucket
+        # (bucket, test name) -> TestStats
+        self.stats = {}
+
+    def candidates(self, no_cpus, tasks):
+        """The applicable tests as (name, test) pairs, in the order of
+        is_schedulable_py()."""
+        tests = [('BAK', bak_test)]
+        if tasks.only_constrained_deadlines():
+            # the other tests cannot handle arbitrary deadlines
+            tests.append(('GFB', gfb_test))
+            if should_use_baruah_test(self.want_baruah, tasks, no_cpus):
+                tests.append(('BAR', bar_test))
+            if self.want_rta:
+                step = self.rta_min_step
+                tests.append(('RTA', lambda m, ts:
+                              rta_test(m, ts, min_fixpoint_step=step)))
+            if self.want_ffdbf:
+                tests.append(('FF-DBF', ffdbf_test))
+        return tests
+
+    def get_stats(self, key, name):
+        if not (key, name) in self.stats:
+            self.stats[(key, name)] = TestStats()
+        return self.stats[(key, name)]
+
+    def skip(self, stats):
+        return self.skip_below is not None and \
+            stats.runs >= self.min_runs and \
+            stats.successes < self.skip_below * stats.runs
+
+    def order(self, key, tests):
+        """Sort the (name, test) pairs in tests by expected cost per
+        success in bucket key and drop the ones that should be skipped.
+        Ties keep the default order."""
+        ranked = [(self.get_stats(key, name).expected_cost(), i, name, test)
+                  for (i, (name, test)) in enumerate(tests)
+                  if not self.skip(self.get_stats(key, name))]
+        ranked.sort()
+        return [(name, test) for (_, _, name, test) in ranked]
+
+    def is_schedulable(self, no_cpus, tasks):
+        if tasks.utilization() > no_cpus or \
+            not forall(tasks)(lambda t: t.period >= t.cost):
+            # trivially infeasible
+            return False
+        elif no_cpus == 1:
+            # simply uniprocessor density condition
+            return tasks.density() <= 1
+        key = self.bucket(no_cpus, tasks)
+        for (name, test) in self.order(key,
+                                       self.candidates(no_cpus, tasks)):
+            start = time()
+            success = test(no_cpus, tasks)
+            self.get_stats(key, name).record(success, time() - start)
+            if success:
+                return True
+        return False
+
+    __call__ = is_schedulable
+
+    def export_stats(self):
+        "The statistics as a list of rows (see STATS_COLUMNS)."
+        rows = []
+        for ((key, name), s) in sorted(self.stats.items()):
+            if s.runs:
+                rows.append(list(key) + [name, s.runs, s.successes, s.time])
+        return rows
+
+    def import_stats(self, rows):
+        "Add statistics (as returned by export_stats()) to the current ones."
+        for row in rows:
+            name, runs, successes, elapsed = row[-4:]
+            key = tuple([int(x) for x in row[:-4]])
+            self.get_stats(key, name).merge(
+                TestStats(int(runs), int(successes), float(elapsed)))
+
+    def save_stats(self, fname):
+        with open(fname, 'wb') as f:
+            out = csv.writer(f)
+            out.writerow(STATS_COLUMNS)
+            out.writerows(self.export_stats())
+
+    def load_stats(self, fname):
+        with open(fname, 'rb') as f:
+            rows = list(csv.reader(f))
+        if rows and rows[0][-4:] == STATS_COLUMNS[-4:]:
+            # skip header
+            rows = rows[1:]
+        self.import_stats(rows)
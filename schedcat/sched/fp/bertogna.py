@@ -10,6 +10,7 @@ from __future__ import division
 
 from math import floor
 from schedcat.util.quantor import forall
+from schedcat.model.tasks import has_parameter, get_parameter
 
 def is_schedulable(num_cpus, tasks, **kargs):
     return forall(xrange(len(tasks)))(lambda k: rta_schedulable(k, tasks, num_cpus, **kargs))
@@ -53,7 +54,7 @@ def rta_schedulable(i, taskset, num_cpus, dont_use_slack=False):
     task = taskset[i]
 
     # EA:09 extension: add blocking terms to response-time bound
-    blocked = task.blocked if 'blocked' in task.__dict__ else 0
+    blocked = get_parameter(task, 'blocked', 0)
 
     # The m highest priority tasks do not subject
     # to higher-priority interference
@@ -86,7 +87,7 @@ def rta_schedulable(i, taskset, num_cpus, dont_use_slack=False):
         # it again to the "regular" interference bound.
         # Check if a specially named higher-priority direct blocking
         # bound exists as a task attribute.
-        if 'hp_direct_blocked' in task.__dict__:
+        if has_parameter(task, 'hp_direct_blocked'):
             hp_interference -= task.hp_direct_blocked
             
             # The direct blocking from higher-priority tasks cannot exceed
@@ -3,6 +3,7 @@ from __future__ import division
 from math import ceil
 
 from schedcat.util.quantor import forall
+from schedcat.model.tasks import has_parameter
 
 # task.blocked   => ALL blocking, including local and remote (self-suspensions)
 # task.suspended => self-suspensions, aka only REMOTE blocking
@@ -11,13 +12,13 @@ from schedcat.util.quantor import forall
 def check_for_suspension_parameters(taskset):
     "compatibility: add required parameters if they are not present"
     for t in taskset:
-        if not 'blocked' in t.__dict__:
+        if not has_parameter(t, 'blocked'):
             # No blocking.
             t.blocked = 0
-        if not 'suspended' in t.__dict__:
+        if not has_parameter(t, 'suspended'):
             # No self-suspension time.
             t.suspended = 0
-        if not 'jitter' in t.__dict__:
+        if not has_parameter(t, 'jitter'):
             # No arrival jitter (equivalent to an initial suspension).
             t.jitter = 0
 
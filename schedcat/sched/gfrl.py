@@ -4,8 +4,6 @@
 
 from __future__ import division
 
-from math import ceil
-
 from fractions import Fraction
 
 from schedcat.util.quantor import forall
@@ -82,12 +80,12 @@ def Gi_slope(i, L, tasks, no_cpus):
            Si_slope(i, L, tasks, no_cpus)
 
 def G_val(L, tasks, no_cpus):
-    util_cap = int(ceil(tasks.utilization_q()))
+    util_cap = tasks.utilization_q().ceil()
     return sum(heapq.nlargest(util_cap - 1, [Gi_val(i, L, tasks, no_cpus)
                                             for i in range(len(tasks))]))
 
 def G_slope(L, tasks, no_cpus):
-    util_cap = int(ceil(tasks.utilization_q()))
+    util_cap = tasks.utilization_q().ceil()
     largest = heapq.nlargest(util_cap - 1, [(Gi_val(i, L, tasks, no_cpus),
                                             Gi_slope(i, L, tasks, no_cpus))
                                             for i in range(len(tasks))])
@@ -109,7 +107,7 @@ def compute_response_bounds(no_cpus, tasks):
     if not has_bounded_tardiness(no_cpus, tasks):
         return None
 
-    util_cap = int(ceil(tasks.utilization_q()))
+    util_cap = tasks.utilization_q().ceil()
 
     # Y-intercepts of potential "s" values with respect to L
     # s = min(LD_i - \frac{m-1}{m} C_i)
@@ -1,10 +1,17 @@
 from .native import TaskSet
 
+from schedcat.util.buffers import ulong_array, empty_array
+
 def get_native_taskset(tasks):
+    if hasattr(tasks, 'to_task_system'):
+        # columnar task system
+        cost, period, deadline = tasks.cost, tasks.period, tasks.deadline
+    else:
+        cost     = [t.cost for t in tasks]
+        period   = [t.period for t in tasks]
+        deadline = [t.deadline for t in tasks]
     ts = TaskSet()
-    for t in tasks:
-        if t.implicit_deadline():
-            ts.add_task(t.cost, t.period)
-        else:
-            ts.add_task(t.cost, t.period, t.deadline)
+    ok = ts.add_tasks(ulong_array(cost), ulong_array(period),
+                      ulong_array(deadline), empty_array(), empty_array())
+    assert ok
     return ts
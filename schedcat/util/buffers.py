@@ -0,0 +1,39 @@
+"""
+Parameter arrays for the bulk constructors of the native models.
+
+The native TaskSet, CANTaskSet, and ResourceSharingInfo classes provide bulk
+methods (add_tasks() etc.) that read task parameters directly from objects
+that support the buffer protocol, as long as the elements are C (unsigned)
+longs. ulong_array() converts a sequence of parameters into such an array.
+NumPy arrays with a matching dtype (e.g., the int64 columns of a
+ColumnarTaskSystem) are passed through without copying.
+"""
+
+from array import array
+
+try:
+    import numpy
+    numpy_available = True
+except ImportError:
+    numpy_available = False
+
+ULONG_SIZE = array('L').itemsize
+
+def ulong_array(values):
+    """Return values as a contiguous array of C unsigned longs. Raises a
+    TypeError for non-integral values and an OverflowError for negative
+    ones, like the element-wise native setters."""
+    if numpy_available and isinstance(values, numpy.ndarray):
+        if values.dtype.kind not in 'iub':
+            raise TypeError("integer parameters expected (got %s)"
+                            % values.dtype)
+        if values.dtype.kind == 'i' and len(values) and values.min() < 0:
+            raise OverflowError("negative parameter")
+        if values.dtype.kind == 'b' or values.dtype.itemsize != ULONG_SIZE:
+            values = values.astype(numpy.uint)
+        return numpy.ascontiguousarray(values)
+    return array('L', values)
+
+def empty_array():
+    "An empty parameter array (selects the native defaults)."
+    return array('L')
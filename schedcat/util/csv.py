@@ -2,6 +2,12 @@ from __future__ import absolute_import
 
 import csv
 
+try:
+    import numpy
+    numpy_available = True
+except ImportError:
+    numpy_available = False
+
 from .storage import storage
 
 def load_columns(fname,
@@ -57,3 +63,41 @@ def load_columns(fname,
 
     return storage(name=fname, columns=col_idx,
                    by_name=by_col_name, by_idx=by_col_idx)
+
+def load_float_columns(fname):
+    """Like load_columns(fname, convert=float), but parses the data with
+    NumPy (if available), which is much faster for large files. Columns are
+    returned as lists of floats.
+    """
+    if not numpy_available:
+        return load_columns(fname, convert=float)
+
+    if isinstance(fname, str):
+        f = open(fname)
+    else:
+        # assume we got a file object
+        f = fname
+    try:
+        header = next(csv.reader([f.readline()]), [])
+        col_idx = {}
+        for i, key in enumerate(header):
+            col_idx[key.strip()] = i
+        try:
+            data = numpy.loadtxt(f, delimiter=',', ndmin=2)
+        except ValueError, err:
+            raise IOError, "%s: %s" % (fname, err)
+    finally:
+        if fname != f:
+            f.close()
+
+    if data.size and data.shape[1] != len(header):
+        raise IOError, "expected uniform row length (%s)" % fname
+
+    by_col_idx = [data[:, i].tolist() if data.size else []
+                  for i in xrange(len(header))]
+    by_col_name = {}
+    for key in col_idx:
+        by_col_name[key] = by_col_idx[col_idx[key]]
+
+    return storage(name=fname, columns=col_idx,
+                   by_name=by_col_name, by_idx=by_col_idx)
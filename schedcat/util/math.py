@@ -1,28 +1,134 @@
 from __future__ import division
 
 from bisect import bisect_left as find_index
+from fractions import Fraction
+
+try:
+    import numpy
+    numpy_available = True
+except ImportError:
+    numpy_available = False
 
 def is_integral(x):
     return type(x) == int or type(x) == long
 
 def gcd(a,b):
-    if a == 0:
-        return b
-    return abs(gcd(b % a, a))
+    while a != 0:
+        a, b = b % a, a
+    return abs(b)
 
 def lcm(*args):
-    if not args:
-        return 0
-    a = args[0]
-    for b in args[1:]:
+    return bounded_lcm(args, None)
+
+def bounded_lcm(values, limit):
+    """Return the least common multiple of values (0 if there are none), or
+    None as soon as the running LCM exceeds limit (unless limit is None).
+    Useful to avoid computing astronomically large hyperperiods."""
+    values = iter(values)
+    a = next(values, 0)
+    for b in values:
+        if limit is not None and a > limit:
+            break
         if not is_integral(a) or not is_integral(b):
             # only well-defined for integers
             raise Exception, \
                 "LCM is only well-defined for integers (got: %s, %s)" \
                 % (type(a), type(b))
         a = (a // gcd(a,b)) * b
+    if limit is not None and a > limit:
+        return None
     return a
 
+# Relative difference above which float approximations of two rationals are
+# far enough apart to compare them without exact arithmetic.
+EXACT_COMPARISON_SLACK = 1e-12
+
+class ExactSum(Fraction):
+    """An exact rational number that is cheap to compare. ExactSum is a
+    Fraction and can be used anywhere a Fraction is expected. Comparisons
+    are first tried with a float approximation and only carried out exactly
+    if the two values are too close to tell apart in floating point.
+    """
+    __slots__ = ('_approx',)
+
+    def __new__(cls, numerator=0, denominator=None):
+        self = super(ExactSum, cls).__new__(cls, numerator, denominator)
+        self._approx = self._numerator / self._denominator
+        return self
+
+    def _float_cmp(self, other):
+        # Returns the sign of self - other, or None if floats are not enough.
+        try:
+            approx = float(other)
+        except (TypeError, OverflowError):
+            return None
+        diff = self._approx - approx
+        if abs(diff) > EXACT_COMPARISON_SLACK * max(abs(self._approx),
+                                                    abs(approx)):
+            return 1 if diff > 0 else -1
+        else:
+            return None
+
+    def __lt__(self, other):
+        sign = self._float_cmp(other)
+        return Fraction.__lt__(self, other) if sign is None else sign < 0
+
+    def __le__(self, other):
+        sign = self._float_cmp(other)
+        return Fraction.__le__(self, other) if sign is None else sign < 0
+
+    def __gt__(self, other):
+        sign = self._float_cmp(other)
+        return Fraction.__gt__(self, other) if sign is None else sign > 0
+
+    def __ge__(self, other):
+        sign = self._float_cmp(other)
+        return Fraction.__ge__(self, other) if sign is None else sign > 0
+
+    def __float__(self):
+        return self._approx
+
+    def floor(self):
+        "Exact floor (math.floor() goes through float in Python 2)."
+        return self._numerator // self._denominator
+
+    def ceil(self):
+        "Exact ceiling (math.ceil() goes through float in Python 2)."
+        return -(-self._numerator // self._denominator)
+
+def _integral_terms(terms):
+    for (n, d) in terms:
+        if is_integral(n) and is_integral(d):
+            yield (n, d)
+        else:
+            q = Fraction(n, d)
+            yield (q.numerator, q.denominator)
+
+def exact_sum(terms):
+    """Exactly sum up n/d for all (n, d) in terms. Rather than creating and
+    adding up one Fraction per term, the numerators are scaled to the least
+    common denominator and summed as integers. Returns an ExactSum.
+    """
+    terms = list(_integral_terms(terms))
+    if not terms:
+        return ExactSum(0)
+    denom = lcm(*[d for (_, d) in terms])
+    return ExactSum(sum([n * (denom // d) for (n, d) in terms]), denom)
+
+def exact_largest(terms, k=1):
+    """Return the k largest n/d for all (n, d) in terms, in decreasing order,
+    as (n, d) tuples. Assumes positive denominators."""
+    terms = list(_integral_terms(terms))
+    terms.sort(cmp=lambda a, b: cmp(a[0] * b[1], b[0] * a[1]), reverse=True)
+    return terms[:k]
+
+def exact_max(terms):
+    "Return the largest n/d for all (n, d) in terms as an ExactSum."
+    largest = exact_largest(terms)
+    if not largest:
+        raise ValueError("exact_max() arg is an empty sequence")
+    return ExactSum(*largest[0])
+
 def topsum(lst, fun, n):
     """return the sum of the top n items of map(fun, lst)"""
     x = map(fun, lst)
@@ -44,6 +150,17 @@ class LinearEqu(object):
     def __call__(self, x):
         return self.a + (self.b * x if self.b else 0)
 
+    def evaluate(self, xs):
+        """Evaluate at each point in xs. Returns a NumPy array if NumPy is
+        available, and a list otherwise."""
+        if not numpy_available:
+            return [self(x) for x in xs]
+        xs = numpy.asarray(xs)
+        if self.b:
+            return self.a + self.b * xs
+        else:
+            return numpy.repeat(self.a, len(xs))
+
     def __add__(self, other):
         return LinearEqu(self.a + other.a, self.b + other.b)
 
@@ -81,21 +198,50 @@ class PieceWiseLinearEqu(object):
                          for i in xrange(len(points) - 1)]
         self.lookup = [points[i+1][0] for i in xrange(len(points) - 1)]
         self.hi     = len(self.lookup) - 1
+        # breakpoints, intercepts and slopes, precompiled for fast evaluation
+        self.intercepts = [seg.a for seg in self.segments]
+        self.slopes     = [seg.b for seg in self.segments]
+        if numpy_available:
+            self.breaks_array     = numpy.array(self.lookup[:self.hi],
+                                                dtype=float)
+            self.intercepts_array = numpy.array(self.intercepts, dtype=float)
+            self.slopes_array     = numpy.array(self.slopes, dtype=float)
 
     def __call__(self, x):
         # find appropriate linear segments
         i = find_index(self.lookup, x, hi=self.hi)
-        f = self.segments[i]
         # approximate linearly from support point
+        b = self.slopes[i]
+        y = self.intercepts[i] + (b * x if b else 0)
         # negative overheads make no sense, so avoid them
-        return max(0, f(x))
+        return max(0, y)
+
+    def evaluate(self, xs):
+        """Evaluate at each point in xs. Returns a NumPy array if NumPy is
+        available, and a list otherwise."""
+        if not numpy_available:
+            return [self(x) for x in xs]
+        xs = numpy.asarray(xs, dtype=float)
+        i = numpy.searchsorted(self.breaks_array, xs, side='left')
+        y = self.intercepts_array[i] + self.slopes_array[i] * xs
+        return numpy.maximum(0, y)
 
     def is_constant(self):
-        return all([seg[1].is_constant() for seg in self.segments])
+        return all([seg.is_constant() for seg in self.segments])
 
 def const(x):
     return LinearEqu(x, 0)
 
+def evaluate(fun, xs):
+    """Evaluate fun at each point in xs and return a list of results. Uses
+    fun.evaluate() for vectorized evaluation, if fun provides it (e.g., for
+    LinearEqu and PieceWiseLinearEqu); otherwise calls fun for each x."""
+    if hasattr(fun, 'evaluate'):
+        ys = fun.evaluate(xs)
+        return ys.tolist() if hasattr(ys, 'tolist') else list(ys)
+    else:
+        return [fun(x) for x in xs]
+
 def lin(a, b):
     return LinearEqu(a, b)
 
@@ -13,8 +13,10 @@ import schedcat.sched.edf.ffdbf as ffdbf
 import schedcat.sched.edf.gfb as gfb
 import schedcat.sched.edf.rta as rta
 import schedcat.sched.edf as edf
+import schedcat.sched.edf.portfolio as portfolio
 
 import schedcat.sched as sched
+import schedcat.util.buffers as buffers
 
 import schedcat.model.tasks as tasks
 
@@ -187,3 +189,194 @@ class Test_QPA(unittest.TestCase):
             tasks.SporadicTask(1113, 83000, deadline=10683),
             ])
         self.assertFalse(qpa.is_schedulable(sched.get_native_taskset(ts2)))
+
+
+class Batch(unittest.TestCase):
+    def setUp(self):
+        import random
+        rng = random.Random(11)
+        self.tasksets = []
+        for i in xrange(30):
+            ts = tasks.TaskSystem()
+            for j in xrange(rng.randint(0, 8)):
+                p = rng.randint(10, 100) * 10
+                ts.append(tasks.SporadicTask(rng.randint(1, p // 2), p,
+                                             rng.randint(p // 2, p)))
+            self.tasksets.append(ts)
+
+    def test_batch(self):
+        for m in [1, 2, 4]:
+            expected = [edf.is_schedulable(m, ts) for ts in self.tasksets]
+            self.assertEqual(edf.is_schedulable_batch(m, self.tasksets),
+                             expected)
+            self.assertTrue(True in expected or m == 1)
+
+    def test_batch_options(self):
+        expected = [edf.is_schedulable(4, ts, want_rta=False)
+                    for ts in self.tasksets]
+        self.assertEqual(edf.is_schedulable_batch(4, self.tasksets,
+                                                  want_rta=False),
+                         expected)
+
+    def test_empty_batch(self):
+        self.assertEqual(edf.is_schedulable_batch(2, []), [])
+
+    def test_parallel_portfolio(self):
+        for m in [2, 4]:
+            for opts in [{}, dict(want_ffdbf=True)]:
+                self.assertEqual(
+                    [edf.is_schedulable(m, ts, parallel=True, **opts)
+                     for ts in self.tasksets],
+                    [edf.is_schedulable(m, ts, **opts)
+                     for ts in self.tasksets])
+
+    def test_threads(self):
+        # native tests release the GIL; results must not depend on it
+        from multiprocessing.pool import ThreadPool
+        test = edf.native.BaruahGedf(2)
+        native = [sched.get_native_taskset(ts) for ts in self.tasksets]
+        pool = ThreadPool(4)
+        try:
+            self.assertEqual(pool.map(test.is_schedulable, native),
+                             [test.is_schedulable(ts) for ts in native])
+        finally:
+            pool.close()
+
+    def test_columnar_batch(self):
+        try:
+            from schedcat.model.columnar import ColumnarTaskSystem
+        except ImportError:
+            return
+        cols = [ColumnarTaskSystem.from_tasks(ts) for ts in self.tasksets]
+        self.assertEqual(edf.is_schedulable_batch(2, cols),
+                         edf.is_schedulable_batch(2, self.tasksets))
+
+class NativeBuffers(unittest.TestCase):
+    def setUp(self):
+        self.ts = tasks.TaskSystem([
+                tasks.SporadicTask(10, 100),
+                tasks.SporadicTask(33, 66, 50),
+                tasks.SporadicTask(7, 10, 9),
+            ])
+        self.ts[1].prio_pt = 40
+        for t in self.ts:
+            t.suspended = 1
+
+    def check(self, native, ts):
+        self.assertEqual(native.get_task_count(), len(ts))
+        for (i, t) in enumerate(ts):
+            self.assertEqual(native.get_wcet(i), t.cost)
+            self.assertEqual(native.get_period(i), t.period)
+            self.assertEqual(native.get_deadline(i), t.deadline)
+
+    def test_taskset(self):
+        self.check(sched.get_native_taskset(self.ts), self.ts)
+        self.check(sched.get_native_taskset(self.ts, with_suspensions=True),
+                   self.ts)
+        self.check(sched.get_native_taskset(tasks.TaskSystem()), [])
+
+    def test_columnar_taskset(self):
+        try:
+            from schedcat.model.columnar import ColumnarTaskSystem
+        except ImportError:
+            return
+        cols = ColumnarTaskSystem.from_tasks(self.ts)
+        self.check(sched.get_native_taskset(cols), self.ts)
+        self.check(sched.get_native_taskset(cols, with_suspensions=True),
+                   self.ts)
+        qpa = edf.native.QPATest(1)
+        self.assertEqual(
+            qpa.is_schedulable(sched.get_native_taskset(cols)),
+            qpa.is_schedulable(sched.get_native_taskset(self.ts)))
+
+    def test_suspensions(self):
+        # suspensions make the third task infeasible
+        self.assertTrue(
+            sched.get_native_taskset(self.ts).has_only_feasible_tasks())
+        self.ts[2].suspended = 3
+        self.assertFalse(
+            sched.get_native_taskset(self.ts, with_suspensions=True)
+            .has_only_feasible_tasks())
+
+    def test_invalid_parameters(self):
+        self.ts[0].cost = 1.5
+        self.assertRaises(TypeError, sched.get_native_taskset, self.ts)
+        self.ts[0].cost = -1
+        self.assertRaises(OverflowError, sched.get_native_taskset, self.ts)
+
+    def test_ulong_array(self):
+        try:
+            import numpy
+        except ImportError:
+            return
+        col = numpy.array([1, 2, 3], dtype=numpy.int64)
+        self.assertIs(buffers.ulong_array(col), col) # no copy
+        self.assertEqual(list(buffers.ulong_array(col[::2])), [1, 3])
+        self.assertEqual(list(buffers.ulong_array(col.astype(numpy.int32))),
+                         [1, 2, 3])
+        self.assertRaises(TypeError, buffers.ulong_array, col * 0.5)
+        self.assertRaises(OverflowError, buffers.ulong_array, -col)
+
+class AdaptivePortfolio(unittest.TestCase):
+    def setUp(self):
+        import random
+        rng = random.Random(7)
+        self.tasksets = []
+        for i in xrange(40):
+            ts = tasks.TaskSystem()
+            for j in xrange(rng.randint(2, 10)):
+                p = rng.randint(10, 100) * 10
+                ts.append(tasks.SporadicTask(rng.randint(1, p // 3), p,
+                                             rng.randint(p // 2, p)))
+            self.tasksets.append(ts)
+        self.key = portfolio.bucket(2, self.tasksets[0])
+
+    def test_same_verdicts(self):
+        p = portfolio.Portfolio()
+        for rnd in xrange(2):
+            for m in [1, 2, 4]:
+                self.assertEqual([p(m, ts) for ts in self.tasksets],
+                                 [edf.is_schedulable_py(m, ts)
+                                  for ts in self.tasksets])
+        runs = sum([s.runs for s in p.stats.values()])
+        self.assertGreater(runs, 0)
+
+    def test_order(self):
+        p = portfolio.Portfolio()
+        tests = p.candidates(2, self.tasksets[0])
+        self.assertEqual([n for (n, _) in p.order(self.key, tests)],
+                         ['BAK', 'GFB', 'BAR', 'RTA'])
+        p.import_stats([list(self.key) + ['BAK', 10, 1, 1.0],
+                        list(self.key) + ['RTA', 10, 9, 0.5]])
+        # untried tests first, then RTA (cheaper per success)
+        self.assertEqual([n for (n, _) in p.order(self.key, tests)],
+                         ['GFB', 'BAR', 'RTA', 'BAK'])
+
+    def test_skip(self):
+        rows = [list(self.key) + ['BAR', 50, 0, 5.0]]
+        tests = portfolio.Portfolio().candidates(2, self.tasksets[0])
+        p = portfolio.Portfolio()
+        p.import_stats(rows)
+        self.assertIn('BAR', [n for (n, _) in p.order(self.key, tests)])
+        p = portfolio.Portfolio(skip_below=0.05)
+        p.import_stats(rows)
+        self.assertNotIn('BAR', [n for (n, _) in p.order(self.key, tests)])
+
+    def test_save_load(self):
+        import os
+        import tempfile
+        p = portfolio.Portfolio()
+        for ts in self.tasksets:
+            p(2, ts)
+        fd, fname = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        try:
+            p.save_stats(fname)
+            q = portfolio.Portfolio()
+            q.load_stats(fname)
+        finally:
+            os.remove(fname)
+        self.assertEqual([r[:-1] for r in q.export_stats()],
+                         [r[:-1] for r in p.export_stats()])
+        for (a, b) in zip(q.export_stats(), p.export_stats()):
+            self.assertAlmostEqual(a[-1], b[-1])
@@ -37,6 +37,12 @@ class UniprocessorRTA(unittest.TestCase):
         self.assertEqual(self.ts[2].response_time,  7)
         self.assertEqual(self.ts[3].response_time, 18)
 
+    def test_compact_tasks(self):
+        ts = self.ts.compact()
+        self.assertTrue(rta.is_schedulable(1, ts))
+        self.assertEqual([t.response_time for t in ts], [1, 2, 7, 18])
+        self.assertEqual([t.blocked for t in ts], [0, 0, 0, 0])
+
 
 # TODO: add tests with blocking and self-suspensions
 
@@ -1,9 +1,19 @@
 import unittest
 
-from schedcat.util.time import ms2us
+from schedcat.util.time import ms2us, ms2us_ru
 
 import schedcat.generator.tasks as tg
 import schedcat.generator.tasksets as tsgen
+import schedcat.generator.streams as streams
+import schedcat.model.tasks as tasks
+
+try:
+    import numpy
+    import schedcat.model.columnar as columnar
+    import schedcat.generator.generator_emstada as emstada
+    numpy_available = True
+except ImportError:
+    numpy_available = False
 
 class TaskGen(unittest.TestCase):
 
@@ -72,6 +82,166 @@ class TaskGen(unittest.TestCase):
         # Not strictly impossible, but very unlikely
         self.assertNotEqual(ts2.utilization(), 10)
 
+@unittest.skipIf(not numpy_available, "NumPy not available")
+class BatchTaskGen(unittest.TestCase):
+    def setUp(self):
+        self.rng = numpy.random.RandomState(123)
+
+    def test_drawing_functions(self):
+        for (f, lo, hi) in [(tg.uniform_int(10, 100), 10, 100),
+                            (tg.uniform(10, 100), 10, 100),
+                            (tg.log_uniform(10, 100), 10, 100),
+                            (tg.log_uniform_int(10, 100), 10, 100),
+                            (tg.exponential(0.1, 0.7, 0.4), 0.1, 0.7),
+                            (tg.exponential(0.1, 0.7, 0.4, tg.truncate),
+                             0.1, 0.7),
+                            (tsgen.NAMED_UTILIZATIONS['bimo-heavy'],
+                             0.001, 0.9),
+                            (tg.uniform_choice([3, 5, 7]), 3, 7),
+                           ]:
+            vals = tg.draw_batch(f, 1000, self.rng)
+            self.assertEqual(vals.shape, (1000,))
+            self.assertTrue((lo <= vals).all())
+            self.assertTrue((vals <= hi).all())
+        vals = tg.draw_batch(tg.uniform_int(10, 100), 1000, self.rng)
+        self.assertEqual(vals.dtype.kind, 'i')
+
+    def test_fallback(self):
+        vals = tg.draw_batch(lambda: 42, 10, self.rng)
+        self.assertEqual(vals.tolist(), [42] * 10)
+
+    def test_max_tasks(self):
+        g = tg.TaskGenerator(tg.uniform_int(10, 100),
+                             tg.exponential(0.1, 0.9, 0.3))
+        sets = g.make_task_sets(20, max_tasks=10, rng=self.rng)
+        self.assertEqual(len(sets), 20)
+        for ts in sets:
+            self.assertIsInstance(ts, tasks.TaskSystem)
+            self.assertEqual(len(ts), 10)
+            self.assertTrue(ts.only_implicit_deadlines())
+            for t in ts:
+                self.assertTrue(10 <= t.period <= 100)
+                self.assertTrue(1 <= t.cost <= t.period)
+
+    def test_max_util(self):
+        g = tg.TaskGenerator(tg.uniform_int(10, 100),
+                             tg.exponential(0.1, 0.9, 0.3))
+        for ts in g.make_task_sets(20, max_util=10, squeeze=True,
+                                   time_conversion=ms2us, rng=self.rng):
+            self.assertAlmostEqual(ts.utilization(), 10, places=2)
+        for ts in g.make_task_sets(20, max_util=10, squeeze=False,
+                                   time_conversion=ms2us, rng=self.rng):
+            self.assertLessEqual(ts.utilization(), 10)
+            self.assertGreater(ts.utilization(), 9.1)
+        for ts in g.make_task_sets(20, max_util=10, max_tasks=5,
+                                   rng=self.rng):
+            self.assertLessEqual(len(ts), 5)
+        for ts in g.make_task_sets(3, max_util=10, max_tasks=0,
+                                   rng=self.rng):
+            self.assertEqual(len(ts), 0)
+
+    def test_columnar(self):
+        g = tg.TaskGenerator(tsgen.NAMED_PERIODS['uni-moderate'],
+                             tsgen.NAMED_UTILIZATIONS['uni-medium'],
+                             tsgen.NAMED_DEADLINES['uni-constrained'])
+        sets = g.make_task_sets(10, max_util=4, time_conversion=ms2us_ru,
+                                as_columnar=True, rng=self.rng)
+        for ts in sets:
+            self.assertIsInstance(ts, columnar.ColumnarTaskSystem)
+            self.assertLessEqual(ts.utilization(), 4)
+            self.assertTrue(ts.only_constrained_deadlines())
+            self.assertTrue((ts.cost <= ts.deadline).all())
+
+    def test_reproducible(self):
+        g = tg.TaskGenerator(tg.log_uniform_int(10, 100),
+                             tg.uniform(0.1, 0.4))
+        a = g.make_task_sets(5, max_util=2, rng=numpy.random.RandomState(1))
+        b = g.make_task_sets(5, max_util=2, rng=numpy.random.RandomState(1))
+        self.assertEqual([repr(ts) for ts in a], [repr(ts) for ts in b])
+
+@unittest.skipIf(not numpy_available, "NumPy not available")
+class Emstada(unittest.TestCase):
+    def test_randfixedsum(self):
+        x = emstada.StaffordRandFixedSum(8, 2.5, 1000)
+        self.assertEqual(x.shape, (1000, 8))
+        self.assertTrue(numpy.allclose(x.sum(axis=1), 2.5))
+        self.assertTrue((x >= 0).all())
+        self.assertTrue((x <= 1).all())
+        # rows are permuted, so all positions are alike
+        self.assertTrue(numpy.allclose(x.mean(axis=0), 2.5 / 8, atol=0.05))
+
+    def test_table_cache(self):
+        t = emstada.transition_table(10, 3.2)
+        self.assertIs(emstada.transition_table(10, 3.2), t)
+        self.assertIsNot(emstada.transition_table(10, 3.3), t)
+
+    def test_batch(self):
+        sets = emstada.gen_tasksets_batch(50, 'uni-moderate', 'logunif',
+                                          10, 4)
+        self.assertEqual(len(sets), 50)
+        for ts in sets:
+            self.assertIsInstance(ts, tasks.TaskSystem)
+            self.assertEqual(len(ts), 10)
+            self.assertAlmostEqual(ts.utilization(), 4, places=1)
+            for t in ts:
+                self.assertTrue(ms2us(10) <= t.period <= ms2us(100))
+                self.assertIsInstance(t.cost, int)
+
+    def test_batch_columnar(self):
+        sets = emstada.gen_tasksets_batch(20, (1, 1000), 'unif', 5, 2,
+                                          period_granularity=10,
+                                          as_columnar=True)
+        for ts in sets:
+            self.assertIsInstance(ts, columnar.ColumnarTaskSystem)
+            self.assertEqual(len(ts), 5)
+            self.assertTrue((ts.period % ms2us(10) == 0).all())
+            self.assertAlmostEqual(ts.utilization(), 2, places=1)
+
+class Streams(unittest.TestCase):
+    def test_independent(self):
+        a = [streams.py_stream(42, 0).random() for _ in range(3)]
+        b = [streams.py_stream(42, 0).random() for _ in range(3)]
+        c = [streams.py_stream(42, 1).random() for _ in range(3)]
+        d = [streams.py_stream(43, 0).random() for _ in range(3)]
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+        self.assertNotEqual(a, d)
+        self.assertEqual(len(set(streams.stream_key(1, i) for i in range(100))),
+                         100)
+
+    def test_reproducible_task_sets(self):
+        for name in sorted(tsgen.ALL_DISTS):
+            g = tsgen.ALL_DISTS[name]
+            sets = [[repr(g(max_util=2, time_conversion=ms2us, rng=rng))
+                     for rng in streams.py_streams(7, 3)]
+                    for _ in range(2)]
+            self.assertEqual(sets[0], sets[1])
+            # worker order does not matter
+            self.assertEqual(repr(g(max_util=2, time_conversion=ms2us,
+                                    rng=streams.py_stream(7, 2))),
+                             sets[0][2])
+
+    def test_default_distributions(self):
+        # without rng, distributions keep using the global random module
+        f = tg.exponential(0.1, 0.7, 0.4)
+        self.assertTrue(0.1 <= f() <= 0.7)
+        g = tg.TaskGenerator(lambda: 10, lambda: 0.5, lambda c, p: p)
+        self.assertEqual(repr(g.make_task_set(max_tasks=2)),
+                         "TaskSystem([SporadicTask(5, 10), SporadicTask(5, 10)])")
+
+    @unittest.skipIf(not numpy_available, "NumPy not available")
+    def test_numpy_streams(self):
+        a = [emstada.gen_taskset('uni-moderate', 'logunif', 5, 2, rng=rng)
+             for rng in streams.numpy_streams(7, 2)]
+        b = [emstada.gen_taskset('uni-moderate', 'logunif', 5, 2, rng=rng)
+             for rng in streams.numpy_streams(7, 2)]
+        self.assertEqual([repr(ts) for ts in a], [repr(ts) for ts in b])
+        self.assertNotEqual(repr(a[0]), repr(a[1]))
+        g = tg.TaskGenerator(tg.uniform_int(10, 100), tg.uniform(0.1, 0.3))
+        a = g.make_task_sets(3, max_util=2, rng=streams.numpy_stream(1, 4))
+        b = g.make_task_sets(3, max_util=2, rng=streams.numpy_stream(1, 4))
+        self.assertEqual([repr(ts) for ts in a], [repr(ts) for ts in b])
+
 class TaskSetGen(unittest.TestCase):
 
     def test_feasible_tasks(self):
@@ -79,3 +249,84 @@ class TaskSetGen(unittest.TestCase):
             g = tsgen.ALL_DISTS[name]
             ts = g(time_conversion=ms2us, max_tasks=4)
             self.assertLessEqual(ts.utilization(), 4)
+
+    def test_lazy_registry(self):
+        name = 'uni-light:log-uni-long:uni-arbitrary'
+        self.assertIn(name, tsgen.ALL_DISTS)
+        self.assertEqual(len(tsgen.ALL_DISTS), 3 * 6 * 9)
+        self.assertIs(tsgen.ALL_DISTS[name],
+                      tsgen.DIST_BY_KEY['uni-arbitrary']['log-uni-long']['uni-light'])
+        self.assertIs(tsgen.ALL_DISTS[name], tsgen.ALL_DISTS[name])
+        self.assertNotIn('uni-light:log-uni-long', tsgen.ALL_DISTS)
+        self.assertRaises(KeyError, lambda: tsgen.DIST_BY_KEY['foo'])
+
+    def test_key_set_cached(self):
+        calls = []
+        def keys():
+            calls.append(1)
+            return ['a', 'b']
+        lm = tsgen.LazyMapping(keys, lambda k: k * 2)
+        self.assertIn('a', lm)
+        self.assertNotIn('c', lm)
+        self.assertEqual(lm['b'], 'bb')
+        self.assertRaises(KeyError, lambda: lm['c'])
+        self.assertEqual(len(lm), 2)
+        self.assertEqual(len(calls), 1)
+        lm['c'] = 'x'
+        del lm['a']
+        self.assertEqual(sorted(lm), ['b', 'c'])
+        lm.forget('a')
+        self.assertEqual(sorted(lm), ['a', 'b', 'c'])
+        self.assertEqual(len(calls), 4)
+
+    def test_mutable_registry(self):
+        name = 'uni-light:uni-short:implicit'
+        g = lambda *args, **kargs: None
+        try:
+            tsgen.ALL_DISTS['my-dist'] = g
+            self.assertIs(tsgen.ALL_DISTS['my-dist'], g)
+            self.assertIn('my-dist', list(tsgen.ALL_DISTS))
+            self.assertEqual(len(tsgen.ALL_DISTS), 3 * 6 * 9 + 1)
+            tsgen.ALL_DISTS[name] = g
+            self.assertIs(tsgen.ALL_DISTS[name], g)
+            del tsgen.ALL_DISTS[name]
+            self.assertNotIn(name, tsgen.ALL_DISTS)
+            self.assertRaises(KeyError, lambda: tsgen.ALL_DISTS[name])
+            self.assertEqual(len(tsgen.ALL_DISTS), 3 * 6 * 9)
+            tsgen.DIST_BY_KEY['implicit']['uni-short']['my-util'] = g
+            self.assertIs(tsgen.DIST_BY_KEY['implicit']['uni-short']['my-util'],
+                          g)
+        finally:
+            tsgen.ALL_DISTS.forget('my-dist')
+            tsgen.ALL_DISTS.forget(name)
+            tsgen.DIST_BY_KEY['implicit']['uni-short'].forget('my-util')
+        self.assertNotIn('my-dist', tsgen.ALL_DISTS)
+        self.assertIsNot(tsgen.ALL_DISTS[name], g)
+
+    def test_decode_params(self):
+        for spec in ['uni-0.1-0.4-10-100', 'exp-0-1-0.25-3-33',
+                     'bimo-8-1-50-250']:
+            utils, periods = tsgen.decode_params(spec)
+            self.assertTrue(0 <= utils() <= 1)
+        self.assertTrue(10 <= tsgen.decode_params('uni-0.1-0.4-10-100')[1]() <= 100)
+        for spec in ['uni-0.1-0.4-10', 'foo-1-2-3-4', 'uni-light', 'uni-a-b-1-2']:
+            self.assertIsNone(tsgen.decode_params(spec))
+
+    def test_register(self):
+        tsgen.register_distribution('test-dist', 'uni-0.1-0.2-10-20',
+                                    'uni-constrained')
+        try:
+            self.assertIn('test-dist', tsgen.ALL_DISTS)
+            ts = tsgen.ALL_DISTS['test-dist'](max_tasks=5, time_conversion=ms2us)
+            self.assertEqual(len(ts), 5)
+            self.assertTrue(ts.only_constrained_deadlines())
+            for t in ts:
+                self.assertTrue(ms2us(10) <= t.period <= ms2us(20))
+                self.assertTrue(0.09 <= t.utilization() <= 0.21)
+        finally:
+            del tsgen.REGISTERED_DISTS['test-dist']
+            tsgen.ALL_DISTS.forget('test-dist')
+        self.assertNotIn('test-dist', tsgen.ALL_DISTS)
+        self.assertRaises(ValueError, tsgen.register_distribution, 'x', 'foo')
+        self.assertRaises(ValueError, tsgen.register_distribution, 'x',
+                          'uni-0.1-0.2-10-20', 'foo')
@@ -3,9 +3,13 @@ from __future__ import division
 import unittest
 import random
 
+from array import array
+from fractions import Fraction
+
 import schedcat.locking.bounds as lb
 import schedcat.locking.native as cpp
 import schedcat.locking.partition as lp
+import schedcat.locking.fixpoint as fix
 import schedcat.model.tasks as tasks
 import schedcat.model.resources as r
 
@@ -50,6 +54,69 @@ class Locking(unittest.TestCase):
         self.assertIsNotNone(lb.get_cpp_model(self.ts))
         self.assertIsNotNone(lb.get_cpp_model_rw(self.ts))
 
+    def test_cpp_bridge_bulk(self):
+        # the bulk model must match one built request by request
+        lb.assign_fp_preemption_levels(self.ts)
+        self.ts[0].resmodel[2].add_read_request(2)
+        self.ts[2].resmodel[2].add_write_request(1)
+        self.ts[3].resmodel[3].add_read_request(4)
+        for (i, t) in enumerate(self.ts):
+            t.partition = i % 2
+
+        rsi = cpp.ResourceSharingInfo(len(self.ts))
+        rw  = cpp.ResourceSharingInfo(len(self.ts))
+        for t in self.ts:
+            rsi.add_task(t.period, t.response_time, t.partition,
+                         t.preemption_level, t.cost, t.deadline)
+            rw.add_task(t.period, t.response_time, t.partition,
+                        t.preemption_level, t.cost, t.deadline)
+            for req in t.resmodel.values():
+                if req.max_requests > 0:
+                    rsi.add_request(req.res_id, req.max_requests,
+                                    req.max_length)
+                if req.max_writes > 0:
+                    rw.add_request_rw(req.res_id, req.max_writes,
+                                      req.max_write_length, cpp.WRITE)
+                if req.max_reads > 0:
+                    rw.add_request_rw(req.res_id, req.max_reads,
+                                      req.max_read_length, cpp.READ)
+
+        expected = cpp.task_fair_rw_bounds(rw, rsi, 2)
+        res = cpp.task_fair_rw_bounds(lb.get_cpp_model_rw(self.ts),
+                                      lb.get_cpp_model(self.ts), 2)
+        for i in xrange(len(self.ts)):
+            self.assertEqual(res.get_blocking_term(i),
+                             expected.get_blocking_term(i))
+            self.assertEqual(res.get_remote_blocking(i),
+                             expected.get_remote_blocking(i))
+        self.assertGreater(expected.get_blocking_term(0), 0)
+
+    def test_cpp_bounds_in_threads(self):
+        from multiprocessing.pool import ThreadPool
+        lb.assign_fp_preemption_levels(self.ts)
+        model = lb.get_cpp_model(self.ts)
+        bound = lambda _: cpp.part_fmlp_bounds(model, True).get_blocking_term(0)
+        pool = ThreadPool(4)
+        try:
+            self.assertEqual(pool.map(bound, range(8)), [bound(0)] * 8)
+        finally:
+            pool.close()
+
+    def test_cpp_bulk_errors(self):
+        rsi = cpp.ResourceSharingInfo(1)
+        a = lambda *xs: array('L', xs)
+        # length mismatch
+        self.assertFalse(rsi.add_tasks(a(10), a(), a(), a(), a(), a()))
+        # too many tasks
+        self.assertFalse(rsi.add_tasks(a(10, 10), a(10, 10),
+                                       a(), a(), a(), a()))
+        self.assertTrue(rsi.add_tasks(a(10), a(10), a(), a(), a(), a()))
+        # unknown task
+        self.assertFalse(rsi.add_requests(a(1), a(0), a(1), a(1)))
+        self.assertTrue(rsi.add_requests(a(0), a(0), a(1), a(1)))
+        # not a buffer
+        self.assertRaises(TypeError, rsi.add_requests, [0], [0], [1], [1])
+
 
 class ApplyBounds(unittest.TestCase):
 # This primarily checks that the tests don't crash.
@@ -239,6 +306,34 @@ class ApplyBounds(unittest.TestCase):
         lb.apply_dummy_bounds(self.ts)
         self.lp_zero_blocking()
 
+    @unittest.skipIf(not schedcat.locking.bounds.lp_cpp_available, "no native LP solver available")
+    def test_dummy_bounds_compact(self):
+        self.ts = self.ts.compact()
+        lb.apply_dummy_bounds(self.ts)
+        self.lp_zero_blocking()
+        for t in self.ts:
+            self.assertEqual(t.remote_blocking, 0)
+
+    def test_msrp_bounds(self):
+        self.ts[3].partition = None
+        lb.apply_msrp_bounds(self.ts, 2)
+        self.assertEqual(self.ts[3].partition, 3)
+        for t in self.ts:
+            self.assertTrue(tasks.has_parameter(t, 'remote_blocking'))
+
+    def test_msrp_bounds_compact(self):
+        expected = self.ts.copy()
+        expected[3].partition = None
+        lb.apply_msrp_bounds(expected, 2)
+        self.ts = self.ts.compact()
+        # an unset partition is UNSET, not None
+        self.ts[3].partition = tasks.UNSET
+        lb.apply_msrp_bounds(self.ts, 2)
+        self.assertEqual(self.ts[3].partition, 3)
+        for (t, x) in zip(self.ts, expected):
+            self.assertEqual((t.cost, t.blocked, t.remote_blocking),
+                             (x.cost, x.blocked, x.remote_blocking))
+
 
 # lower-level tests for C++ implementation
 
@@ -868,3 +963,138 @@ class Test_reasonble_priority(unittest.TestCase):
     def test_skip_top_m_tasks(self):
         self.ts[2].deadline = 150
         self.assertTrue(lb.is_reasonable_priority_assignment(2, self.ts))
+
+
+class Fixpoint(unittest.TestCase):
+    def setUp(self):
+        self.clusts = [tasks.TaskSystem([tasks.SporadicTask(10, 100),
+                                         tasks.SporadicTask(20, 200)]),
+                       tasks.TaskSystem([tasks.SporadicTask(30, 300)])]
+        for c in self.clusts:
+            c.cpus = 1
+            for t in c:
+                t.response_time = t.cost
+        self.analyzed = 0
+
+    def blocking(self, all_tasks):
+        # each task is blocked by 1/10 of the response times of the others
+        total = sum([t.response_time for t in all_tasks])
+        for t in all_tasks:
+            t.blocked = (total - t.response_time) // 10
+
+    def local_blocking(self, all_tasks):
+        # blocking only depends on response times in the same cluster
+        for t in all_tasks:
+            t.blocked = t.response_time // 10 if t.period == 300 else 0
+
+    def charge(self, clust):
+        for t in clust:
+            t.cost += t.blocked
+        return True
+
+    def bound(self, clust):
+        self.analyzed += 1
+        for t in clust:
+            t.response_time = t.cost
+            if t.response_time > t.deadline:
+                return False
+        return True
+
+    def test_converge(self):
+        f = fix.ResponseTimeFixpoint(self.clusts, self.blocking, self.charge,
+                                     self.bound)
+        result = f.run()
+        self.assertEqual(f.status, fix.CONVERGED)
+        self.assertEqual([t.response_time for c in result for t in c],
+                         [15, 24, 33])
+        self.assertEqual([t.cost for c in self.clusts for t in c],
+                         [10, 20, 30])
+        self.assertEqual(result[0].cpus, 1)
+        self.assertEqual(len(f.rounds), 2)
+        self.assertEqual([r.changed for r in f.rounds], [3, 0])
+        self.assertTrue(f.total_time() >= 0)
+
+    def test_no_feedback(self):
+        f = fix.ResponseTimeFixpoint(self.clusts, self.blocking, self.charge,
+                                     self.bound, feedback=False)
+        self.assertFalse(f.run())
+        self.assertEqual(f.status, fix.DIVERGED)
+        self.assertEqual(len(f.rounds), 1)
+
+    def test_reuse(self):
+        f = fix.ResponseTimeFixpoint(self.clusts, self.local_blocking,
+                                     self.charge, self.bound)
+        self.assertTrue(f.run())
+        # the inputs of the second round are the same as those of the first
+        self.assertEqual([r.recomputed for r in f.rounds], [2, 0])
+        self.assertEqual(self.analyzed, 2)
+
+    def test_reuse_compact(self):
+        self.clusts = [c.compact() for c in self.clusts]
+        for c in self.clusts:
+            c.cpus = 1
+        f = fix.ResponseTimeFixpoint(self.clusts, self.local_blocking,
+                                     self.charge, self.bound)
+        self.assertTrue(f.run())
+        self.assertEqual([r.recomputed for r in f.rounds], [2, 0])
+
+    def test_fractional_blocking(self):
+        terms = [Fraction(1, 3), Fraction(50)]
+        def blocking(all_tasks):
+            b = terms.pop(0) if len(terms) > 1 else terms[0]
+            for t in all_tasks:
+                t.blocked = b
+        f = fix.ResponseTimeFixpoint(self.clusts, blocking, self.charge,
+                                     self.bound)
+        result = f.run()
+        self.assertEqual(f.status, fix.CONVERGED)
+        # the change of the blocking terms must not go unnoticed
+        self.assertEqual([r.recomputed for r in f.rounds], [2, 2, 0])
+        self.assertEqual([t.response_time for c in result for t in c],
+                         [60, 70, 80])
+
+    def test_reuse_resmodel(self):
+        for c in self.clusts:
+            r.initialize_resource_model(c)
+            for t in c:
+                t.resmodel[0].add_request(1)
+                t.resmodel[1].add_read_request(2)
+        f = fix.ResponseTimeFixpoint(self.clusts, self.local_blocking,
+                                     self.charge, self.bound)
+        self.assertTrue(f.run())
+        self.assertEqual([rnd.recomputed for rnd in f.rounds], [2, 0])
+
+        before = fix.derived_inputs(self.clusts[0])
+        self.assertIsNot(before, None)
+        self.clusts[0][1].resmodel[1].add_read_request(3)
+        self.assertNotEqual(fix.derived_inputs(self.clusts[0]), before)
+
+    def test_non_numeric_inputs(self):
+        for c in self.clusts:
+            for t in c:
+                t.affinity = set([0])
+        f = fix.ResponseTimeFixpoint(self.clusts, self.local_blocking,
+                                     self.charge, self.bound)
+        self.assertTrue(f.run())
+        self.assertEqual([r.recomputed for r in f.rounds], [2, 2])
+        for inputs in [['cost', 'blocked'], lambda t: (t.cost, t.blocked)]:
+            f = fix.ResponseTimeFixpoint(self.clusts, self.local_blocking,
+                                         self.charge, self.bound,
+                                         inputs=inputs)
+            self.assertTrue(f.run())
+            self.assertEqual([r.recomputed for r in f.rounds], [2, 0])
+
+    def test_infeasible(self):
+        self.clusts[1][0].cost = 298
+        self.clusts[1][0].response_time = 298
+        f = fix.ResponseTimeFixpoint(self.clusts, self.blocking, self.charge,
+                                     self.bound)
+        self.assertFalse(f.run())
+        self.assertEqual(f.status, fix.INFEASIBLE)
+
+    def test_exhausted(self):
+        f = fix.ResponseTimeFixpoint(self.clusts, self.blocking, self.charge,
+                                     self.bound, max_rounds=1)
+        self.assertFalse(f.run())
+        self.assertEqual(f.status, fix.EXHAUSTED)
+        self.assertEqual(len(f.rounds), 1)
@@ -1,12 +1,23 @@
 from __future__ import division
 
 import unittest
+import os
+import copy
+import pickle
+import tempfile
 from StringIO import StringIO
 from fractions import Fraction
 
 import schedcat.model.tasks as m
 import schedcat.model.serialize as s
 import schedcat.model.resources as r
+import schedcat.model.archive as a
+
+try:
+    import schedcat.model.columnar as col
+    numpy_available = True
+except ImportError:
+    numpy_available = False
 
 class Tasks(unittest.TestCase):
     def setUp(self):
@@ -65,6 +76,149 @@ class Tasks(unittest.TestCase):
         t.response_time = 6
         self.assertEqual(t.tardiness(), 4)
 
+class CompactTasks(unittest.TestCase):
+    def setUp(self):
+        self.t1 = m.CompactSporadicTask(10, 100)
+        self.t2 = m.CompactSporadicTask(5, 19, 15, id=3)
+
+    def test_no_dict(self):
+        self.assertFalse(hasattr(self.t1, '__dict__'))
+        self.assertRaises(AttributeError, setattr, self.t1, 'foo', 1)
+
+    def test_optional_parameters(self):
+        self.assertIs(self.t1.response_time, m.UNSET)
+        self.assertFalse(m.has_parameter(self.t1, 'response_time'))
+        self.assertEqual(m.get_parameter(self.t1, 'blocked', 0), 0)
+        self.t1.blocked = 7
+        self.assertTrue(m.has_parameter(self.t1, 'blocked'))
+        self.assertEqual(m.get_parameter(self.t1, 'blocked', 0), 7)
+
+        t = m.SporadicTask(10, 100)
+        self.assertFalse(m.has_parameter(t, 'blocked'))
+        t.blocked = 3
+        self.assertEqual(m.get_parameter(t, 'blocked'), 3)
+
+    def test_methods(self):
+        self.assertEqual(self.t2.density_q(), Fraction(1, 3))
+        self.assertTrue(self.t1.implicit_deadline())
+        self.assertEqual(repr(self.t2),
+                         "CompactSporadicTask(5, 19, deadline=15, id=3)")
+
+    def test_from_task(self):
+        t = m.SporadicTask(5, 19, 15, id=3)
+        t.wss = 256
+        t.foo = 'ignored'
+        c = m.CompactSporadicTask.from_task(t)
+        self.assertEqual((c.cost, c.period, c.deadline, c.id), (5, 19, 15, 3))
+        self.assertEqual(c.wss, 256)
+        self.assertIs(c.jitter, m.UNSET)
+
+        ts = m.TaskSystem([t]).compact()
+        self.assertIsInstance(ts[0], m.CompactSporadicTask)
+        self.assertEqual(list(ts.without(ts[0])), [])
+
+    def test_pickle_and_copy(self):
+        self.t2.response_time = 12
+        for proto in [0, 2]:
+            x = pickle.loads(pickle.dumps(self.t2, proto))
+            self.assertEqual((x.cost, x.deadline, x.response_time), (5, 15, 12))
+            self.assertIs(x.jitter, m.UNSET)
+        x = copy.deepcopy(self.t2)
+        self.assertIs(x.blocked, m.UNSET)
+        self.assertEqual(x.response_time, 12)
+
+class CachedAggregates(unittest.TestCase):
+    def setUp(self):
+        self.ts = m.TaskSystem([
+                m.SporadicTask(10, 100),
+                m.SporadicTask(5, 20, 15),
+            ])
+
+    def test_reuse(self):
+        u = self.ts.utilization_q()
+        self.assertIs(self.ts.utilization_q(), u)
+        self.assertEqual(self.ts.utilization(heaviest=1), 0.25)
+        self.assertEqual(self.ts.utilization(), 0.35)
+
+    def test_parameter_change(self):
+        self.assertEqual(self.ts.utilization_q(), Fraction(7, 20))
+        self.assertEqual(self.ts.hyperperiod(), 100)
+        self.ts[0].cost += 10
+        self.assertEqual(self.ts.utilization_q(), Fraction(9, 20))
+        self.ts[1].period = 30
+        self.assertEqual(self.ts.hyperperiod(), 300)
+        self.assertEqual(self.ts.hyperperiod(limit=300), 300)
+        self.assertIsNone(self.ts.hyperperiod(limit=299))
+        self.assertTrue(self.ts.only_constrained_deadlines())
+        self.ts[1].deadline = 40
+        self.assertFalse(self.ts.only_constrained_deadlines())
+
+    def test_compact_parameter_change(self):
+        ts = self.ts.compact()
+        self.assertEqual(ts.max_cost(), 10)
+        ts[1].cost = 11
+        self.assertEqual(ts.max_cost(), 11)
+
+    def test_unrelated_changes(self):
+        other = m.TaskSystem([m.SporadicTask(1, 10)])
+        other[0].cost = 2
+        u = self.ts.utilization_q()
+        self.assertEqual(self.ts.max_cost(), 10)
+        # untracked parameters and other task systems do not matter
+        self.ts[0].response_time = 50
+        other[0].cost = 3
+        other.append(m.SporadicTask(1, 10))
+        self.assertIs(self.ts.utilization_q(), u)
+        # assigning an equal value of another type does
+        self.ts[0].cost = 10.0
+        self.assertIsInstance(self.ts.max_cost(), float)
+
+    def test_untracked_operations(self):
+        version = m._parameter_version
+        t = m.SporadicTask(1, 10)
+        c = m.CompactSporadicTask(1, 10)
+        t.response_time = c.response_time = 5
+        self.assertEqual(m._parameter_version, version)
+        self.assertEqual(sorted(t.__dict__.keys()),
+                         ['cost', 'deadline', 'id', 'period', 'response_time'])
+        t.period = 20
+        self.assertNotEqual(m._parameter_version, version)
+
+    def test_membership_change(self):
+        self.assertEqual(self.ts.max_period(), 100)
+        self.ts.append(m.SporadicTask(1, 200))
+        self.assertEqual(self.ts.max_period(), 200)
+        del self.ts[2]
+        self.assertEqual(self.ts.max_period(), 100)
+        self.ts[0] = m.SporadicTask(1, 10)
+        self.assertEqual(self.ts.max_period(), 20)
+        self.ts += [m.SporadicTask(1, 50)]
+        self.assertEqual(self.ts.max_period(), 50)
+        self.ts.pop()
+        self.assertEqual(self.ts.max_period(), 20)
+
+    def test_pickle(self):
+        self.ts.utilization()
+        x = pickle.loads(pickle.dumps(self.ts, 2))
+        self.assertNotIn('_aggregates', x.__dict__)
+        self.assertEqual(x.utilization(), 0.35)
+
+    def test_priority_index(self):
+        self.ts.append(m.SporadicTask(1, 50))
+        self.ts.assign_ids()
+        t1, t2, t3 = self.ts
+        self.assertEqual(list(self.ts.with_higher_priority_than(t3)), [t1, t2])
+        self.assertEqual(list(self.ts.with_lower_priority_than(t1)), [t2, t3])
+        self.assertEqual(list(self.ts.with_higher_priority_than(t1)), [])
+        self.ts.assign_ids_by_period()
+        self.assertEqual(list(self.ts.with_higher_priority_than(t1)), [t2, t3])
+        # in task system order, not in order of priority
+        self.assertEqual(list(self.ts.with_lower_priority_than(t2)), [t1, t3])
+        t1.id = 0
+        self.assertEqual(list(self.ts.with_lower_priority_than(t1)), [t2, t3])
+        self.ts.remove(t2)
+        self.assertEqual(list(self.ts.with_lower_priority_than(t1)), [t3])
+
 # TODO: Write tests for TaskSystem
 
 class Tasks(unittest.TestCase):
@@ -96,6 +250,121 @@ class Tasks(unittest.TestCase):
         self.assertEqual(ts2[0].resmodel[0].max_length, 10)
         self.assertEqual(ts2[0].resmodel[0].max_requests, 1)
 
+    def test_copy_parameters(self):
+        t = m.SporadicTask(10, 100, 50, id=3)
+        t.response_time = 40
+        t.xml = object()
+        ts2 = m.TaskSystem([t]).copy()
+        t2 = ts2[0]
+        self.assertIsNot(t2, t)
+        self.assertIsInstance(t2, m.SporadicTask)
+        self.assertEqual((t2.cost, t2.period, t2.deadline, t2.id),
+                         (10, 100, 50, 3))
+        self.assertEqual(t2.response_time, 40)
+        self.assertFalse(hasattr(t2, 'xml'))
+        t2.cost = 20
+        self.assertEqual(t.cost, 10)
+        self.assertEqual(ts2.utilization(), 0.2)
+
+    def test_copy_compact(self):
+        ts = m.TaskSystem([m.SporadicTask(10, 100)])
+        r.initialize_resource_model(ts)
+        ts[0].resmodel[1].add_request(5)
+        cts = ts.compact()
+        cts2 = cts.copy()
+        self.assertIsInstance(cts2[0], m.CompactSporadicTask)
+        self.assertFalse(m.has_parameter(cts2[0], 'jitter'))
+        cts2[0].resmodel[1].add_request(7)
+        self.assertEqual(cts[0].resmodel[1].max_length, 5)
+        self.assertEqual(cts2[0].resmodel[1].max_length, 7)
+
+    def test_copy_compact_without_resmodel(self):
+        t = m.CompactSporadicTask(1, 10).copy()
+        self.assertFalse(m.has_parameter(t, 'resmodel'))
+        self.assertEqual(t.cost, 1)
+        cts = m.TaskSystem([m.SporadicTask(1, 10)]).compact().copy()
+        self.assertFalse(m.has_parameter(cts[0], 'resmodel'))
+        self.assertEqual(cts[0].period, 10)
+
+
+@unittest.skipIf(not numpy_available, "NumPy not available")
+class ColumnarTasks(unittest.TestCase):
+    def setUp(self):
+        self.ts = m.TaskSystem([
+                m.SporadicTask(10, 100),
+                m.SporadicTask(5, 19, 15, id=3),
+                m.SporadicTask(25, 50, id=5, deadline=75),
+            ])
+        for i, t in enumerate(self.ts):
+            t.wss = 128 * (i + 1)
+        self.cts = col.ColumnarTaskSystem.from_tasks(self.ts)
+
+    def test_columns(self):
+        self.assertEqual(len(self.cts), 3)
+        self.assertEqual(self.cts.columns(),
+                         ['cost', 'period', 'deadline', 'wss'])
+        self.assertIsNone(self.cts.id)
+        self.assertIsNone(self.cts.partition)
+
+    def test_aggregates(self):
+        self.assertAlmostEqual(self.cts.utilization(), self.ts.utilization())
+        self.assertAlmostEqual(self.cts.utilization(heaviest=2),
+                               self.ts.utilization(heaviest=2))
+        self.assertEqual(self.cts.utilization_q(), self.ts.utilization_q())
+        self.assertEqual(self.cts.utilization_q(heaviest=1),
+                         self.ts.utilization_q(heaviest=1))
+        self.assertAlmostEqual(self.cts.density(), self.ts.density())
+        self.assertEqual(self.cts.density_q(), self.ts.density_q())
+        self.assertEqual(self.cts.max_density_q(), self.ts.max_density_q())
+        self.assertAlmostEqual(self.cts.max_density(), self.ts.max_density())
+        self.assertEqual(self.cts.hyperperiod(), self.ts.hyperperiod())
+        self.assertEqual(self.cts.max_cost(), 25)
+        self.assertEqual(self.cts.max_period(), 100)
+        self.assertEqual(self.cts.min_deadline(), 15)
+        self.assertEqual(self.cts.max_wss(), 384)
+        self.assertFalse(self.cts.only_implicit_deadlines())
+        self.assertFalse(self.cts.only_constrained_deadlines())
+        self.assertTrue(self.cts[:2].only_constrained_deadlines())
+
+    def test_round_trip(self):
+        ts = self.cts.to_task_system()
+        self.assertIsInstance(ts, m.TaskSystem)
+        for x, t in zip(ts, self.ts):
+            self.assertEqual(x.cost, t.cost)
+            self.assertEqual(x.period, t.period)
+            self.assertEqual(x.deadline, t.deadline)
+            self.assertEqual(x.wss, t.wss)
+            self.assertIsInstance(x.cost, int)
+        self.assertEqual(self.cts[1].deadline, 15)
+
+    def test_sort_and_ids(self):
+        self.cts.sort_by_period()
+        self.assertEqual(self.cts.period.tolist(), [19, 50, 100])
+        self.assertEqual(self.cts.wss.tolist(), [256, 384, 128])
+        self.cts.assign_ids_by_deadline()
+        self.assertEqual(self.cts.id.tolist(), [1, 2, 3])
+        hp = self.cts.with_higher_priority_than(3)
+        self.assertEqual(hp.cost.tolist(), [5, 25])
+        lp = self.cts.with_lower_priority_than(1)
+        self.assertEqual(len(lp), 2)
+
+    def test_us_sorting(self):
+        for (name, m_cpus) in [('sort_by_RM_US', 4), ('sort_by_DM_US', 4),
+                               ('sort_by_RM_US', 2)]:
+            cts = self.cts.copy()
+            ts = self.ts.copy()
+            getattr(cts, name)(m_cpus)
+            getattr(ts, name)(m_cpus)
+            self.assertEqual(cts.period.tolist(), [t.period for t in ts])
+        self.cts.sort_by_RM_US(4)
+        self.assertEqual(self.cts.period.tolist(), [50, 19, 100])
+
+    def test_without(self):
+        self.assertEqual(self.cts.without(1).cost.tolist(), [10, 25])
+        self.assertEqual(self.cts.without([0, 2]).cost.tolist(), [5])
+        self.assertEqual(len(self.cts.without(self.cts.cost > 0)), 0)
+        self.assertEqual(len(self.cts), 3)
+
 
 class Serialization(unittest.TestCase):
     def setUp(self):
@@ -118,6 +387,16 @@ class Serialization(unittest.TestCase):
             self.f.seek(0)
             self.f.truncate()
 
+    def test_serialize_compact_task(self):
+        t = m.CompactSporadicTask(5, 19, 15, id=3)
+        t.wss = 4096
+        s.write_xml(s.task(t), self.f)
+        self.f.seek(0)
+        x = s.load(self.f)
+        self.assertEqual((x.cost, x.period, x.deadline, x.id, x.wss),
+                         (5, 19, 15, 3, 4096))
+        self.assertFalse(m.has_parameter(x, 'partition'))
+
     def test_serialize_taskset(self):
         s.write(self.ts, self.f)
         self.f.seek(0)
@@ -130,6 +409,16 @@ class Serialization(unittest.TestCase):
             self.assertEqual(x.period, t.period)
             self.assertEqual(x.id, t.id)
 
+    def test_serialize_hyperperiod(self):
+        for (limit, hp) in [(s.HYPERPERIOD_LIMIT, '1900'), (None, '1900'),
+                            (1900, '1900'), (1899, None), (0, None)]:
+            s.write(self.ts, self.f, hyperperiod_limit=limit)
+            self.f.seek(0)
+            xs = s.load(self.f)
+            self.assertEqual(xs.xml.find('properties').get('hyperperiod'), hp)
+            self.f.seek(0)
+            self.f.truncate()
+
     def test_serialize_resmodel(self):
         r.initialize_resource_model(self.ts)
         self.t1.resmodel[1].add_request(1)
@@ -153,3 +442,160 @@ class Serialization(unittest.TestCase):
                 self.assertEqual(x.resmodel[res_id].max_length, t.resmodel[res_id].max_length)
             self.f.seek(0)
             self.f.truncate()
+
+    def test_iter_testpoint(self):
+        r.initialize_resource_model(self.ts)
+        self.t2.resmodel[1].add_request(2)
+        other = m.TaskSystem([m.SporadicTask(1, 10, id=1)])
+        s.write_testpoint([self.ts, other], {'m' : 4, 'dist' : 'uni'}, self.f)
+        for lean in [True, False]:
+            self.f.seek(0)
+            xss = list(s.iter_tasksets(self.f, lean=lean))
+            self.assertEqual(len(xss), 2)
+            self.assertEqual([(x.cost, x.period, x.deadline, x.id)
+                              for x in xss[0]],
+                             [(t.cost, t.period, t.deadline, t.id)
+                              for t in self.ts])
+            self.assertEqual(xss[0][1].resmodel[1].max_writes, 1)
+            self.assertEqual(len(xss[1]), 1)
+            self.assertEqual(hasattr(xss[0][0], 'xml'), not lean)
+        self.f.seek(0)
+        self.assertEqual(s.load_config(self.f), {'m' : 4, 'dist' : 'uni'})
+
+    def test_testpoint_writer(self):
+        with s.TestpointWriter(self.f, {'m' : 2}, properties=False) as out:
+            out.add_taskset(self.ts)
+            out.add_taskset(self.ts)
+            self.assertEqual(out.count, 2)
+        self.f.seek(0)
+        tp = s.load(self.f)
+        self.assertEqual(tp.params, {'m' : 2})
+        self.assertEqual(len(tp.tasksets), 2)
+        for xs in tp.tasksets:
+            self.assertEqual([(x.cost, x.period, x.deadline, x.id)
+                              for x in xs],
+                             [(t.cost, t.period, t.deadline, t.id)
+                              for t in self.ts])
+        self.assertIsNone(tp.xml.find('taskset').find('properties'))
+
+        fd, fname = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            s.write_testpoint([self.ts], {}, fname)
+            tp = s.load(fname)
+            prop = tp.xml.find('taskset').find('properties')
+            self.assertEqual(prop.get('count'), '3')
+            self.assertEqual(prop.get('hyperperiod'), '1900')
+        finally:
+            os.remove(fname)
+
+    def test_iter_taskset(self):
+        s.write(self.ts, self.f)
+        self.f.seek(0)
+        xss = list(s.iter_tasksets(self.f))
+        self.assertEqual(len(xss), 1)
+        self.assertEqual(len(xss[0]), len(self.ts))
+        self.f.seek(0)
+        self.assertEqual(s.load_config(self.f), {})
+
+
+class Archives(unittest.TestCase):
+    def setUp(self):
+        self.t1 = m.SporadicTask(10, 100)
+        self.t2 = m.SporadicTask(5, 19, 15, id=3)
+        self.t3 = m.SporadicTask(25.5, 50, id=5, deadline=75)
+        self.t3.response_time = 60.25
+        self.t2.partition = 1
+        self.ts = m.TaskSystem([self.t1, self.t2, self.t3])
+        fd, self.fname = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.fname)
+
+    def assertSameTasks(self, xs, ts):
+        self.assertEqual(len(xs), len(ts))
+        for x, t in zip(xs, ts):
+            self.assertEqual((x.cost, x.period, x.deadline, x.id),
+                             (t.cost, t.period, t.deadline, t.id))
+            self.assertEqual(type(x.cost), type(t.cost))
+            for name in ['response_time', 'partition']:
+                self.assertEqual(m.get_parameter(x, name),
+                                 m.get_parameter(t, name))
+
+    def test_roundtrip(self):
+        a.write([self.ts, m.TaskSystem(), self.ts], self.fname)
+        xss = a.load(self.fname)
+        self.assertEqual(len(xss), 3)
+        self.assertSameTasks(xss[0], self.ts)
+        self.assertEqual(len(xss[1]), 0)
+        self.assertSameTasks(xss[2], self.ts)
+        self.assertFalse(hasattr(xss[0][0], 'response_time'))
+        self.assertFalse(hasattr(xss[0][0], 'resmodel'))
+
+    def test_resmodel(self):
+        r.initialize_resource_model([self.t1, self.t2])
+        self.t1.resmodel[1].add_request(1)
+        self.t2.resmodel[1].add_read_request(2)
+        self.t2.resmodel[7].add_request(2)
+        a.write([self.ts], self.fname)
+        xs = a.load(self.fname)[0]
+        self.assertFalse(hasattr(xs[2], 'resmodel'))
+        for x, t in zip(xs[:2], self.ts):
+            self.assertIsInstance(x.resmodel, r.ResourceRequirements)
+            self.assertEqual(sorted(x.resmodel.keys()),
+                             sorted(t.resmodel.keys()))
+            for res_id in x.resmodel:
+                for f in ['max_reads', 'max_writes', 'max_read_length',
+                          'max_write_length', 'priority']:
+                    self.assertEqual(getattr(x.resmodel[res_id], f),
+                                     getattr(t.resmodel[res_id], f))
+        self.t1.resmodel['serial I/O'].add_request(1)
+        self.assertRaises(a.ArchiveError, a.write, [self.ts], self.fname)
+
+    def test_unencodable_parameters(self):
+        self.t3.response_time = Fraction(121, 2)
+        self.assertRaises(a.ArchiveError, a.write, [self.ts], self.fname)
+        self.t3.response_time = 60.25
+        self.t1.cost = 2**63
+        self.assertRaises(a.ArchiveError, a.write, [self.ts], self.fname)
+        self.t1.cost = 2**63 - 1
+        # t3.cost is a float
+        self.assertRaises(a.ArchiveError, a.write, [self.ts], self.fname)
+        self.t3.cost = 25
+        a.write([self.ts], self.fname)
+        self.assertEqual(a.load(self.fname)[0][0].cost, 2**63 - 1)
+
+    def test_append_and_random_access(self):
+        with a.ArchiveWriter(self.fname) as out:
+            self.assertEqual(out.write(self.ts), 0)
+        with a.ArchiveWriter(self.fname, append=True) as out:
+            for i in range(10):
+                self.assertEqual(out.write(m.TaskSystem(
+                    [m.SporadicTask(i + 1, 100)])), i + 1)
+        with a.Archive(self.fname) as archive:
+            self.assertEqual(len(archive), 11)
+            self.assertSameTasks(archive[0], self.ts)
+            self.assertEqual(archive[7][0].cost, 7)
+            self.assertEqual(archive[-1][0].cost, 10)
+            self.assertEqual([ts[0].cost for ts in archive.shard(1, 3)],
+                             [1, 4, 7, 10])
+            tasks, res = archive.columns(5)
+            self.assertEqual(tasks['cost'], [5])
+            self.assertEqual(res, {})
+
+    def test_recover_index(self):
+        out = a.ArchiveWriter(self.fname)
+        out.write(self.ts)
+        out.write(self.ts)
+        out.file.flush()
+        # writer not closed: no index yet
+        with a.Archive(self.fname) as archive:
+            self.assertEqual(len(archive), 2)
+            self.assertSameTasks(archive[1], self.ts)
+        out.close()
+
+    def test_not_an_archive(self):
+        with open(self.fname, 'w') as f:
+            f.write('<taskset/>')
+        self.assertRaises(a.ArchiveError, a.Archive, self.fname)
@@ -2,6 +2,9 @@ from __future__ import division
 
 import unittest
 import StringIO
+import os
+import shutil
+import tempfile
 from math import ceil
 
 import schedcat.overheads.model as m
@@ -9,10 +12,18 @@ import schedcat.overheads.jlfp as jlfp
 import schedcat.overheads.pfair as pfair
 import schedcat.overheads.fp as fp
 import schedcat.overheads.locking as locking
+import schedcat.overheads.sensitivity as sens
 import schedcat.model.tasks as tasks
 import schedcat.model.resources as res
 
-from schedcat.util.math import const
+from schedcat.util.math import const, lin, piece_wise_linear
+
+try:
+    import schedcat.overheads.jlfp_columnar as jlfp_col
+    import schedcat.model.columnar as columnar
+    numpy_available = True
+except ImportError:
+    numpy_available = False
 
 class Model(unittest.TestCase):
     def setUp(self):
@@ -60,6 +71,118 @@ class Model(unittest.TestCase):
         self.assertGreater(o(8192), 800.0)
         self.assertAlmostEqual(o(16384), 17000.0)
 
+    def test_cpmd_evaluate(self):
+        o = m.CacheDelay.from_file(self.cpmd_file)
+        wss = [0, 512, 1024, 3000, 8192, 16384, 20000]
+        self.assertEqual(list(o.evaluate(wss)), [o(x) for x in wss])
+        self.assertEqual(len(o.evaluate([])), 0)
+
+    def test_snapshot(self):
+        o = m.Overheads.from_file(self.sched_file)
+        o.cache_affinity_loss = m.CacheDelay.from_file(self.cpmd_file)
+        s = o.at(15)
+        self.assertIsInstance(s, m.Overheads)
+        self.assertIs(o.at(15), s)
+        self.assertIs(s.at(15), s)
+        self.assertIsNot(s.at(45), s)
+        self.assertAlmostEqual(s.schedule(15), 15.0)
+        self.assertEqual(s.tick(15), 0)
+        self.assertEqual(s.quantum_length, o.quantum_length)
+        self.assertAlmostEqual(s.cache_affinity_loss(8192),
+                               o.cache_affinity_loss(8192))
+        self.assertAlmostEqual(s.cache_affinity_loss(8192),
+                               o.cache_affinity_loss(8192))
+        self.assertEqual(list(s.cache_affinity_loss.evaluate([1024])),
+                         [100.0])
+        self.assertAlmostEqual(m.snapshot(o, 45).schedule(45), 30.0)
+
+        # replacing an overhead function invalidates the snapshot
+        o.schedule = const(7)
+        self.assertIsNot(o.at(15), s)
+        self.assertEqual(o.at(15).schedule(15), 7)
+        o.quantum_length = 500
+        self.assertEqual(o.at(15).quantum_length, 500)
+
+        # ... and so does updating a CPMD curve in place
+        s = o.at(15)
+        o.cache_affinity_loss.set_cpmd_cost(m.CacheDelay.L1, const(41000))
+        self.assertIsNot(o.at(15), s)
+        self.assertEqual(o.at(15).cache_affinity_loss(8192), 41000)
+
+        # ... or a custom field
+        o.custom = const(1)
+        s = o.at(15)
+        o.custom = const(2)
+        self.assertEqual(o.at(15).custom(15), 2)
+
+    def test_snapshot_cache_size(self):
+        o = m.Overheads()
+        s = o.at(1)
+        for n in range(2, m.SNAPSHOT_CACHE_SIZE + 1):
+            o.at(n)
+        self.assertIs(o.at(1), s)
+        o.at(m.SNAPSHOT_CACHE_SIZE + 1)
+        self.assertEqual(len(o._snapshots), m.SNAPSHOT_CACHE_SIZE)
+        # 2 is now the least recently used task count
+        self.assertFalse(2 in o._snapshots)
+        self.assertIs(o.at(1), s)
+
+    def test_non_decreasing(self):
+        o = m.Overheads.from_file(self.sched_file, non_decreasing=False)
+        self.assertAlmostEqual(o.schedule(35), 18.5)
+        self.assertAlmostEqual(o.schedule(40), 17.0)
+
+    def test_cached_from_file(self):
+        d = tempfile.mkdtemp()
+        try:
+            fname = os.path.join(d, 'sched.csv')
+            with open(fname, 'w') as f:
+                f.write(self.sched_file.getvalue())
+            o1 = m.Overheads.from_file(fname)
+            o1.schedule = const(1)
+            o2 = m.Overheads.from_file(fname)
+            self.assertIsNot(o1, o2)
+            self.assertAlmostEqual(o2.schedule(45), 30.0)
+            o3 = m.Overheads.from_file(fname, non_decreasing=False)
+            self.assertAlmostEqual(o3.schedule(40), 17.0)
+
+            # persistent cache, as shared by worker processes
+            cache = os.path.join(d, 'cache')
+            os.mkdir(cache)
+            m.clear_model_cache()
+            m.cached_model('Overheads', fname, (),
+                           lambda: m.Overheads.from_file(fname), cache)
+            self.assertEqual(len(os.listdir(cache)), 1)
+            m.clear_model_cache()
+            o5 = m.cached_model('Overheads', fname, (),
+                                lambda: self.fail("not cached"), cache)
+            self.assertAlmostEqual(o5.schedule(45), 30.0)
+
+            # missing cache directories are created
+            cache = os.path.join(d, 'new', 'cache')
+            m.clear_model_cache()
+            m.cached_model('Overheads', fname, (),
+                           lambda: m.Overheads.from_file(fname), cache)
+            self.assertEqual(len(os.listdir(cache)), 1)
+
+            # unusable cache directories fall back to the memory cache
+            m.clear_model_cache()
+            o6 = m.cached_model('Overheads', fname, (),
+                                lambda: m.Overheads.from_file(fname), fname)
+            self.assertAlmostEqual(o6.schedule(45), 30.0)
+            o7 = m.cached_model('Overheads', fname, (),
+                                lambda: self.fail("not cached"), fname)
+            self.assertAlmostEqual(o7.schedule(45), 30.0)
+
+            # changed files are reloaded
+            with open(fname, 'w') as f:
+                f.write("TASK-COUNT, SCHEDULE\n1, 100\n")
+            self.assertAlmostEqual(m.Overheads.from_file(fname).schedule(1),
+                                   100.0)
+        finally:
+            m.clear_model_cache()
+            shutil.rmtree(d)
+
     def test_exceptions(self):
         self.assertRaises(IOError, m.Overheads.from_file, '/non/existant')
         self.assertRaises(IOError, m.CacheDelay.from_file, '/non/existant')
@@ -186,6 +309,18 @@ class JLFPOverheads(unittest.TestCase):
         self.unchanged_deadline()
 
 
+    def test_cached_aggregates(self):
+        self.assertAlmostEqual(self.ts.utilization(), 0.2)
+        self.assertEqual(self.ts.min_deadline(), 50000)
+        self.o.schedule = const(2500)
+        self.o.release_latency = const(1000)
+        self.assertEqual(jlfp.charge_scheduling_overheads(self.o, 4,  False, self.ts), self.ts)
+        self.assertAlmostEqual(self.ts.utilization(),
+                               sum([t.utilization() for t in self.ts]))
+        self.assertGreater(self.ts.utilization(), 0.2)
+        self.assertEqual(self.ts.min_deadline(),
+                         min([t.deadline for t in self.ts]))
+
     def test_tick_example(self):
         e1  = 2000
         e2  = 3000
@@ -200,6 +335,86 @@ class JLFPOverheads(unittest.TestCase):
         self.assertEqual(self.ts[0].cost, int(ceil(30000 / 3)))
         self.assertEqual(self.ts[1].cost, 5000 + int(ceil(20000 / 3)))
 
+@unittest.skipIf(not numpy_available, "NumPy not available")
+class ColumnarJLFPOverheads(unittest.TestCase):
+    def setUp(self):
+        import random
+        rng = random.Random(7)
+        self.tasksets = []
+        for n in [0, 1, 2, 3, 5, 10, 25]:
+            ts = tasks.TaskSystem()
+            for i in xrange(n):
+                p = rng.randint(10, 1000) * 100
+                t = tasks.SporadicTask(rng.randint(1, p // 5), p,
+                                       rng.randint(p // 2, p))
+                t.wss = rng.choice([0, 256, 1024, 4096, 16384])
+                ts.append(t)
+            self.tasksets.append(ts)
+        self.o = m.Overheads()
+        self.o.tick = const(11)
+        self.o.release = lin(5, 0.5)
+        self.o.release_latency = const(25)
+        self.o.ipi_latency = piece_wise_linear([(1, 5), (10, 15), (30, 20)])
+        self.o.schedule = piece_wise_linear([(1, 10), (10, 20), (30, 60)])
+        self.o.ctx_switch = const(3)
+        self.o.initial_cache_load = \
+            m.CacheDelay.from_file(StringIO.StringIO("""WSS, MEM
+0, 1
+1024, 10
+16384, 300
+"""))
+        self.o.cache_affinity_loss = self.o.initial_cache_load
+
+    def compare(self, fun, batch_fun, *args):
+        cols = [columnar.ColumnarTaskSystem.from_tasks(ts)
+                for ts in self.tasksets]
+        expected = [fun(*(args + (ts,))) is not False
+                    for ts in self.tasksets]
+        mask = batch_fun(*(args + (cols,)))
+        self.assertEqual(mask.tolist(), expected)
+        for (ts, c, ok) in zip(self.tasksets, cols, expected):
+            if ok:
+                for (t, x) in zip(ts, c):
+                    self.assertEqual(t.cost, x.cost)
+                    self.assertEqual(t.period, x.period)
+                    self.assertEqual(t.deadline, x.deadline)
+        return cols
+
+    def test_initial_load(self):
+        self.compare(jlfp.charge_initial_load,
+                     jlfp_col.charge_initial_load_batch, self.o)
+
+    def test_scheduling_overheads(self):
+        for dedicated_irq in [False, True]:
+            for cpus in [1, 4]:
+                self.setUp()
+                self.compare(jlfp.charge_scheduling_overheads,
+                             jlfp_col.charge_scheduling_overheads_batch,
+                             self.o, cpus, dedicated_irq)
+
+    def test_infeasible(self):
+        self.o.tick = const(600)
+        self.o.quantum_length = 1000
+        self.compare(jlfp.charge_scheduling_overheads,
+                     jlfp_col.charge_scheduling_overheads_batch,
+                     self.o, 4, False)
+
+    def test_quantize(self):
+        self.compare(jlfp.charge_scheduling_overheads,
+                     jlfp_col.charge_scheduling_overheads_batch,
+                     self.o, 4, False)
+        self.compare(jlfp.quantize_params, jlfp_col.quantize_params_batch)
+
+    def test_single(self):
+        ts = columnar.ColumnarTaskSystem.from_tasks(self.tasksets[-1])
+        self.assertIs(jlfp_col.charge_scheduling_overheads(self.o, 4, False,
+                                                           ts), ts)
+        self.assertIs(jlfp_col.quantize_params(ts), ts)
+        self.assertEqual(ts.cost.dtype.kind, 'i')
+        self.o.tick = const(2000)
+        self.assertFalse(jlfp_col.charge_scheduling_overheads(self.o, 4,
+                                                              False, ts))
+
 class PfairOverheads(unittest.TestCase):
     def setUp(self):
         self.ts = tasks.TaskSystem([
@@ -276,6 +491,17 @@ class PfairOverheads(unittest.TestCase):
         self.unchanged_period()
         self.unchanged_deadline()
 
+    def test_cache_affinity_loss_wss(self):
+        # CPMD is a function of the working set size, not the task count
+        self.o.cache_affinity_loss = lin(0, 0.125)
+        self.ts[0].wss = 1000
+        self.ts[1].wss = 2000
+        self.assertEqual(pfair.charge_scheduling_overheads(self.o, 4,  False, self.ts), self.ts)
+        self.assertEqual(self.ts[0].cost, 20000)
+        self.assertEqual(self.ts[1].cost, 10000)
+        self.unchanged_period()
+        self.unchanged_deadline()
+
     def test_ipi_latency(self):
         # IPI latency is irrelevant for Pfair
         self.o.ipi_latency = const(1000)
@@ -384,6 +610,19 @@ class FPOverheads(unittest.TestCase):
         self.unchanged_deadline()
         self.no_jitter()
 
+    def test_cache_affinity_loss_wss(self):
+        # CPMD is a function of the working set size, not the task count
+        self.o.cache_affinity_loss = lin(0, 0.01)
+        self.ts[0].wss = 100
+        self.ts[1].wss = 400
+        ts = fp.charge_scheduling_overheads(self.o, 4,  False, self.ts)
+        self.assertEqual(fp.quantize_params(ts), ts)
+        self.assertEqual(self.ts[0].cost, 10004)
+        self.assertEqual(self.ts[1].cost,  5004)
+        self.unchanged_period()
+        self.unchanged_deadline()
+        self.no_jitter()
+
     def test_ipi_latency(self):
         self.o.ipi_latency = const(1)
         ts = fp.charge_scheduling_overheads(self.o, 4,  False, self.ts)
@@ -893,3 +1132,74 @@ class LockingOverheads(unittest.TestCase):
         self.assertEqual(self.ts[0].resmodel[2].max_write_length,  11 + xcost)
         self.assertEqual(self.ts[1].resmodel[2].max_read_length,   0)
         self.assertEqual(self.ts[1].resmodel[2].max_write_length, 17 + xcost)
+
+
+class Sensitivity(unittest.TestCase):
+    def setUp(self):
+        self.tasksets = []
+        for u in [10, 20, 40, 60, 80, 95]:
+            self.tasksets.append(tasks.TaskSystem([
+                tasks.SporadicTask(u * 50, 10000),
+                tasks.SporadicTask(u * 100, 20000),
+            ]))
+        for ts in self.tasksets:
+            for t in ts:
+                t.wss = 0
+        self.o = m.Overheads()
+        self.o.schedule = const(100)
+        self.o.ctx_switch = lin(10, 5)
+        self.calls = 0
+
+    def schedulable(self, ts, oheads):
+        self.calls += 1
+        return jlfp.charge_scheduling_overheads(oheads, 1, False, ts) and \
+               jlfp.quantize_params(ts) and ts.utilization() <= 1
+
+    def test_scale_overheads(self):
+        s = sens.scale_overheads(self.o, 2.5)
+        self.assertAlmostEqual(s.schedule(2), 250)
+        self.assertAlmostEqual(s.ctx_switch(2), 50)
+        self.assertEqual(s.ctx_switch.evaluate([0, 2]), [25, 50])
+        self.assertEqual(s.quantum_length, self.o.quantum_length)
+        self.assertEqual(self.o.schedule(2), 100)
+
+    def test_scale_snapshot(self):
+        s = sens.scale_overheads(self.o.at(1), 2)
+        self.assertEqual(s.task_count, 1)
+        self.assertAlmostEqual(s.ctx_switch(1), 30)
+        self.assertAlmostEqual(m.snapshot(s, 2).ctx_switch(2), 40)
+        for base in [self.o, self.o.at(1), self.o.at(2)]:
+            ts = self.tasksets[0].copy()
+            charged = jlfp.charge_scheduling_overheads(
+                m.snapshot(sens.scale_overheads(base, 2), len(ts)),
+                1, False, ts)
+            self.assertEqual([t.cost for t in charged], [980, 1480])
+
+    def test_sweep(self):
+        factors = [0, 0.5, 1, 2, 4, 8, 16, 32]
+        expected = []
+        for f in factors:
+            ok = [sens.passes(ts, self.o, self.schedulable, f)
+                  for ts in self.tasksets]
+            expected.append((f, sum(ok) / len(ok)))
+        self.calls = 0
+        result = sens.sensitivity_sweep(self.tasksets, self.o, self.schedulable,
+                                        reversed(factors))
+        self.assertEqual(result, expected)
+        self.assertTrue(result[-1][1] < result[3][1] < result[0][1] == 1)
+        self.assertLessEqual(self.calls, 4 * len(self.tasksets))
+        for ts in self.tasksets:
+            # the task sets are not modified
+            self.assertEqual(ts[0].period, 10000)
+
+    def test_max_overhead_scale(self):
+        ts = self.tasksets[3]
+        f = sens.max_overhead_scale(ts, self.o, self.schedulable, 0, 64, 0.01)
+        self.assertTrue(sens.passes(ts, self.o, self.schedulable, f))
+        self.assertFalse(sens.passes(ts, self.o, self.schedulable, f + 0.01))
+        self.assertEqual(sens.max_overhead_scale(self.tasksets[0], self.o,
+                                                 self.schedulable, 0, 1), 1)
+        heavy = tasks.TaskSystem([tasks.SporadicTask(10, 10)])
+        heavy[0].wss = 0
+        self.assertIsNone(sens.max_overhead_scale(heavy, self.o, self.schedulable,
+                                                  1, 2))
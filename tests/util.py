@@ -69,12 +69,58 @@ class Math(unittest.TestCase):
         self.assertEqual(m.lcm(10, 20), 20)
         self.assertEqual(m.lcm(3, 4), 12)
 
+    def test_bounded_lcm(self):
+        self.assertEqual(m.bounded_lcm([], None), 0)
+        self.assertEqual(m.bounded_lcm([10, 20, 3], None), 60)
+        self.assertEqual(m.bounded_lcm([10, 20, 3], 60), 60)
+        self.assertIsNone(m.bounded_lcm([10, 20, 3], 59))
+        self.assertIsNone(m.bounded_lcm([100], 99))
+        # stops before looking at the rest
+        self.assertIsNone(m.bounded_lcm([7, 11, 13, "foo"], 70))
+        self.assertRaises(Exception, m.bounded_lcm, [7, 11, "foo"], 1000)
+
     def test_topsum(self):
         vals = [30, 60, 10, 40, 50, 20]
         self.assertEqual(m.topsum(vals, lambda x: x * 2, 3), 2 * (40 + 50 + 60))
         self.assertEqual(m.lcm(99), 99)
         self.assertEqual(m.lcm(10, 20, 3), 60)
 
+    def test_exact_sum(self):
+        terms = [(1, 3), (1, 6), (Fraction(1, 2), 2), (2, 4)]
+        q = m.exact_sum(terms)
+        self.assertIsInstance(q, Fraction)
+        self.assertEqual(q, sum([Fraction(n, d) for (n, d) in terms]))
+        self.assertEqual(q, Fraction(5, 4))
+        self.assertEqual(m.exact_sum([]), 0)
+        self.assertRaises(TypeError, m.exact_sum, [(1.5, 2)])
+
+    def test_exact_max(self):
+        terms = [(1, 3), (2, 7), (5, 14), (1, 4)]
+        self.assertEqual(m.exact_max(terms), Fraction(5, 14))
+        self.assertEqual(m.exact_largest(terms, 2), [(5, 14), (1, 3)])
+        self.assertRaises(ValueError, m.exact_max, [])
+
+    def test_exact_comparisons(self):
+        big = 10**30
+        one = m.ExactSum(big + 1, big)
+        self.assertEqual(float(one), 1.0)
+        self.assertTrue(one > 1)
+        self.assertTrue(one >= 1)
+        self.assertFalse(one <= 1)
+        self.assertTrue(one < Fraction(big + 2, big))
+        self.assertTrue(m.ExactSum(3, 2) <= 2)
+        self.assertTrue(m.ExactSum(3, 2) >= 1.5)
+        self.assertTrue(m.ExactSum(4, 2) <= 2)
+        self.assertFalse(m.ExactSum(4, 2) < 2)
+
+    def test_exact_rounding(self):
+        big = 10**30
+        self.assertEqual(m.ExactSum(big + 1, big).ceil(), 2)
+        self.assertEqual(m.ExactSum(big + 1, big).floor(), 1)
+        self.assertEqual(m.ExactSum(-3, 2).ceil(), -1)
+        self.assertEqual(m.ExactSum(-3, 2).floor(), -2)
+        self.assertEqual(m.ExactSum(4, 2).ceil(), 2)
+
 
 class LinEqs(unittest.TestCase):
     def setUp(self):
@@ -99,3 +145,19 @@ class LinEqs(unittest.TestCase):
             self.assertAlmostEqual(self.pwlin(x), x + 3)
 
 
+
+    def test_evaluate(self):
+        xs = [-5, 0, 0.5, 1, 1.5, 2, 3, 1000]
+        for f in [self.f, self.c, self.pwlin,
+                  m.piece_wise_linear([(0, 10), (10, 0), (20, 5)])]:
+            self.assertEqual(m.evaluate(f, xs), [f(x) for x in xs])
+            self.assertEqual(len(f.evaluate(xs)), len(xs))
+        self.assertEqual(m.evaluate(lambda x: 2 * x, xs),
+                         [2 * x for x in xs])
+        self.assertEqual(m.evaluate(self.pwlin, []), [])
+
+    def test_is_constant(self):
+        self.assertTrue(self.c.is_constant())
+        self.assertFalse(self.f.is_constant())
+        self.assertFalse(self.pwlin.is_constant())
+        self.assertTrue(m.piece_wise_linear([(0, 3), (1, 3)]).is_constant())